@@ -1,11 +1,80 @@
 from contextlib import asynccontextmanager
 
-import httpx
 from fastapi import FastAPI
 
-from common.httpx import get_httpx_clint
-from common.redis import get_redis, redis
+from clients.tron import (
+    AccountInfoCache,
+    EndpointPool,
+    Priority,
+    RateLimiter,
+    TronClient,
+    get_account_info_cache,
+    get_endpoint_pool,
+    get_rate_limiter,
+    get_tron_retries,
+)
+from common.db import engine
+from common.db import get_pool_connections as get_db_pool_connections
+from common.db import replica_engine
+from common.httpx import (
+    create_httpx_client,
+    create_httpx_transport,
+    get_httpx_clint,
+    get_httpx_pool_stats,
+)
+from common.metrics import (
+    POOL_CONNECTIONS,
+    REGISTRY,
+    MetricsMiddleware,
+    SharedMetrics,
+    get_shared_metrics,
+)
+from common.redis import get_pool_connections as get_redis_pool_connections
+from common.redis import get_redis, get_tracked_cache, redis
+from common.redis_cache import (
+    InvalidatedCache,
+    InvalidationTracker,
+    TrackedCache,
+)
+from cruds.tron_aq import TronAddressQueryRepository
+from cruds.tron_aq_writer import (
+    TronAddressQueryStreamWriter,
+    TronAddressQueryWriter,
+    get_tron_aq_writer,
+)
+from routers.metrics import router as metrics_router
 from routers.root import router
+from settings.db import get_db_settings
+from settings.httpx import get_httpx_settings
+from settings.redis import get_redis_settings
+from settings.server import get_server_settings
+from settings.tron import get_tron_settings
+from tasks.blocks import BlockFollower
+from tasks.counters import CountReconciler
+from tasks.partitions import PartitionMaintainer
+from tasks.replica import ReplicaLagMonitor
+from tasks.rollups import RollupRefresher
+from tasks.watchlist import WatchlistPoller
+
+
+def create_tron_aq_writer() -> TronAddressQueryWriter | None:
+    db_settings = get_db_settings()
+    match db_settings.WRITE_BEHIND_MODE:
+        case "memory":
+            return TronAddressQueryWriter(
+                redis,
+                batch_size=db_settings.WRITE_BEHIND_BATCH_SIZE,
+                flush_interval=db_settings.WRITE_BEHIND_FLUSH_INTERVAL,
+                max_queue_size=db_settings.WRITE_BEHIND_MAX_QUEUE_SIZE,
+            )
+        case "stream":
+            return TronAddressQueryStreamWriter(
+                redis,
+                batch_size=db_settings.WRITE_BEHIND_BATCH_SIZE,
+                flush_interval=db_settings.WRITE_BEHIND_FLUSH_INTERVAL,
+                max_deliveries=db_settings.WRITE_BEHIND_MAX_DELIVERIES,
+            )
+    return None
 
 
 @asynccontextmanager
@@ -13,11 +82,215 @@ async def lifespan(app: FastAPI):
     # Use context manager to automatically close all connections
     # on application shutdown. Also one client per app let us
     # keep http connection open and not to reopen it on every request to tron
-    async with httpx.AsyncClient() as httpx_client:
+    httpx_settings = get_httpx_settings()
+    tron_settings = get_tron_settings()
+    rate_limited = tron_settings.TRON_RATE_LIMIT_RPS > 0 or bool(
+        tron_settings.TRON_RATE_LIMIT_ENDPOINT_RPS
+    )
+    # Retries below the limiter would spend budget without taking it,
+    # TronClient retries through the limiter instead
+    tron_retries = httpx_settings.HTTPX_RETRIES if rate_limited else 0
+    httpx_transport = create_httpx_transport(
+        httpx_settings, retries=0 if rate_limited else None
+    )
+    async with create_httpx_client(
+        httpx_transport, httpx_settings
+    ) as httpx_client:
         app.dependency_overrides[get_httpx_clint] = lambda: httpx_client
+        app.dependency_overrides[get_httpx_pool_stats] = (
+            lambda: httpx_transport.stats
+        )
         app.dependency_overrides[get_redis] = lambda: redis
-        yield
+        POOL_CONNECTIONS.collect(httpx_transport.get_pool_connections)
+        POOL_CONNECTIONS.collect(get_db_pool_connections)
+        POOL_CONNECTIONS.collect(get_redis_pool_connections)
+
+        server_settings = get_server_settings()
+        shared_metrics = None
+        if server_settings.SERVER_METRICS_DIR is not None:
+            shared_metrics = SharedMetrics(
+                REGISTRY,
+                server_settings.SERVER_METRICS_DIR,
+                interval=server_settings.SERVER_METRICS_INTERVAL,
+            )
+            await shared_metrics.start()
+            app.dependency_overrides[get_shared_metrics] = (
+                lambda: shared_metrics
+            )
+
+        # One pool per worker so all requests share endpoints health
+        endpoint_pool = EndpointPool(
+            tron_settings.TRON_API_URLS,
+            hedge=tron_settings.TRON_HEDGE_ENABLED,
+            failure_threshold=tron_settings.TRON_CIRCUIT_BREAKER_THRESHOLD,
+            cooldown=tron_settings.TRON_CIRCUIT_BREAKER_COOLDOWN,
+        )
+        app.dependency_overrides[get_endpoint_pool] = lambda: endpoint_pool
+
+        rate_limiter = None
+        if rate_limited:
+            # One limiter per worker to share its local queue and tokens
+            rate_limiter = RateLimiter(
+                redis,
+                rate=tron_settings.TRON_RATE_LIMIT_RPS,
+                endpoint_rates=tron_settings.TRON_RATE_LIMIT_ENDPOINT_RPS,
+                burst_seconds=tron_settings.TRON_RATE_LIMIT_BURST_SECONDS,
+                reserved_share=tron_settings.TRON_RATE_LIMIT_RESERVED_SHARE,
+                local_batch=tron_settings.TRON_RATE_LIMIT_LOCAL_BATCH,
+                max_wait={
+                    Priority.INTERACTIVE: (
+                        tron_settings.TRON_RATE_LIMIT_INTERACTIVE_MAX_WAIT
+                    ),
+                    Priority.BACKGROUND: (
+                        tron_settings.TRON_RATE_LIMIT_BACKGROUND_MAX_WAIT
+                    ),
+                },
+            )
+            app.dependency_overrides[get_rate_limiter] = lambda: rate_limiter
+            app.dependency_overrides[get_tron_retries] = lambda: tron_retries
+
+        redis_settings = get_redis_settings()
+        account_info_cache = None
+        if tron_settings.TRON_ACCOUNT_CACHE_TTL > 0:
+            # One cache per worker to share LRU tier and in-flight fetches
+            account_info_cache = AccountInfoCache(
+                redis,
+                # Followed blocks drop changed entries, so they can be
+                # kept longer. Only if memory tiers of all workers learn
+                # about it from invalidations
+                ttl=(
+                    tron_settings.TRON_BLOCKS_ACCOUNT_CACHE_TTL
+                    if tron_settings.TRON_BLOCKS_ENABLED
+                    and redis_settings.REDIS_CLIENT_CACHE_ENABLED
+                    else tron_settings.TRON_ACCOUNT_CACHE_TTL
+                ),
+                max_local_size=tron_settings.TRON_ACCOUNT_CACHE_LOCAL_SIZE,
+            )
+            app.dependency_overrides[get_account_info_cache] = (
+                lambda: account_info_cache
+            )
+
+        invalidation_tracker = None
+        if redis_settings.REDIS_CLIENT_CACHE_ENABLED:
+            tracked_cache = TrackedCache(
+                [TronAddressQueryRepository.GENERATION_KEY],
+                max_size=redis_settings.REDIS_CLIENT_CACHE_MAX_SIZE,
+                ttl=redis_settings.REDIS_CLIENT_CACHE_TTL,
+            )
+            tracked_caches: list[InvalidatedCache] = [tracked_cache]
+            if account_info_cache is not None:
+                # Changes by other workers drop entries of memory tier
+                tracked_caches.append(account_info_cache)
+            invalidation_tracker = InvalidationTracker(
+                redis,
+                tracked_caches,
+                ping_interval=redis_settings.REDIS_CLIENT_CACHE_PING_INTERVAL,
+            )
+            await invalidation_tracker.start()
+            app.dependency_overrides[get_tracked_cache] = lambda: tracked_cache
+
+        db_settings = get_db_settings()
+        partition_maintainer = PartitionMaintainer(
+            months_ahead=db_settings.DB_PARTITIONS_AHEAD,
+            retention_months=db_settings.DB_PARTITION_RETENTION_MONTHS,
+        )
+        await partition_maintainer.start()
+
+        replica_lag_monitor = None
+        if replica_engine is not None:
+            replica_lag_monitor = ReplicaLagMonitor(
+                interval=db_settings.DB_REPLICA_LAG_CHECK_INTERVAL
+            )
+            await replica_lag_monitor.start()
+
+        count_reconciler = CountReconciler(
+            redis, interval=db_settings.DB_COUNT_RECONCILE_INTERVAL
+        )
+        await count_reconciler.start()
+
+        rollup_refresher = None
+        if db_settings.DB_ROLLUP_ENABLED:
+            rollup_refresher = RollupRefresher(
+                redis,
+                interval=db_settings.DB_ROLLUP_INTERVAL,
+                lag=db_settings.DB_ROLLUP_LAG,
+            )
+            await rollup_refresher.start()
+
+        tron_aq_writer = create_tron_aq_writer()
+        if tron_aq_writer is not None:
+            await tron_aq_writer.start()
+            app.dependency_overrides[get_tron_aq_writer] = (
+                lambda: tron_aq_writer
+            )
+
+        watchlist_poller = None
+        if tron_settings.TRON_WATCHLIST_ENABLED:
+            watchlist_poller = WatchlistPoller(
+                TronClient(
+                    httpx_client,
+                    pool=endpoint_pool,
+                    limiter=rate_limiter,
+                    priority=Priority.BACKGROUND,
+                    retries=tron_retries,
+                ),
+                redis,
+                cache=account_info_cache,
+                writer=tron_aq_writer,
+                min_interval=tron_settings.TRON_WATCHLIST_MIN_INTERVAL,
+                max_interval=tron_settings.TRON_WATCHLIST_MAX_INTERVAL,
+                max_rps=tron_settings.TRON_WATCHLIST_MAX_RPS,
+                concurrency=tron_settings.TRON_BATCH_CONCURRENCY,
+            )
+            await watchlist_poller.start()
+
+        block_follower = None
+        if tron_settings.TRON_BLOCKS_ENABLED:
+            block_follower = BlockFollower(
+                TronClient(
+                    httpx_client,
+                    pool=endpoint_pool,
+                    limiter=rate_limiter,
+                    priority=Priority.BACKGROUND,
+                    retries=tron_retries,
+                ),
+                redis,
+                cache=account_info_cache,
+                interval=tron_settings.TRON_BLOCKS_INTERVAL,
+                max_batch=tron_settings.TRON_BLOCKS_MAX_BATCH,
+                max_lag=tron_settings.TRON_BLOCKS_MAX_LAG,
+                watchlist=tron_settings.TRON_WATCHLIST_ENABLED,
+            )
+            await block_follower.start()
+        try:
+            yield
+        finally:
+            if block_follower is not None:
+                await block_follower.stop()
+            if watchlist_poller is not None:
+                await watchlist_poller.stop()
+            if tron_aq_writer is not None:
+                # Flush buffered records before shutdown
+                await tron_aq_writer.stop()
+            if rollup_refresher is not None:
+                await rollup_refresher.stop()
+            await count_reconciler.stop()
+            if replica_lag_monitor is not None:
+                await replica_lag_monitor.stop()
+            await partition_maintainer.stop()
+            if invalidation_tracker is not None:
+                await invalidation_tracker.stop()
+            if shared_metrics is not None:
+                await shared_metrics.stop()
+            POOL_CONNECTIONS.clear()
+            # Close pooled connections once buffers are flushed
+            await engine.dispose()
+            if replica_engine is not None:
+                await replica_engine.dispose()
+            await redis.aclose()
 
 
 fastapi_app = FastAPI(title="Tron Network Observer", lifespan=lifespan)
+fastapi_app.add_middleware(MetricsMiddleware)
 fastapi_app.include_router(router)
+fastapi_app.include_router(metrics_router)
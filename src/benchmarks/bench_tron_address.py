@@ -0,0 +1,64 @@
+"""Micro-benchmark of TRON address validation.
+
+Compares validation done three times per request before (schema, client
+and model each ran b58decode_check, model also scanned the alphabet)
+with the shared module, uncached and memoized.
+
+Run from src: python -m benchmarks.bench_tron_address
+"""
+
+import timeit
+
+from base58 import b58decode_check
+
+from common.tron_address import _decode, decode_address
+
+ADDRESS = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+NUMBER = 20_000
+
+
+def legacy_validation(address: str):
+    # TronAddressQueryRequest and TronClient
+    for _ in range(2):
+        if len(address) != 34 or not address.startswith("T"):
+            raise ValueError()
+        if len(b58decode_check(address)) != 21:
+            raise ValueError()
+    # TronAddressQuery
+    for char in address:
+        if char not in BASE58_ALPHABET:
+            raise ValueError()
+    if len(b58decode_check(address)) != 21:
+        raise ValueError()
+
+
+def shared_uncached_validation(address: str):
+    for _ in range(3):
+        _decode.__wrapped__(address)
+
+
+def shared_cached_validation(address: str):
+    for _ in range(3):
+        decode_address(address)
+
+
+def main():
+    results = {
+        name: timeit.timeit(lambda: func(ADDRESS), number=NUMBER)
+        for name, func in [
+            ("legacy (3 passes)", legacy_validation),
+            ("shared uncached (3 passes)", shared_uncached_validation),
+            ("shared cached (3 passes)", shared_cached_validation),
+        ]
+    }
+    baseline = results["legacy (3 passes)"]
+    for name, total in results.items():
+        print(
+            f"{name:<28} {total / NUMBER * 1e6:8.2f} us/request"
+            f" {baseline / total:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Micro-benchmark of cached tron_address_query records.
+
+Compares pickled ORM instances (the original cache format), JSON and
+the versioned struct layout of cruds.tron_aq_codec by encode and decode
+time and bytes per record.
+
+Run from src: python -m benchmarks.bench_tron_aq_codec
+"""
+
+import json
+import pickle
+import timeit
+import uuid
+from datetime import datetime
+
+from cruds.tron_aq_codec import decode_record, encode_record
+from models.tron_address_query import TronAddressQuery
+
+NUMBER = 20_000
+
+
+def make_instance() -> TronAddressQuery:
+    instance = TronAddressQuery(
+        address="TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu",
+        address_data={
+            "bandwidth_used": 267,
+            "bandwidth_limit": 600,
+            "energy_used": 13_045,
+            "energy_limit": 90_000,
+            "trx_balance": 1_520.123456,
+        },
+    )
+    instance.id = uuid.uuid4()
+    instance.created_at = instance.updated_at = datetime.now()
+    return instance
+
+
+def encode_json(instance: TronAddressQuery) -> bytes:
+    return json.dumps(
+        {
+            "id": str(instance.id),
+            "address": instance.address,
+            "address_data": instance.address_data,
+            "created_at": instance.created_at.isoformat(),
+            "updated_at": instance.updated_at.isoformat(),
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+def main():
+    instance = make_instance()
+    codecs = [
+        ("pickle (ORM instance)", pickle.dumps, pickle.loads),
+        ("json", encode_json, json.loads),
+        ("struct v1", encode_record, decode_record),
+    ]
+    for name, encode, decode in codecs:
+        raw = encode(instance)
+        encode_time = timeit.timeit(lambda: encode(instance), number=NUMBER)
+        decode_time = timeit.timeit(lambda: decode(raw), number=NUMBER)
+        print(
+            f"{name:<22} {len(raw):5d} bytes"
+            f" encode {encode_time / NUMBER * 1e6:6.2f} us"
+            f" decode {decode_time / NUMBER * 1e6:6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Local stand-in for TronGrid wallet API used by load tests.
+
+Serves /wallet/getaccount and /wallet/getaccountresource with fixed
+latency plus uniform jitter, failing a share of requests with 503.
+Responses are derived from the address, so they are stable across runs.
+
+Run from src: python -m benchmarks.fake_trongrid --port 9000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_fake_trongrid(
+    latency: float = 0.05,
+    jitter: float = 0.02,
+    error_rate: float = 0.0,
+    seed: int | None = None,
+) -> FastAPI:
+    app = FastAPI(title="Fake TronGrid")
+    rng = random.Random(seed)
+
+    async def simulate() -> JSONResponse | None:
+        delay = latency + rng.uniform(-jitter, jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if rng.random() < error_rate:
+            return JSONResponse({"Error": "Service unavailable"}, 503)
+        return None
+
+    async def get_address_seed(request: Request) -> int:
+        payload = await request.json()
+        return zlib.crc32(str(payload.get("address")).encode())
+
+    @app.post("/wallet/getaccount")
+    async def get_account(request: Request):
+        error = await simulate()
+        if error is not None:
+            return error
+        seed = await get_address_seed(request)
+        return {"balance": seed % 10_000 * 1_000_000}
+
+    @app.post("/wallet/getaccountresource")
+    async def get_account_resource(request: Request):
+        error = await simulate()
+        if error is not None:
+            return error
+        seed = await get_address_seed(request)
+        return {
+            "freeNetUsed": seed % 600,
+            "freeNetLimit": 600,
+            "EnergyUsed": seed % 50_000,
+            "EnergyLimit": 50_000,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_fake_trongrid(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
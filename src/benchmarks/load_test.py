@@ -0,0 +1,304 @@
+"""Load test of the API against local Postgres, Redis and fake TronGrid.
+
+Starts benchmarks.fake_trongrid and app:fastapi_app under uvicorn with
+uvloop and httptools, fires concurrent /account_info and /records_info
+requests for a while and saves RPS and latency percentiles as JSON.
+POSTGRES_URL and REDIS_URL of the environment are used by the app, so
+point them to disposable databases with migrations applied.
+
+Run from src:
+    python -m benchmarks.load_test --duration 30 --concurrency 64
+    python -m benchmarks.load_test --baseline benchmarks/results/<run>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+
+from common.tron_address import encode_address
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PERCENTILES = (50, 95, 99)
+# Seconds to wait for started servers to accept requests
+STARTUP_TIMEOUT = 30.0
+
+
+def make_addresses(count: int, seed: int) -> list[str]:
+    """Valid, deterministic TRON addresses."""
+    rng = random.Random(seed)
+    return [encode_address(b"\x41" + rng.randbytes(20)) for _ in range(count)]
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@contextmanager
+def run_server(args: list[str], env: dict | None = None):
+    process = subprocess.Popen(
+        [sys.executable, *args], env={**os.environ, **(env or {})}
+    )
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_until_ready(url: str):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                # Any response means the server accepts connections
+                await client.post(url, json={})
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"{url} didn't start in time")
+                await asyncio.sleep(0.2)
+
+
+def summarize(latencies: list[float], errors: int, duration: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        **{
+            f"p{percent}_ms": round(percentile(latencies, percent) * 1000, 2)
+            for percent in PERCENTILES
+        },
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+class Scenario(ABC):
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    @abstractmethod
+    async def send(
+        self, client: httpx.AsyncClient, rng: random.Random
+    ) -> httpx.Response: ...
+
+    def report(self, duration: float) -> dict:
+        return summarize(self.latencies, self.errors, duration)
+
+
+class AccountInfoScenario(Scenario):
+    def __init__(self, weight: float, addresses: list[str]):
+        super().__init__("account_info", weight)
+        self.addresses = addresses
+
+    async def send(self, client: httpx.AsyncClient, rng: random.Random):
+        return await client.post(
+            "/api/tron/account_info",
+            json={"address": rng.choice(self.addresses)},
+        )
+
+
+class RecordsInfoScenario(Scenario):
+    def __init__(self, weight: float, max_page: int):
+        super().__init__("records_info", weight)
+        self.max_page = max_page
+
+    async def send(self, client: httpx.AsyncClient, rng: random.Random):
+        # Mostly the first page, like dashboards do
+        page_number = (
+            1 if rng.random() < 0.8 else rng.randint(2, self.max_page)
+        )
+        return await client.get(
+            "/api/tron/records_info",
+            params={"page_number": page_number, "page_size": 20},
+        )
+
+
+async def drive(
+    base_url: str,
+    scenarios: list[Scenario],
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> float:
+    """Send requests from `concurrency` loops, return actual duration."""
+    weights = [scenario.weight for scenario in scenarios]
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        started_at = time.monotonic()
+        deadline = started_at + duration
+
+        async def loop(index: int):
+            rng = random.Random(seed + index)
+            while time.monotonic() < deadline:
+                (scenario,) = rng.choices(scenarios, weights)
+                request_started_at = time.perf_counter()
+                try:
+                    response = await scenario.send(client, rng)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                scenario.latencies.append(
+                    time.perf_counter() - request_started_at
+                )
+                scenario.errors += failed
+
+        await asyncio.gather(*(loop(index) for index in range(concurrency)))
+        return time.monotonic() - started_at
+
+
+def save_report(report: dict, directory: Path, started_at: datetime) -> Path:
+    """Write report as JSON named after run start, return its path."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{started_at:%Y%m%dT%H%M%S}.json"
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def compare(report: dict, baseline: dict):
+    print(f"Compared to {baseline['started_at']}:")
+    for name, current in report["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        changes = []
+        for key in ("rps", *(f"p{percent}_ms" for percent in PERCENTILES)):
+            if previous[key]:
+                change = (current[key] - previous[key]) / previous[key] * 100
+                changes.append(f"{key} {change:+.1f}%")
+        print(f"  {name:<14} {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--addresses", type=int, default=1000)
+    parser.add_argument(
+        "--records-share",
+        type=float,
+        default=0.5,
+        help="Share of /records_info among requests",
+    )
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--fake-latency", type=float, default=0.05)
+    parser.add_argument("--fake-jitter", type=float, default=0.02)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    fake_args = [
+        "-m",
+        "benchmarks.fake_trongrid",
+        f"--port={args.fake_port}",
+        f"--latency={args.fake_latency}",
+        f"--jitter={args.fake_jitter}",
+        f"--error-rate={args.fake_error_rate}",
+        f"--seed={args.seed}",
+    ]
+    app_args = [
+        "-m",
+        "uvicorn",
+        "app:fastapi_app",
+        f"--port={args.app_port}",
+        "--loop=uvloop",
+        "--http=httptools",
+        "--log-level=warning",
+        "--no-access-log",
+    ]
+    app_env = {"TRON_API_URLS": json.dumps([fake_url])}
+    addresses = make_addresses(args.addresses, args.seed)
+
+    def make_scenarios() -> list[Scenario]:
+        return [
+            AccountInfoScenario(1 - args.records_share, addresses),
+            RecordsInfoScenario(args.records_share, max_page=50),
+        ]
+
+    started_at = datetime.now(UTC)
+    with run_server(fake_args), run_server(app_args, app_env):
+        asyncio.run(wait_until_ready(f"{fake_url}/wallet/getaccount"))
+        asyncio.run(wait_until_ready(f"{app_url}/api/tron/account_info"))
+        if args.warmup > 0:
+            asyncio.run(
+                drive(
+                    app_url,
+                    make_scenarios(),
+                    args.concurrency,
+                    args.warmup,
+                    args.seed,
+                )
+            )
+        scenarios = make_scenarios()
+        duration = asyncio.run(
+            drive(
+                app_url, scenarios, args.concurrency, args.duration, args.seed
+            )
+        )
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "config": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+        },
+        "duration": round(duration, 2),
+        "scenarios": {
+            **{
+                scenario.name: scenario.report(duration)
+                for scenario in scenarios
+            },
+            "total": summarize(
+                [
+                    latency
+                    for scenario in scenarios
+                    for latency in scenario.latencies
+                ],
+                sum(scenario.errors for scenario in scenarios),
+                duration,
+            ),
+        },
+    }
+
+    path = save_report(report, args.output, started_at)
+    for name, result in report["scenarios"].items():
+        print(f"{name:<14} {json.dumps(result)}")
+    print(f"Saved to {path}")
+    if args.baseline is not None:
+        compare(report, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
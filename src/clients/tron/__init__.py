@@ -1,3 +1,12 @@
+from .cache import AccountInfoCache
 from .client import TronClient
-from .dependency import get_tron_client
-from .exceptions import TronClientException
+from .dependency import (
+    get_account_info_cache,
+    get_endpoint_pool,
+    get_rate_limiter,
+    get_tron_client,
+    get_tron_retries,
+)
+from .exceptions import RateLimitExceeded, TronClientException
+from .limiter import Priority, RateLimiter
+from .pool import EndpointPool
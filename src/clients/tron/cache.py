@@ -0,0 +1,269 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from redis.asyncio.client import Redis
+
+from common.metrics import CACHE_REQUESTS, STAGE_DURATION
+
+from .schemas import AccountInfoCacheStats, AccountInfoModel
+
+Fetcher = Callable[[str], Awaitable[AccountInfoModel]]
+
+# Seconds versions of deleted addresses are kept, has to exceed the
+# longest fetch so its result isn't stored after a delete
+VERSION_TTL = 600
+
+# Stores info unless address was deleted since its version was read
+# KEYS: info, version
+# ARGV: read version, payload, expires at milliseconds
+SET_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'PXAT', ARGV[3])
+return 1
+"""
+
+# Drops info of addresses and bumps their versions
+# KEYS: info and version of every address
+# ARGV: version milliseconds to live
+DELETE_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    redis.call('DEL', KEYS[i])
+    redis.call('INCR', KEYS[i + 1])
+    redis.call('PEXPIRE', KEYS[i + 1], ARGV[1])
+end
+"""
+
+
+class AccountInfoCache:
+    """Read-through account info cache.
+
+    Two tiers: in-process LRU in front of Redis shared by all workers.
+    Concurrent lookups of one address within a process are coalesced
+    into a single upstream fetch.
+
+    Can be fed to `InvalidationTracker`, then changes of Redis tier made
+    by other workers drop entries from memory tier of this one. Memory
+    tier is bypassed while the tracker is disconnected.
+
+    Every `delete` bumps versions of addresses. Info is stored only if
+    the version read before fetching it is still current, so fetches
+    racing a delete don't bring stale info back. Likewise memory tier
+    isn't filled with info of an address invalidated while it was
+    being loaded.
+    """
+
+    KEY_PREFIX = "tron_account_info:"
+    # Not under KEY_PREFIX, so version bumps aren't tracked
+    VERSION_KEY_PREFIX = "tron_account_info_version:"
+
+    def __init__(self, redis: Redis, ttl: float, max_local_size: int):
+        self._redis = redis
+        self._ttl = ttl
+        self._max_local_size = max_local_size
+        # address -> (expires at, info), least recently used first
+        self._local: OrderedDict[str, tuple[float, AccountInfoModel]] = (
+            OrderedDict()
+        )
+        self._local_enabled = True
+        self._inflight: dict[str, asyncio.Future[AccountInfoModel]] = {}
+        # Addresses dropped while being loaded
+        self._invalidated: set[str] = set()
+        self.stats = AccountInfoCacheStats()
+        self._set = redis.register_script(SET_SCRIPT)
+        self._delete = redis.register_script(DELETE_SCRIPT)
+
+    @property
+    def prefixes(self) -> list[str]:
+        return [self.KEY_PREFIX]
+
+    def _get_cache_key(self, address: str) -> str:
+        return f"{self.KEY_PREFIX}{address}"
+
+    def _get_version_key(self, address: str) -> str:
+        return f"{self.VERSION_KEY_PREFIX}{address}"
+
+    def _get_local(self, address: str) -> AccountInfoModel | None:
+        if not self._local_enabled:
+            return None
+        entry = self._local.get(address)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if expires_at <= time.time():
+            del self._local[address]
+            return None
+        self._local.move_to_end(address)
+        return info
+
+    def _set_local(
+        self, address: str, info: AccountInfoModel, expires_at: float
+    ):
+        if not self._local_enabled:
+            return
+        self._local[address] = (expires_at, info)
+        self._local.move_to_end(address)
+        while len(self._local) > self._max_local_size:
+            self._local.popitem(last=False)
+
+    async def _get_remote(
+        self, address: str
+    ) -> tuple[tuple[float, AccountInfoModel] | None, int]:
+        """Cached entry of address if any, and its version."""
+        with STAGE_DURATION.time("redis"):
+            raw, version = await self._redis.mget(
+                self._get_cache_key(address), self._get_version_key(address)
+            )
+        version = int(version or 0)
+        if raw is None:
+            return None, version
+        payload = json.loads(raw)
+        info = AccountInfoModel.model_validate(payload["data"])
+        return (payload["expires_at"], info), version
+
+    async def _set_remote(
+        self,
+        address: str,
+        info: AccountInfoModel,
+        expires_at: float,
+        version: int,
+    ) -> bool:
+        payload = {"expires_at": expires_at, "data": info.model_dump()}
+        with STAGE_DURATION.time("redis"):
+            stored = await self._set(
+                keys=[
+                    self._get_cache_key(address),
+                    self._get_version_key(address),
+                ],
+                args=[
+                    version,
+                    json.dumps(payload, separators=(",", ":")),
+                    int(expires_at * 1000),
+                ],
+            )
+        return bool(stored)
+
+    async def _load(self, address: str, fetch: Fetcher) -> AccountInfoModel:
+        self._invalidated.discard(address)
+        try:
+            return await self._load_uninvalidated(address, fetch)
+        finally:
+            self._invalidated.discard(address)
+
+    async def _load_uninvalidated(
+        self, address: str, fetch: Fetcher
+    ) -> AccountInfoModel:
+        remote, version = await self._get_remote(address)
+        if remote is not None:
+            self.stats.redis_hits += 1
+            CACHE_REQUESTS.inc("account_info", "redis_hit")
+            expires_at, info = remote
+            # Info read before a delete landed would be served stale
+            if address not in self._invalidated:
+                self._set_local(address, info, expires_at)
+            return info
+
+        self.stats.misses += 1
+        CACHE_REQUESTS.inc("account_info", "miss")
+        expires_at = time.time() + self._ttl
+        info = await fetch(address)
+        if (
+            await self._set_remote(address, info, expires_at, version)
+            and address not in self._invalidated
+        ):
+            self._set_local(address, info, expires_at)
+        return info
+
+    async def get_or_fetch(
+        self, address: str, fetch: Fetcher
+    ) -> AccountInfoModel:
+        info = self._get_local(address)
+        if info is not None:
+            self.stats.hits += 1
+            CACHE_REQUESTS.inc("account_info", "hit")
+            return info
+
+        inflight = self._inflight.get(address)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(address, fetch))
+            self._inflight[address] = inflight
+            inflight.add_done_callback(
+                lambda _: self._inflight.pop(address, None)
+            )
+        else:
+            self.stats.coalesced += 1
+            CACHE_REQUESTS.inc("account_info", "coalesced")
+        # Shield shared fetch from cancellation of a single waiter
+        return await asyncio.shield(inflight)
+
+    async def versions(self, addresses: list[str]) -> dict[str, int]:
+        """Versions of addresses, read them before fetching info to `set`."""
+        if not addresses:
+            return {}
+        versions = await self._redis.mget(
+            *map(self._get_version_key, addresses)
+        )
+        return {
+            address: int(version or 0)
+            for address, version in zip(addresses, versions)
+        }
+
+    async def set(
+        self,
+        address: str,
+        info: AccountInfoModel,
+        version: int,
+        ttl: float | None = None,
+    ):
+        """Put fresh info, e.g. fetched in background, for `ttl` seconds.
+
+        Skipped if address was deleted since `version` was read.
+        """
+        expires_at = time.time() + (self._ttl if ttl is None else ttl)
+        if await self._set_remote(address, info, expires_at, version):
+            self._set_local(address, info, expires_at)
+
+    async def delete(self, addresses: list[str]):
+        """Drop info of addresses, e.g. changed by new transactions."""
+        if not addresses:
+            return
+        for address in addresses:
+            self._drop_local(address)
+        keys = []
+        for address in addresses:
+            keys += [
+                self._get_cache_key(address),
+                self._get_version_key(address),
+            ]
+        await self._delete(keys=keys, args=[VERSION_TTL * 1000])
+
+    def invalidate(self, keys: list[str] | None):
+        """Drop memory tier entries of changed Redis keys, all if None."""
+        if keys is None:
+            self._drop_all_local()
+            return
+        for key in keys:
+            if key.startswith(self.KEY_PREFIX):
+                self._drop_local(key.removeprefix(self.KEY_PREFIX))
+
+    def enable(self):
+        self._drop_all_local()
+        self._local_enabled = True
+
+    def disable(self):
+        # Invalidations are lost while disconnected
+        self._local_enabled = False
+        self._drop_all_local()
+
+    def _drop_local(self, address: str):
+        self._local.pop(address, None)
+        if address in self._inflight:
+            self._invalidated.add(address)
+
+    def _drop_all_local(self):
+        self._local.clear()
+        self._invalidated.update(self._inflight)
@@ -1,11 +1,22 @@
 import asyncio
-from typing import Any
+import time
+from typing import Any, AsyncIterator, Iterable
 
 import httpx
-from base58 import b58decode_check
 
-from .exceptions import TronClientException
-from .schemas import AccountInfoModel, AccountModel, AccountResourcesModel
+from common.metrics import UPSTREAM_REQUEST_DURATION
+from common.tron_address import is_valid_address
+
+from .cache import AccountInfoCache
+from .exceptions import RateLimitExceeded, TronClientException
+from .limiter import Priority, RateLimiter
+from .pool import Endpoint, EndpointPool
+from .schemas import (
+    AccountInfoModel,
+    AccountModel,
+    AccountResourcesModel,
+    BlockModel,
+)
 
 
 class TronClient:
@@ -15,15 +26,120 @@ class TronClient:
         self,
         client: httpx.AsyncClient,
         base_url: str = "https://api.shasta.trongrid.io",
+        cache: AccountInfoCache | None = None,
+        pool: EndpointPool | None = None,
+        limiter: RateLimiter | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+        retries: int = 0,
     ) -> None:
         self._client = client
-        self._base_url = base_url
+        # Pool is shared by clients of a worker to keep endpoints health
+        self._pool = pool or EndpointPool([base_url])
+        self._cache = cache
+        self._limiter = limiter
+        # Priority of calls in the upstream budget, see RateLimiter
+        self._priority = priority
+        # Extra rounds over endpoints once all of them failed, every
+        # attempt takes upstream budget
+        self._retries = retries
+
+    async def _post_to(
+        self, endpoint: Endpoint, path: str, payload: dict[str, Any]
+    ) -> httpx.Response:
+        started_at = time.monotonic()
+        status = "error"
+        try:
+            # Wallet APIs are read-only, so safe to retry
+            response = await self._client.post(
+                f"{endpoint.url}{path}",
+                json=payload,
+                extensions={"idempotent": True},
+            )
+            status = str(response.status_code)
+            # Node is overloaded or broken, other node may serve it
+            if response.status_code == 429 or response.status_code >= 500:
+                if response.status_code == 429 and self._limiter is not None:
+                    # Budget is higher than upstream allows, all workers
+                    # wait for refill instead of piling more requests
+                    await self._limiter.drain(endpoint.url)
+                response.raise_for_status()
+        except httpx.HTTPError:
+            self._pool.record_failure(endpoint)
+            raise
+        finally:
+            latency = time.monotonic() - started_at
+            UPSTREAM_REQUEST_DURATION.observe(
+                latency, endpoint.url, path, status
+            )
+        self._pool.record_success(endpoint, latency)
+        return response
+
+    async def _post_hedged(
+        self, endpoint: Endpoint, path: str, payload: dict[str, Any]
+    ) -> httpx.Response:
+        """Post to endpoint, duplicate to another one if it's slow.
+
+        Waiting for upstream budget doesn't count as slowness, the hedge
+        delay starts once the budget is granted. Hedges are sent only
+        if budget is available right away.
+        """
+        if self._limiter is not None:
+            await self._limiter.acquire(endpoint.url, self._priority)
+        delay = self._pool.hedge_delay()
+        first = asyncio.create_task(self._post_to(endpoint, path, payload))
+        if delay is None:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                hedge_endpoint = self._pool.choose(exclude={endpoint})
+                if self._limiter is None or await self._limiter.try_acquire(
+                    hedge_endpoint.url, self._priority
+                ):
+                    pending.add(
+                        asyncio.create_task(
+                            self._post_to(hedge_endpoint, path, payload)
+                        )
+                    )
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post(
+        self, path: str, payload: dict[str, Any]
+    ) -> httpx.Response:
+        """Post to the best endpoint, failing over to the others."""
+        tried = set()
+        retries = self._retries
+        while True:
+            endpoint = self._pool.choose(exclude=tried)
+            tried.add(endpoint)
+            try:
+                return await self._post_hedged(endpoint, path, payload)
+            except httpx.HTTPError:
+                if len(tried) == len(self._pool.endpoints):
+                    if not retries:
+                        raise
+                    retries -= 1
+                    tried = set()
 
     async def get_account(self, address: str) -> AccountModel:
         """Get account info (including TRX)."""
-        response = await self._client.post(
-            f"{self._base_url}/wallet/getaccount",
-            json={"address": address, "visible": True},
+        response = await self._post(
+            "/wallet/getaccount",
+            {"address": address, "visible": True},
         )
         response.raise_for_status()
         return AccountModel.model_validate(response.json())
@@ -32,40 +148,41 @@ class TronClient:
         self, address: str
     ) -> AccountResourcesModel:
         """Get bandwith and energy info."""
-        url = f"{self._base_url}/wallet/getaccountresource"
         payload = {"address": address, "visible": True}
-        response = await self._client.post(url, json=payload)
+        response = await self._post("/wallet/getaccountresource", payload)
         response.raise_for_status()
         return AccountResourcesModel.model_validate(response.json())
 
-    def validate_address(self, address: str) -> bool:
-        """Check TRON address is valid."""
-        if not isinstance(address, str):
-            return False
-
-        # Базовые проверки
-        if len(address) != 34:
-            return False
-
-        if not address.startswith("T"):
-            return False
+    async def get_now_block(self) -> BlockModel:
+        """Get the latest block with its transactions."""
+        response = await self._post("/wallet/getnowblock", {"visible": True})
+        response.raise_for_status()
+        return BlockModel.model_validate(response.json())
 
-        # Проверка символов (Base58)
-        try:
-            decoded = b58decode_check(address)
-            # Декодированный адрес (без checksum) должен быть 21 байт (1 байт версии + 20 байт публичного ключа)
-            if len(decoded) != 21:
-                return False
+    async def get_block_by_num(self, number: int) -> BlockModel:
+        """Get block by height, empty one if it doesn't exist yet."""
+        response = await self._post(
+            "/wallet/getblockbynum", {"num": number, "visible": True}
+        )
+        response.raise_for_status()
+        return BlockModel.model_validate(response.json())
 
-        except (ValueError, TypeError) as e:
-            return False
-        return True
+    def validate_address(self, address: str) -> bool:
+        """Check TRON address is valid."""
+        return is_valid_address(address)
 
     async def get_account_info(self, address: str) -> AccountInfoModel:
         """Get bandwidth, energy and TRX balance by address."""
         if not self.validate_address(address):
             raise TronClientException(400, "Invalid TRON address")
 
+        if self._cache is None:
+            return await self._fetch_account_info(address)
+        return await self._cache.get_or_fetch(
+            address, self._fetch_account_info
+        )
+
+    async def _fetch_account_info(self, address: str) -> AccountInfoModel:
         try:
             account, resources = await asyncio.gather(
                 self.get_account(address), self.get_account_resources(address)
@@ -84,7 +201,40 @@ class TronClient:
             raise TronClientException(
                 e.response.status_code, f"HTTP error: {e.response.text}"
             )
+        except RateLimitExceeded as e:
+            raise TronClientException(503, str(e))
         except Exception as e:
             raise TronClientException(
                 400, f"Error fetching account info: {str(e)}"
             )
+
+    async def iter_accounts_info(
+        self, addresses: Iterable[str], concurrency: int
+    ) -> AsyncIterator[tuple[str, AccountInfoModel | TronClientException]]:
+        """Fetch info for many addresses, yielding results as they complete.
+
+        At most `concurrency` addresses are fetched at once, every address
+        costs two upstream calls. Duplicated addresses are fetched once.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(
+            address: str,
+        ) -> tuple[str, AccountInfoModel | TronClientException]:
+            async with semaphore:
+                try:
+                    return address, await self.get_account_info(address)
+                except TronClientException as e:
+                    return address, e
+
+        tasks = [
+            asyncio.create_task(fetch(address))
+            for address in dict.fromkeys(addresses)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Consumer may stop early (e.g. client disconnected)
+            for task in tasks:
+                task.cancel()
@@ -6,10 +6,40 @@ from fastapi import Depends
 
 from common.httpx import get_httpx_clint
 
+from .cache import AccountInfoCache
 from .client import TronClient
+from .limiter import RateLimiter
+from .pool import EndpointPool
+
+
+# Overriden in fastapi lifespan when caching is enabled
+def get_account_info_cache() -> AccountInfoCache | None:
+    return None
+
+
+# Overriden in fastapi lifespan with pool of configured endpoints
+def get_endpoint_pool() -> EndpointPool | None:
+    return None
+
+
+# Overriden in fastapi lifespan when rate limiting is enabled
+def get_rate_limiter() -> RateLimiter | None:
+    return None
+
+
+# Overriden in fastapi lifespan, calls are retried here instead of the
+# transport when rate limiting is enabled
+def get_tron_retries() -> int:
+    return 0
 
 
 def get_tron_client(
     httpx_client: Annotated[httpx.AsyncClient, Depends(get_httpx_clint)],
+    cache: Annotated[AccountInfoCache | None, Depends(get_account_info_cache)],
+    pool: Annotated[EndpointPool | None, Depends(get_endpoint_pool)],
+    limiter: Annotated[RateLimiter | None, Depends(get_rate_limiter)],
+    retries: Annotated[int, Depends(get_tron_retries)],
 ):
-    yield TronClient(httpx_client)
+    yield TronClient(
+        httpx_client, cache=cache, pool=pool, limiter=limiter, retries=retries
+    )
@@ -2,3 +2,7 @@ class TronClientException(Exception):
     def __init__(self, status_code: int, detail: str):
         self.status_code = status_code
         self.detail = detail
+
+
+class RateLimitExceeded(Exception):
+    """No upstream budget became available in time."""
@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from enum import IntEnum
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from common.metrics import RATE_LIMITED, STAGE_DURATION
+
+from .exceptions import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Max seconds between polls of an empty bucket
+MAX_POLL_INTERVAL = 0.25
+
+# Refills token bucket by elapsed time and takes up to requested tokens,
+# leaving `reserved` ones for higher priority calls. Time comes from
+# Redis, so clocks of workers don't matter.
+# KEYS: bucket
+# ARGV: rate per second, burst, requested tokens, reserved tokens
+# Returns: granted tokens, seconds until a token is available
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local available = math.floor(tokens - tonumber(ARGV[4]))
+local granted = 0
+local wait = 0
+if available >= 1 then
+    granted = math.min(tonumber(ARGV[3]), available)
+    tokens = tokens - granted
+else
+    wait = (1 - (tokens - tonumber(ARGV[4]))) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {granted, tostring(wait)}
+"""
+
+# Empties token bucket, e.g. after upstream answered 429
+# KEYS: bucket
+# ARGV: rate per second, burst
+DRAIN_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+redis.call('HSET', KEYS[1], 'tokens', 0, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(ARGV[2] / ARGV[1]) + 1)
+"""
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class _Bucket:
+    def __init__(self, key: str, rate: float, burst: float):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        # Tokens taken from Redis in advance and when they go stale
+        self.tokens = 0
+        self.tokens_expire_at = 0.0
+        # (priority, arrival, future), served in this order
+        self.waiters: list[tuple[Priority, int, asyncio.Future]] = []
+        self.refiller: asyncio.Task | None = None
+
+
+class RateLimiter:
+    """Upstream calls budget per endpoint, shared by all workers.
+
+    Every endpoint has a token bucket in Redis refilled at its rate. Calls
+    wait in a worker-local queue ordered by priority and arrival, and
+    fail with RateLimitExceeded when no token comes within max wait of
+    their priority. Background calls can't take the `reserved_share` of
+    burst, so interactive ones always find budget first.
+
+    Up to `local_batch` tokens are taken from Redis at once and spent
+    from worker memory, they go stale after the time they took to refill.
+    When Redis is unavailable calls aren't limited.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        rate: float,
+        endpoint_rates: dict[str, float] | None = None,
+        burst_seconds: float = 1.0,
+        reserved_share: float = 0.2,
+        local_batch: int = 1,
+        max_wait: dict[Priority, float] | None = None,
+    ):
+        self._redis = redis
+        self._rate = rate
+        self._endpoint_rates = {
+            url.rstrip("/"): rate
+            for url, rate in (endpoint_rates or {}).items()
+        }
+        self._burst_seconds = burst_seconds
+        self._reserved_share = reserved_share
+        self._local_batch = local_batch
+        self._max_wait = max_wait or {
+            Priority.INTERACTIVE: 2.0,
+            Priority.BACKGROUND: 30.0,
+        }
+        self._buckets: dict[str, _Bucket | None] = {}
+        self._arrivals = itertools.count()
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._drain = redis.register_script(DRAIN_SCRIPT)
+
+    def _get_bucket_key(self, url: str) -> str:
+        return f"tron_rate_limit:{url}"
+
+    def _get_bucket(self, url: str) -> _Bucket | None:
+        if url not in self._buckets:
+            rate = self._endpoint_rates.get(url, self._rate)
+            self._buckets[url] = (
+                _Bucket(
+                    self._get_bucket_key(url),
+                    rate,
+                    # At least one token fits, otherwise none is granted
+                    max(1.0, rate * self._burst_seconds),
+                )
+                if rate > 0
+                else None
+            )
+        return self._buckets[url]
+
+    async def acquire(
+        self, url: str, priority: Priority = Priority.INTERACTIVE
+    ):
+        """Wait for a token of endpoint at `url`.
+
+        Raises RateLimitExceeded after max wait of `priority`.
+        """
+        bucket = self._get_bucket(url)
+        if bucket is None:
+            return
+        if not bucket.waiters and self._take_local(bucket):
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            bucket.waiters, (priority, next(self._arrivals), future)
+        )
+        if bucket.refiller is None or bucket.refiller.done():
+            bucket.refiller = asyncio.create_task(self._refill(bucket))
+        try:
+            with STAGE_DURATION.time("rate_limit"):
+                await asyncio.wait_for(future, self._max_wait[priority])
+        except TimeoutError:
+            RATE_LIMITED.inc(url, priority.name.lower())
+            raise RateLimitExceeded(
+                f"No upstream budget for {url} within "
+                f"{self._max_wait[priority]}s"
+            )
+
+    async def try_acquire(
+        self, url: str, priority: Priority = Priority.INTERACTIVE
+    ) -> bool:
+        """Take a token of endpoint at `url` if one is available now.
+
+        Doesn't queue, so calls waiting for budget are never overtaken.
+        """
+        bucket = self._get_bucket(url)
+        if bucket is None:
+            return True
+        if bucket.waiters:
+            return False
+        if self._take_local(bucket):
+            return True
+        try:
+            granted, _ = await self._acquire(
+                keys=[bucket.key],
+                args=[
+                    bucket.rate,
+                    bucket.burst,
+                    1,
+                    self._get_reserved(bucket, priority),
+                ],
+            )
+        except RedisError:
+            logger.exception("Rate limiter is unavailable, not limiting")
+            return True
+        if not granted:
+            RATE_LIMITED.inc(url, priority.name.lower())
+        return bool(granted)
+
+    async def drain(self, url: str):
+        """Take all tokens of endpoint, so every worker waits for refill."""
+        bucket = self._get_bucket(url)
+        if bucket is None:
+            return
+        bucket.tokens = 0
+        try:
+            await self._drain(
+                keys=[bucket.key], args=[bucket.rate, bucket.burst]
+            )
+        except RedisError:
+            logger.exception(f"Failed to drain rate limit of {url}")
+
+    def _take_local(self, bucket: _Bucket) -> bool:
+        if bucket.tokens > 0 and time.monotonic() < bucket.tokens_expire_at:
+            bucket.tokens -= 1
+            return True
+        bucket.tokens = 0
+        return False
+
+    def _get_reserved(self, bucket: _Bucket, priority: Priority) -> int:
+        if priority > Priority.INTERACTIVE:
+            return math.floor(bucket.burst * self._reserved_share)
+        return 0
+
+    def _serve_local(self, bucket: _Bucket):
+        """Hand local tokens to waiters, dropping timed out ones."""
+        while bucket.waiters:
+            future = bucket.waiters[0][2]
+            if not future.done():
+                if not self._take_local(bucket):
+                    return
+                future.set_result(None)
+            heapq.heappop(bucket.waiters)
+
+    async def _refill(self, bucket: _Bucket):
+        while True:
+            self._serve_local(bucket)
+            if not bucket.waiters:
+                return
+            priority = bucket.waiters[0][0]
+            waiting = sum(not future.done() for *_, future in bucket.waiters)
+            reserved = self._get_reserved(bucket, priority)
+            try:
+                granted, wait = await self._acquire(
+                    keys=[bucket.key],
+                    args=[
+                        bucket.rate,
+                        bucket.burst,
+                        max(waiting, self._local_batch),
+                        reserved,
+                    ],
+                )
+            except RedisError:
+                logger.exception("Rate limiter is unavailable, not limiting")
+                for *_, future in bucket.waiters:
+                    if not future.done():
+                        future.set_result(None)
+                bucket.waiters.clear()
+                return
+            if granted:
+                bucket.tokens = granted
+                bucket.tokens_expire_at = (
+                    time.monotonic() + granted / bucket.rate
+                )
+            else:
+                await asyncio.sleep(min(float(wait), MAX_POLL_INTERVAL))
@@ -0,0 +1,103 @@
+import time
+from collections import deque
+
+# Weight of the newest sample in moving averages
+EWMA_ALPHA = 0.2
+# Seconds added to latency of an always failing endpoint when choosing
+ERROR_RATE_PENALTY = 1.0
+# Latency samples used to compute hedging delay
+LATENCY_WINDOW = 200
+MIN_SAMPLES_TO_HEDGE = 20
+
+
+class Endpoint:
+    """TronGrid/full node endpoint with its health statistics."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.latency_ewma: float | None = None
+        self.error_rate_ewma: float = 0.0
+        self.consecutive_failures: int = 0
+        # Circuit is open (endpoint is skipped) until this time
+        self.open_until: float = 0.0
+
+    @property
+    def score(self) -> float:
+        """Lower is better, unmeasured endpoints are tried first."""
+        latency = self.latency_ewma or 0.0
+        return latency + ERROR_RATE_PENALTY * self.error_rate_ewma
+
+    def is_open(self, now: float) -> bool:
+        return self.open_until > now
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r})"
+
+
+class EndpointPool:
+    """Routes requests to the healthiest of several endpoints.
+
+    Tracks latency and error rate EWMA per endpoint. After
+    `failure_threshold` consecutive failures an endpoint is skipped for
+    `cooldown` seconds, then gets a trial request again.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        hedge: bool = False,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        min_hedge_delay: float = 0.05,
+    ):
+        if not urls:
+            raise ValueError("Pool needs at least one endpoint")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._hedge = hedge
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._min_hedge_delay = min_hedge_delay
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def choose(self, exclude: set[Endpoint] = frozenset()) -> Endpoint | None:
+        """Best endpoint not in `exclude`.
+
+        When all circuits are open the one closing soonest is returned,
+        so requests still go somewhere.
+        """
+        candidates = [e for e in self.endpoints if e not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        closed = [e for e in candidates if not e.is_open(now)]
+        if not closed:
+            return min(candidates, key=lambda e: e.open_until)
+        return min(closed, key=lambda e: e.score)
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before a hedged request, None to not hedge."""
+        if not self._hedge or len(self.endpoints) < 2:
+            return None
+        if len(self._latencies) < MIN_SAMPLES_TO_HEDGE:
+            return None
+        latencies = sorted(self._latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        return max(p95, self._min_hedge_delay)
+
+    def record_success(self, endpoint: Endpoint, latency: float):
+        self._latencies.append(latency)
+        if endpoint.latency_ewma is None:
+            endpoint.latency_ewma = latency
+        else:
+            endpoint.latency_ewma += EWMA_ALPHA * (
+                latency - endpoint.latency_ewma
+            )
+        endpoint.error_rate_ewma *= 1 - EWMA_ALPHA
+        endpoint.consecutive_failures = 0
+        endpoint.open_until = 0.0
+
+    def record_failure(self, endpoint: Endpoint):
+        endpoint.error_rate_ewma += EWMA_ALPHA * (1 - endpoint.error_rate_ewma)
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self._failure_threshold:
+            endpoint.open_until = time.monotonic() + self._cooldown
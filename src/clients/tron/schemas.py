@@ -23,3 +23,63 @@ class AccountInfoModel(BaseModel):
     energy_used: int | None = Field(description="Used energy")
     energy_limit: int | None = Field(description="Total energy limit")
     trx_balance: float = Field(description="TRX balance in TRX")
+
+
+class AccountInfoCacheStats(BaseModel):
+    hits: int = Field(default=0, description="Served from worker memory")
+    redis_hits: int = Field(default=0, description="Served from Redis")
+    misses: int = Field(default=0, description="Fetched from TronGrid")
+    coalesced: int = Field(
+        default=0, description="Joined an in-flight fetch of same address"
+    )
+
+
+class ContractModel(BaseModel):
+    type: str = Field(default="", description="Contract type")
+    parameter: dict = Field(
+        default_factory=dict, description="Type URL and value of contract"
+    )
+
+
+class TransactionRawModel(BaseModel):
+    contract: list[ContractModel] = Field(default_factory=list)
+
+
+class TransactionModel(BaseModel):
+    txID: str = Field(default="", description="Transaction hash")
+    raw_data: TransactionRawModel = Field(default_factory=TransactionRawModel)
+
+
+class BlockHeaderRawModel(BaseModel):
+    number: int = Field(default=0, description="Block height")
+    timestamp: int = Field(default=0, description="Milliseconds since epoch")
+
+
+class BlockHeaderModel(BaseModel):
+    raw_data: BlockHeaderRawModel = Field(default_factory=BlockHeaderRawModel)
+
+
+class BlockModel(BaseModel):
+    blockID: str = Field(default="", description="Block hash")
+    block_header: BlockHeaderModel = Field(default_factory=BlockHeaderModel)
+    transactions: list[TransactionModel] = Field(default_factory=list)
+
+    @property
+    def number(self) -> int:
+        return self.block_header.raw_data.number
+
+    def touched_addresses(self) -> set[str]:
+        """Addresses in contracts of block transactions.
+
+        Covers owners, receivers and called contracts, which is whose
+        balance or resources could change. Needs addresses in base58,
+        i.e. block requested with `visible`.
+        """
+        addresses = set()
+        for transaction in self.transactions:
+            for contract in transaction.raw_data.contract:
+                value = contract.parameter.get("value", {})
+                for name, address in value.items():
+                    if name.endswith("address") and isinstance(address, str):
+                        addresses.add(address)
+        return addresses
@@ -1,22 +1,133 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from settings.db import get_db_settings
+from settings.db import DBSettings, get_db_settings
 
-# Postgresql
-engine = create_async_engine(
-    get_db_settings().POSTGRES_URL,
-    echo=False,
-    future=True,
+# Seconds since the last replayed transaction, 0 when nothing is pending.
+# Received WAL says nothing while the receiver isn't streaming, then lag
+# grows with time since the last replay. Status is visible to roles with
+# pg_read_all_stats, others always get the time since the last replay
+REPLICATION_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN EXISTS ("
+    "SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'"
+    ") "
+    "AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) "
+    "END"
 )
+
+
+def create_engine(url: str, settings: DBSettings) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": (
+                settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+            ),
+        },
+    )
+
+
+# Postgresql
+engine = create_engine(get_db_settings().POSTGRES_URL, get_db_settings())
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engine = None
+replica_session_maker = None
+if get_db_settings().POSTGRES_REPLICA_URL:
+    replica_engine = create_engine(
+        get_db_settings().POSTGRES_REPLICA_URL, get_db_settings()
+    )
+    replica_session_maker = async_sessionmaker(
+        replica_engine, expire_on_commit=False
+    )
+
+
+class ReplicaLag:
+    """Last measured replication lag of the replica in this worker."""
+
+    def __init__(self, max_lag: float):
+        self.max_lag = max_lag
+        # None until measured or when the replica is unreachable
+        self.seconds: float | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.seconds is not None and self.seconds <= self.max_lag
+
+
+replica_lag = ReplicaLag(get_db_settings().DB_REPLICA_MAX_LAG)
+
+
+async def measure_replica_lag() -> float | None:
+    if replica_engine is None:
+        return None
+    async with replica_engine.connect() as connection:
+        lag = await connection.scalar(REPLICATION_LAG_SQL)
+    return float(lag) if lag is not None else None
+
+
+def get_pool_connections() -> list[tuple[tuple[str, str], int]]:
+    """Checked out and idle connections of engine pools."""
+    engines = {"db": engine, "db_replica": replica_engine}
+    return [
+        sample
+        for name, pool_engine in engines.items()
+        if pool_engine is not None
+        for sample in [
+            ((name, "in_use"), pool_engine.pool.checkedout()),
+            ((name, "idle"), pool_engine.pool.checkedin()),
+        ]
+    ]
+
+
+def get_read_session_maker() -> async_sessionmaker:
+    """Replica while its lag is acceptable, primary otherwise."""
+    if replica_session_maker is not None and replica_lag.healthy:
+        return replica_session_maker
+    return async_session_maker
+
+
+class LazySession:
+    """Stands in for AsyncSession, creating it on first use.
+
+    Requests answered from cache never build a session or touch the pool.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self._session_maker = session_maker
+        self._session: AsyncSession | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._session_maker()
+        return getattr(self._session, name)
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.aclose()
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
@@ -1,6 +1,154 @@
+import asyncio
+import random
+import time
+
 import httpx
+from pydantic import BaseModel, Field
+
+from settings.httpx import HttpxSettings
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+# First httpcore trace events after a connection was taken from the pool
+CONNECTION_ACQUIRED_EVENTS = frozenset(
+    [
+        "connection.connect_tcp.started",
+        "http11.send_request_headers.started",
+        "http2.send_request_headers.started",
+    ]
+)
+
+
+class HttpxPoolStats(BaseModel):
+    requests: int = Field(default=0, description="Sent requests")
+    retries: int = Field(default=0, description="Retried requests")
+    pool_wait_seconds_total: float = Field(
+        default=0, description="Time spent waiting for a free connection"
+    )
+    pool_wait_seconds_max: float = Field(
+        default=0, description="Longest wait for a free connection"
+    )
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Retries idempotent requests with exponential backoff and jitter.
+
+    Requests are idempotent if their method is, or if they were sent
+    with `extensions={"idempotent": True}` (e.g. POST-based reads).
+    Also measures how long requests wait for a pooled connection.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncHTTPTransport,
+        retries: int,
+        backoff: float,
+    ):
+        self._transport = transport
+        self._retries = retries
+        self._backoff = backoff
+        self.stats = HttpxPoolStats()
+
+    def _is_idempotent(self, request: httpx.Request) -> bool:
+        return request.method in IDEMPOTENT_METHODS or bool(
+            request.extensions.get("idempotent")
+        )
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        started_at = time.monotonic()
+        acquired = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal acquired
+            if not acquired and event_name in CONNECTION_ACQUIRED_EVENTS:
+                acquired = True
+                wait = time.monotonic() - started_at
+                self.stats.pool_wait_seconds_total += wait
+                self.stats.pool_wait_seconds_max = max(
+                    self.stats.pool_wait_seconds_max, wait
+                )
+
+        request.extensions = {**request.extensions, "trace": trace}
+        self.stats.requests += 1
+        return await self._transport.handle_async_request(request)
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        retries = self._retries if self._is_idempotent(request) else 0
+        for attempt in range(retries + 1):
+            is_last = attempt == retries
+            try:
+                response = await self._send(request)
+            except httpx.TransportError:
+                if is_last:
+                    raise
+            else:
+                if is_last or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                await response.aclose()
+
+            self.stats.retries += 1
+            delay = self._backoff * 2**attempt
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def get_pool_connections(self) -> list[tuple[tuple[str, str], int]]:
+        """In use and idle connections of the underlying httpcore pool.
+
+        Reads httpcore internals, reports nothing if they aren't there.
+        """
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return []
+        idle = sum(connection.is_idle() for connection in connections)
+        return [
+            (("httpx", "in_use"), len(connections) - idle),
+            (("httpx", "idle"), idle),
+        ]
+
+
+def create_httpx_transport(
+    settings: HttpxSettings, retries: int | None = None
+) -> RetryTransport:
+    """Pooled transport, `retries` override HTTPX_RETRIES."""
+    transport = httpx.AsyncHTTPTransport(
+        http2=settings.HTTPX_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.HTTPX_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTPX_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return RetryTransport(
+        transport,
+        retries=settings.HTTPX_RETRIES if retries is None else retries,
+        backoff=settings.HTTPX_RETRY_BACKOFF,
+    )
+
+
+def create_httpx_client(
+    transport: RetryTransport, settings: HttpxSettings
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            connect=settings.HTTPX_CONNECT_TIMEOUT,
+            read=settings.HTTPX_READ_TIMEOUT,
+            write=settings.HTTPX_WRITE_TIMEOUT,
+            pool=settings.HTTPX_POOL_TIMEOUT,
+        ),
+    )
 
 
 # Dependency for override
 def get_httpx_clint() -> httpx.AsyncClient:
     raise NotImplementedError()
+
+
+# Dependency for override
+def get_httpx_pool_stats() -> HttpxPoolStats:
+    raise NotImplementedError()
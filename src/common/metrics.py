@@ -0,0 +1,417 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from Redis round trips to slow upstream calls
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: Labels, values: Labels, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, description: str, labelnames: Labels = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+
+    def values(self) -> dict[Labels, Any]:
+        """Copy of current values by label values, JSON serializable."""
+        raise NotImplementedError()
+
+    @staticmethod
+    def merge(values: dict[Labels, Any], labels: Labels, value: Any):
+        """Add value of another worker to `values`."""
+        values[labels] = values.get(labels, 0) + value
+
+    def samples(
+        self, values: dict[Labels, Any] | None = None
+    ) -> Iterable[str]:
+        for labels, value in (
+            self.values() if values is None else values
+        ).items():
+            yield (
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+
+    def render(self, values: dict[Labels, Any] | None = None) -> str:
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.description}",
+                f"# TYPE {self.name} {self.type}",
+                *self.samples(values),
+            ]
+        )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Labels = ()):
+        super().__init__(name, description, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        return dict(self._values)
+
+
+class Gauge(Metric):
+    """Gauge read at scrape time from `collect` callbacks.
+
+    Callbacks return (label values, value) pairs, so live objects such
+    as connection pools are inspected only when metrics are requested.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Labels = ()):
+        super().__init__(name, description, labelnames)
+        self._callbacks: list[Callable[[], Iterable[tuple[Labels, float]]]] = (
+            []
+        )
+
+    def collect(self, callback: Callable[[], Iterable[tuple[Labels, float]]]):
+        self._callbacks.append(callback)
+
+    def clear(self):
+        self._callbacks.clear()
+
+    def values(self) -> dict[Labels, float]:
+        values = {}
+        for callback in self._callbacks:
+            for labels, value in callback():
+                self.merge(values, labels, value)
+        return values
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_started_at")
+
+    def __init__(self, histogram: "Histogram", labels: Labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(
+            time.perf_counter() - self._started_at, *self._labels
+        )
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self._buckets = buckets
+        # labels -> [count per bucket incl. +Inf, sum]
+        self._values: dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [
+                [0] * (len(self._buckets) + 1),
+                0.0,
+            ]
+        # Counts per bucket are made cumulative when rendering
+        entry[0][bisect_left(self._buckets, value)] += 1
+        entry[1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager observing duration of its block."""
+        return _Timer(self, labels)
+
+    def values(self) -> dict[Labels, list]:
+        return {
+            labels: [list(counts), total]
+            for labels, (counts, total) in self._values.items()
+        }
+
+    @staticmethod
+    def merge(values: dict[Labels, list], labels: Labels, value: list):
+        counts, total = value
+        entry = values.get(labels)
+        if entry is None:
+            values[labels] = [list(counts), total]
+            return
+        entry[0] = [mine + other for mine, other in zip(entry[0], counts)]
+        entry[1] += total
+
+    def samples(
+        self, values: dict[Labels, list] | None = None
+    ) -> Iterable[str]:
+        for labels, (counts, total) in (
+            self.values() if values is None else values
+        ).items():
+            cumulative = 0
+            for bound, count in zip((*self._buckets, float("inf")), counts):
+                cumulative += count
+                label_str = _format_labels(
+                    self.labelnames, labels, le=_format_value(bound)
+                )
+                yield f"{self.name}_bucket{label_str} {cumulative}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(total)}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request duration per route template.
+
+    Unmatched paths share one label to keep series count bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            )
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def gauge_names(self) -> set[str]:
+        return {
+            metric.name
+            for metric in self._metrics
+            if isinstance(metric, Gauge)
+        }
+
+    def dump(self, gauges: bool = True) -> dict[str, list]:
+        """Values of metrics as JSON, gauges of live objects if `gauges`."""
+        return {
+            metric.name: [
+                [list(labels), value]
+                for labels, value in metric.values().items()
+            ]
+            for metric in self._metrics
+            if gauges or not isinstance(metric, Gauge)
+        }
+
+    def render(self, dumps: Iterable[dict[str, list]] = ()) -> str:
+        """Metrics in Prometheus text exposition format.
+
+        Values of `dumps` taken from other workers are added to ours.
+        """
+        dumps = list(dumps)
+        rendered = []
+        for metric in self._metrics:
+            values = metric.values()
+            for dump in dumps:
+                for labels, value in dump.get(metric.name, ()):
+                    metric.merge(values, tuple(labels), value)
+            rendered.append(metric.render(values))
+        return "\n".join(rendered) + "\n"
+
+
+class SharedMetrics:
+    """Metrics of all workers sharing `directory`.
+
+    Registry is kept per worker process and a scrape reaches a random
+    worker, so each of them dumps its registry to `<pid>.json` every
+    `interval` seconds and renders its own values summed with dumps of
+    the others. Dumps of exited workers are kept, so counters don't go
+    backwards. Their gauges of live objects are dropped on shutdown, or
+    ignored once the dump is `STALE_INTERVALS` intervals old.
+    """
+
+    STALE_INTERVALS = 3
+
+    def __init__(self, registry: Registry, directory: str, interval: float):
+        self._registry = registry
+        self._directory = Path(directory)
+        self._path = self._directory / f"{os.getpid()}.json"
+        self._interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write the final dump without gauges of closed objects."""
+        self._stopping.set()
+        await self._task
+        self._write(gauges=False)
+
+    def render(self) -> str:
+        return self._registry.render(self._read_others())
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._write(gauges=True)
+            except Exception:
+                logger.exception("Dumping metrics failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except TimeoutError:
+                pass
+
+    def _write(self, gauges: bool):
+        # Readers never see a half-written dump
+        temporary = self._path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self._registry.dump(gauges)))
+        os.replace(temporary, self._path)
+
+    def _read_others(self) -> list[dict[str, list]]:
+        stale_before = time.time() - self._interval * self.STALE_INTERVALS
+        dumps = []
+        for path in self._directory.glob("*.json"):
+            if path == self._path:
+                continue
+            try:
+                dump = json.loads(path.read_text())
+                stale = path.stat().st_mtime < stale_before
+            except (OSError, ValueError):
+                # Removed or being replaced meanwhile
+                continue
+            if stale:
+                dump = {
+                    name: values
+                    for name, values in dump.items()
+                    if name not in self._registry.gauge_names()
+                }
+            dumps.append(dump)
+        return dumps
+
+
+# Metrics are kept per worker process
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to handle HTTP request by route",
+        ("method", "route", "status"),
+    )
+)
+UPSTREAM_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "tron_upstream_request_duration_seconds",
+        "Time of TronGrid calls by endpoint, path and status",
+        ("endpoint", "path", "status"),
+    )
+)
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "stage_duration_seconds",
+        "Time spent in request processing stages",
+        ("stage",),
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "cache_requests_total",
+        "Cache lookups by cache and result",
+        ("cache", "result"),
+    )
+)
+RATE_LIMITED = REGISTRY.register(
+    Counter(
+        "tron_rate_limited_total",
+        "Upstream calls rejected by rate limiter by endpoint and priority",
+        ("endpoint", "priority"),
+    )
+)
+WRITE_BEHIND_DROPPED = REGISTRY.register(
+    Counter(
+        "tron_address_query_dropped_total",
+        "Records lost by memory write-behind after failed flushes",
+    )
+)
+POOL_CONNECTIONS = REGISTRY.register(
+    Gauge(
+        "pool_connections",
+        "Connections of pools by pool and state",
+        ("pool", "state"),
+    )
+)
+
+
+# Overriden in fastapi lifespan when workers share metrics
+def get_shared_metrics() -> SharedMetrics | None:
+    return None
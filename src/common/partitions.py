@@ -0,0 +1,140 @@
+import logging
+import re
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    """DDL of a partition holding rows created in given month."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1)}')"
+    )
+
+
+async def move_default_rows(
+    connection: AsyncConnection, table: str, month: date
+) -> int:
+    """Create partition of a month whose rows landed in default one.
+
+    Postgres refuses to create it while the default partition holds rows
+    of its range, so the default partition is detached meanwhile and the
+    rows are moved into the new partition. Returns number of moved rows.
+    """
+    default = default_partition_name(table)
+    columns = ", ".join(
+        await connection.scalars(
+            text(
+                "SELECT attname FROM pg_attribute "
+                "WHERE attrelid = CAST(:table AS regclass) "
+                "AND attnum > 0 AND NOT attisdropped ORDER BY attnum"
+            ),
+            {"table": table},
+        )
+    )
+    await connection.execute(
+        text(f"ALTER TABLE {table} DETACH PARTITION {default}")
+    )
+    await connection.execute(text(create_partition_sql(table, month)))
+    result = await connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} "
+            "WHERE created_at >= :start AND created_at < :end "
+            f"RETURNING {columns}) "
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM moved"
+        ),
+        {"start": month, "end": add_months(month, 1)},
+    )
+    await connection.execute(
+        text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    )
+    return result.rowcount
+
+
+async def ensure_partitions(
+    connection: AsyncConnection,
+    table: str,
+    months_ahead: int,
+    retention_months: int | None = None,
+) -> None:
+    """Create monthly partitions up to `months_ahead` months from now.
+
+    Partitions have to exist before their month starts, otherwise rows
+    go to the default partition and block creation of the monthly one.
+    Such rows are moved to partitions of their months first, see
+    `move_default_rows`. Partitions older than `retention_months` months
+    are dropped.
+    """
+    # created_at is naive UTC
+    current_month = month_start(datetime.now(UTC).replace(tzinfo=None))
+    async with connection.begin():
+        # Serialize concurrent maintenance from several workers
+        await connection.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:table))"),
+            {"table": table},
+        )
+        default = default_partition_name(table)
+        if await connection.scalar(
+            text("SELECT to_regclass(:default) IS NOT NULL"),
+            {"default": default},
+        ):
+            stray_months = await connection.scalars(
+                text(
+                    "SELECT DISTINCT date_trunc('month', created_at) "
+                    f"FROM {default}"
+                )
+            )
+            for month in map(month_start, stray_months.all()):
+                moved = await move_default_rows(connection, table, month)
+                logger.warning(
+                    f"Moved {moved} rows of {month:%Y-%m} from {default} "
+                    f"to {partition_name(table, month)}"
+                )
+
+        for months in range(months_ahead + 1):
+            month = add_months(current_month, months)
+            await connection.execute(text(create_partition_sql(table, month)))
+
+        if retention_months is None:
+            return
+        oldest_month = add_months(current_month, -retention_months)
+        partitions = await connection.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        )
+        for name in partitions:
+            match = PARTITION_NAME_RE.search(name)
+            if match is None:
+                continue
+            month = date(int(match[1]), int(match[2]), 1)
+            if month < oldest_month:
+                await connection.execute(text(f"DROP TABLE {name}"))
@@ -1,13 +1,58 @@
-from redis.asyncio import from_url as aioredis_from_url
+from redis.asyncio import BlockingConnectionPool, ConnectionPool
 from redis.asyncio.client import Redis
 
-from settings.redis import get_redis_settings
+from settings.redis import RedisSettings, get_redis_settings
 
-redis = aioredis_from_url(
-    get_redis_settings().REDIS_URL, decode_responses=False
-)
+from .redis_cache import TrackedCache
+
+
+def create_redis(settings: RedisSettings) -> Redis:
+    options = dict(
+        decode_responses=False,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+    )
+    if settings.REDIS_MAX_CONNECTIONS is None:
+        pool = ConnectionPool.from_url(settings.REDIS_URL, **options)
+    else:
+        # Blocking pool makes requests wait instead of failing when all
+        # connections are busy
+        pool = BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **options,
+        )
+    return Redis(connection_pool=pool)
+
+
+redis = create_redis(get_redis_settings())
+
+
+def get_pool_connections() -> list[tuple[tuple[str, str], int]]:
+    """In use and idle connections of the Redis pool.
+
+    Reads redis-py internals, reports nothing if they aren't there.
+    """
+    pool = redis.connection_pool
+    in_use = getattr(pool, "_in_use_connections", None)
+    available = getattr(pool, "_available_connections", None)
+    if in_use is None or available is None:
+        return []
+    return [
+        (("redis", "in_use"), len(in_use)),
+        (("redis", "idle"), len(available)),
+    ]
 
 
 # Has to be overriden in fastapi lifespan
 def get_redis() -> Redis:
     raise NotImplementedError()
+
+
+# Overriden in fastapi lifespan when client-side caching is enabled
+def get_tracked_cache() -> TrackedCache | None:
+    return None
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from redis.asyncio.client import Redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = b"__redis__:invalidate"
+# Seconds to wait before reconnecting lost invalidation connection
+RECONNECT_DELAY = 1.0
+
+
+class InvalidatedCache(Protocol):
+    """Cache fed by `InvalidationTracker`."""
+
+    @property
+    def prefixes(self) -> list[str]:
+        """Prefixes of Redis keys the cache keeps values of."""
+
+    def invalidate(self, keys: list[str] | None):
+        """Drop entries of changed keys, all of them if None."""
+
+    def enable(self):
+        """Invalidations are delivered from now on."""
+
+    def disable(self):
+        """Invalidations may be lost until enabled again."""
+
+
+class TrackedCache:
+    """Worker memory copy of Redis values, dropped on server invalidation.
+
+    Entries are (key, field) pairs, field being empty for plain keys, and
+    a change of the key drops all of its fields. The cache only serves
+    entries while `InvalidationTracker` is connected.
+
+    Values are read from Redis on another connection than invalidations
+    come from, so one could arrive before the value it invalidates is
+    stored. Take `token()` before reading the value and pass it to `set`,
+    which skips values read before any invalidation seen since.
+    """
+
+    def __init__(self, prefixes: list[str], max_size: int, ttl: float):
+        self.prefixes = prefixes
+        self._max_size = max_size
+        self._ttl = ttl
+        # (key, field) -> (expires at, value), least recently used first
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = (
+            OrderedDict()
+        )
+        self._fields: dict[str, set[str]] = {}
+        self._version = 0
+        self.enabled = False
+
+    def token(self) -> int:
+        return self._version
+
+    def get(self, key: str, field: str = "") -> bytes | None:
+        if not self.enabled:
+            return None
+        entry = self._entries.get((key, field))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key, field)
+            return None
+        self._entries.move_to_end((key, field))
+        return value
+
+    def set(self, key: str, value: bytes, token: int, field: str = ""):
+        if not self.enabled or token != self._version:
+            return
+        self._entries[key, field] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end((key, field))
+        self._fields.setdefault(key, set()).add(field)
+        while len(self._entries) > self._max_size:
+            (old_key, old_field), _ = self._entries.popitem(last=False)
+            self._discard_field(old_key, old_field)
+
+    def invalidate(self, keys: list[str] | None):
+        """Drop entries of changed keys, all of them if None."""
+        if keys is None:
+            self._version += 1
+            self._entries.clear()
+            self._fields.clear()
+            return
+        # Keys tracked for other caches don't make values stale
+        keys = [key for key in keys if key.startswith(tuple(self.prefixes))]
+        if not keys:
+            return
+        self._version += 1
+        for key in keys:
+            for field in self._fields.pop(key, ()):
+                self._entries.pop((key, field), None)
+
+    def enable(self):
+        self.invalidate(None)
+        self.enabled = True
+
+    def disable(self):
+        # Invalidations are lost while disconnected
+        self.enabled = False
+        self.invalidate(None)
+
+    def _pop(self, key: str, field: str):
+        self._entries.pop((key, field), None)
+        self._discard_field(key, field)
+
+    def _discard_field(self, key: str, field: str):
+        fields = self._fields.get(key)
+        if fields is not None:
+            fields.discard(field)
+            if not fields:
+                del self._fields[key]
+
+
+class InvalidationTracker:
+    """Feeds key invalidations pushed by Redis into caches.
+
+    Every cache gets all invalidations and drops entries of its own keys.
+
+    Uses one dedicated connection in broadcasting mode: it's told to
+    track key prefixes of the caches, redirects invalidations to itself
+    and subscribes to them. The connection speaks RESP2, where they come
+    as pub/sub messages, whatever protocol the pool uses. Caches are
+    disabled while the connection is down.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        caches: list[InvalidatedCache],
+        ping_interval: float,
+    ):
+        self._redis = redis
+        self._caches = caches
+        self._ping_interval = ping_interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        # Nothing is invalidated until the connection is up
+        for cache in self._caches:
+            cache.disable()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        # Blocked on reading invalidations, so cancelled
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def _create_connection(self):
+        pool = self._redis.connection_pool
+        return pool.connection_class(
+            **{
+                **pool.connection_kwargs,
+                "protocol": 2,
+                # Subscribed connection can't run health checks
+                "health_check_interval": 0,
+            }
+        )
+
+    async def _run(self):
+        while True:
+            connection = self._create_connection()
+            try:
+                await self._track(connection)
+            except Exception:
+                logger.exception("Redis invalidation connection lost")
+            finally:
+                for cache in self._caches:
+                    cache.disable()
+                await connection.disconnect()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _track(self, connection):
+        await connection.connect()
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+        prefixes = []
+        for cache in self._caches:
+            for prefix in cache.prefixes:
+                prefixes += ["PREFIX", prefix]
+        await connection.send_command(
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            client_id,
+            "BCAST",
+            *prefixes,
+        )
+        await connection.read_response()
+        await connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+        await connection.read_response()
+        for cache in self._caches:
+            cache.enable()
+
+        ping_sent = False
+        while True:
+            message = await connection.read_response(
+                timeout=self._ping_interval
+            )
+            if message is None:
+                if ping_sent:
+                    raise ConnectionError("Redis didn't answer PING")
+                await connection.send_command("PING")
+                ping_sent = True
+                continue
+            ping_sent = False
+            kind, *payload = message
+            if kind == b"message" and payload[0] == INVALIDATION_CHANNEL:
+                # None is sent when the whole database is flushed
+                keys = payload[1]
+                if keys is not None:
+                    keys = [key.decode() for key in keys]
+                for cache in self._caches:
+                    cache.invalidate(keys)
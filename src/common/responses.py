@@ -0,0 +1,10 @@
+from fastapi.responses import Response
+
+
+class RawJSONResponse(Response):
+    """Response with a body already serialized to JSON bytes.
+
+    Skips jsonable_encoder and re-encoding of the content.
+    """
+
+    media_type = "application/json"
@@ -0,0 +1,103 @@
+from functools import lru_cache
+from hashlib import sha256
+from typing import Iterable
+
+BASE58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+# Byte value -> base58 digit, -1 for bytes outside of the alphabet
+_DECODE_TABLE = [-1] * 256
+for _digit, _char in enumerate(BASE58_ALPHABET):
+    _DECODE_TABLE[_char] = _digit
+
+ADDRESS_LENGTH = 34
+# 1 version byte + 20 bytes of public key hash
+DECODED_ADDRESS_LENGTH = 21
+CHECKSUM_LENGTH = 4
+
+
+class InvalidTronAddress(ValueError):
+    pass
+
+
+@lru_cache(maxsize=2**16)
+def _decode(address: str) -> bytes:
+    if len(address) != ADDRESS_LENGTH:
+        raise InvalidTronAddress(
+            f"Address must be {ADDRESS_LENGTH} characters long"
+        )
+    if not address.startswith("T"):
+        raise InvalidTronAddress("Address must start with 'T'")
+
+    number = 0
+    for char in address.encode("latin-1", errors="replace"):
+        digit = _DECODE_TABLE[char]
+        if digit < 0:
+            raise InvalidTronAddress(f"Invalid character '{chr(char)}'")
+        number = number * 58 + digit
+
+    try:
+        raw = number.to_bytes(DECODED_ADDRESS_LENGTH + CHECKSUM_LENGTH, "big")
+    except OverflowError:
+        raise InvalidTronAddress("Invalid address length after decoding")
+    decoded, checksum = raw[:DECODED_ADDRESS_LENGTH], raw[-CHECKSUM_LENGTH:]
+    if sha256(sha256(decoded).digest()).digest()[:CHECKSUM_LENGTH] != checksum:
+        raise InvalidTronAddress("Invalid address checksum")
+    return decoded
+
+
+@lru_cache(maxsize=2**16)
+def encode_address(decoded: bytes) -> str:
+    """Encode 21 bytes of TRON address into base58check string."""
+    if len(decoded) != DECODED_ADDRESS_LENGTH:
+        raise InvalidTronAddress(
+            f"Decoded address must be {DECODED_ADDRESS_LENGTH} bytes long"
+        )
+    checksum = sha256(sha256(decoded).digest()).digest()[:CHECKSUM_LENGTH]
+    number = int.from_bytes(decoded + checksum, "big")
+    chars = bytearray()
+    while number:
+        number, digit = divmod(number, 58)
+        chars.append(BASE58_ALPHABET[digit])
+    # Leading zero bytes are encoded as the first alphabet character
+    for byte in decoded:
+        if byte:
+            break
+        chars.append(BASE58_ALPHABET[0])
+    return chars[::-1].decode()
+
+
+def decode_address(address: str) -> bytes:
+    """Decode base58check TRON address into 21 bytes.
+
+    Results are memoized, so hot addresses are decoded once per process.
+    Raises InvalidTronAddress (a ValueError) for invalid addresses.
+    """
+    if not isinstance(address, str):
+        raise InvalidTronAddress("Address must be a string")
+    return _decode(address)
+
+
+def validate_address(address: str) -> str:
+    """Return address if it's valid, raise InvalidTronAddress otherwise."""
+    decode_address(address)
+    return address
+
+
+def is_valid_address(address: str) -> bool:
+    try:
+        decode_address(address)
+    except InvalidTronAddress:
+        return False
+    return True
+
+
+def decode_addresses(
+    addresses: Iterable[str],
+) -> dict[str, bytes | InvalidTronAddress]:
+    """Decode many addresses, mapping each to its bytes or error."""
+    decoded = {}
+    for address in addresses:
+        try:
+            decoded[address] = decode_address(address)
+        except InvalidTronAddress as e:
+            decoded[address] = e
+    return decoded
@@ -0,0 +1,58 @@
+from redis.asyncio.client import Redis
+
+# Takes the lease unless another owner holds it, extends own lease
+# KEYS: lease
+# ARGV: owner, lease milliseconds
+ACQUIRE_LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return 1
+"""
+
+# Gives the lease up if it's still held by the owner
+# KEYS: lease
+# ARGV: owner
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+"""
+
+
+class BlockCheckpointRepository:
+    """Progress of the block follower, kept in Redis.
+
+    Checkpoint is the number of the last processed block. Lease lets only
+    one follower of all workers process blocks at a time.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis: Redis = redis
+        self._acquire_lease = redis.register_script(ACQUIRE_LEASE_SCRIPT)
+        self._release_lease = redis.register_script(RELEASE_LEASE_SCRIPT)
+
+    def _get_checkpoint_key(self):
+        return "tron_blocks:checkpoint"
+
+    def _get_lease_key(self):
+        return "tron_blocks:lease"
+
+    async def get_checkpoint(self) -> int | None:
+        checkpoint = await self.redis.get(self._get_checkpoint_key())
+        return int(checkpoint) if checkpoint is not None else None
+
+    async def set_checkpoint(self, number: int):
+        await self.redis.set(self._get_checkpoint_key(), number)
+
+    async def acquire_lease(self, owner: str, lease: float) -> bool:
+        """Take or extend the lease for `lease` seconds."""
+        acquired = await self._acquire_lease(
+            keys=[self._get_lease_key()], args=[owner, int(lease * 1000)]
+        )
+        return bool(acquired)
+
+    async def release_lease(self, owner: str):
+        await self._release_lease(keys=[self._get_lease_key()], args=[owner])
@@ -0,0 +1,208 @@
+from datetime import UTC, datetime, timedelta
+
+from redis.asyncio.client import Redis
+from sqlalchemy import (
+    Float,
+    case,
+    cast,
+    func,
+    literal_column,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tron_address_query import TronAddressQuery
+from models.tron_address_rollup import TronAddressRollup
+
+PERIODS = ("hour", "day")
+# Raw rows aggregated by one refresh at most, so catching up after a
+# long pause is split into short transactions
+MAX_WINDOW = timedelta(days=1)
+
+
+def utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _truncate(period: str, column):
+    # Literal, so GROUP BY matches the selected expression exactly
+    return func.date_trunc(literal_column(f"'{period}'"), column)
+
+
+class TronAddressRollupRepository:
+    """Hourly and daily summaries of address metrics.
+
+    Hourly rollups are aggregated from tron_address_query, daily ones from
+    hourly rollups. Every refresh recomputes whole buckets touched by rows
+    newer than the watermark kept in Redis, so it's idempotent and a lost
+    watermark only costs extra work.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        read_session: AsyncSession | None = None,
+    ):
+        self.session: AsyncSession = session
+        self.read_session: AsyncSession = read_session or session
+        self.redis: Redis = redis
+
+    def _get_watermark_key(self):
+        return "tron_address_rollup:watermark"
+
+    async def get_watermark(self) -> datetime | None:
+        raw = await self.redis.get(self._get_watermark_key())
+        return datetime.fromisoformat(raw.decode()) if raw else None
+
+    async def set_watermark(self, watermark: datetime):
+        await self.redis.set(self._get_watermark_key(), watermark.isoformat())
+
+    async def refresh(self, lag: timedelta) -> datetime | None:
+        """Bring rollups up to date with rows created before now.
+
+        Rows created up to `lag` before the watermark are included again,
+        which covers records committed late by write-behind. Returns the
+        new watermark, None if there is nothing to process or another
+        worker is refreshing.
+        """
+        now = utcnow()
+        watermark = await self.get_watermark()
+        if watermark is None:
+            watermark = await self.session.scalar(
+                select(func.min(TronAddressQuery.created_at))
+            )
+            if watermark is None:
+                return None
+        start = floor_hour(min(watermark, now - lag))
+        end = min(now, start + MAX_WINDOW)
+
+        locked = await self.session.scalar(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"),
+            {"name": TronAddressRollup.__tablename__},
+        )
+        if not locked:
+            await self.session.rollback()
+            return None
+        await self.session.execute(self._upsert_hours_stmt(start, end))
+        await self.session.execute(
+            self._upsert_days_stmt(floor_day(start), end)
+        )
+        await self.session.commit()
+
+        await self.set_watermark(end)
+        return end
+
+    @staticmethod
+    def _upsert_stmt(select_stmt):
+        columns = [
+            "period",
+            "address",
+            "bucket_start",
+            "samples",
+            "last_trx_balance",
+            "max_energy_used",
+            "avg_bandwidth_utilization",
+            "max_bandwidth_utilization",
+        ]
+        stmt = pg_insert(TronAddressRollup).from_select(columns, select_stmt)
+        return stmt.on_conflict_do_update(
+            index_elements=["period", "address", "bucket_start"],
+            set_={name: stmt.excluded[name] for name in columns[3:]},
+        )
+
+    def _upsert_hours_stmt(self, start: datetime, end: datetime):
+        raw = TronAddressQuery
+        bucket_start = _truncate("hour", raw.created_at)
+        utilization = cast(raw.bandwidth_used, Float) / func.nullif(
+            raw.bandwidth_limit, 0
+        )
+        select_stmt = (
+            select(
+                literal_column("'hour'"),
+                raw.address,
+                bucket_start,
+                func.count(),
+                array_agg(
+                    aggregate_order_by(raw.trx_balance, raw.created_at.desc())
+                )[1],
+                func.max(raw.energy_used),
+                func.avg(utilization),
+                func.max(utilization),
+            )
+            .where(raw.created_at >= start, raw.created_at < end)
+            .group_by(raw.address, bucket_start)
+        )
+        return self._upsert_stmt(select_stmt)
+
+    def _upsert_days_stmt(self, start: datetime, end: datetime):
+        hourly = TronAddressRollup
+        bucket_start = _truncate("day", hourly.bucket_start)
+        # Average of hourly averages weighted by their samples
+        utilization_samples = func.sum(
+            case(
+                (
+                    hourly.avg_bandwidth_utilization.is_not(None),
+                    hourly.samples,
+                ),
+                else_=0,
+            )
+        )
+        select_stmt = (
+            select(
+                literal_column("'day'"),
+                hourly.address,
+                bucket_start,
+                func.sum(hourly.samples),
+                array_agg(
+                    aggregate_order_by(
+                        hourly.last_trx_balance, hourly.bucket_start.desc()
+                    )
+                )[1],
+                func.max(hourly.max_energy_used),
+                func.sum(hourly.avg_bandwidth_utilization * hourly.samples)
+                / func.nullif(utilization_samples, 0),
+                func.max(hourly.max_bandwidth_utilization),
+            )
+            .where(
+                hourly.period == "hour",
+                hourly.bucket_start >= start,
+                hourly.bucket_start < end,
+            )
+            .group_by(hourly.address, bucket_start)
+        )
+        return self._upsert_stmt(select_stmt)
+
+    async def get_rollups(
+        self,
+        address: str,
+        period: str,
+        since: datetime,
+        until: datetime,
+    ) -> list[TronAddressRollup]:
+        """Rollups of address with buckets starting in [since, until)."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period {period}")
+        floor = floor_day if period == "day" else floor_hour
+        stmt = (
+            select(TronAddressRollup)
+            .where(
+                TronAddressRollup.period == period,
+                TronAddressRollup.address == address,
+                TronAddressRollup.bucket_start >= floor(since),
+                TronAddressRollup.bucket_start < until,
+            )
+            .order_by(TronAddressRollup.bucket_start)
+        )
+        return list((await self.read_session.scalars(stmt)).all())
@@ -1,58 +1,517 @@
-import pickle
-from datetime import timedelta
+import binascii
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import UTC, datetime, timedelta
+from typing import AsyncIterator
 
 from redis.asyncio.client import Redis
-from sqlalchemy import select
+from sqlalchemy import (
+    Float,
+    Row,
+    Select,
+    cast,
+    func,
+    literal_column,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.tron_address_query import TronAddressQuery
+from common.metrics import CACHE_REQUESTS, STAGE_DURATION
+from common.redis_cache import TrackedCache
+from models.tron_address_query import (
+    METRIC_COLUMNS,
+    TronAddressQuery,
+    to_address_data,
+)
+
+from .tron_aq_codec import decode_record, encode_record
+from .tron_aq_count import TronAddressQueryCounter
+from .tron_aq_writer import TronAddressQueryWriter
 
 INSTANCES_QTY_IN_CACHE = 100
 CACHE_TTL = timedelta(seconds=60 * 60)
+# Serialized pages also carry total, which write-behind flushes change
+# without invalidating them
+PAGE_CACHE_TTL = timedelta(seconds=60)
+
+# Generation of pages, serialized page of it and records counter in one
+# round trip. Pages of a generation are kept in a hash of their own
+# KEYS: generation, counter
+# ARGV: pages key prefix, page field
+GET_PAGE_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+local page = redis.call('HGET', ARGV[1] .. generation, ARGV[2])
+return {generation, page, redis.call('GET', KEYS[2])}
+"""
+# Rows exported per transaction and fetched from server-side cursor at once
+EXPORT_CHUNK_SIZE = 10_000
+EXPORT_FETCH_SIZE = 1_000
+# Drift from pg_class estimate after which the counter is re-seeded
+COUNT_TOLERANCE = 0.1
+# Tables smaller than this aren't reconciled, estimates are too rough
+MIN_COUNT_TO_RECONCILE = 10_000
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """Build opaque keyset cursor pointing after given record."""
+    return urlsafe_b64encode(
+        f"{created_at.isoformat()}|{id}".encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+class RecordsPage:
+    """Page of newest records and total.
+
+    `serialized` page is set when it was cached, otherwise records are
+    read and the page can be cached with
+    `TronAddressQueryRepository.cache_page` once serialized.
+    """
+
+    def __init__(
+        self,
+        records: list[dict] | None = None,
+        total: int = 0,
+        serialized: bytes | None = None,
+    ):
+        self.records = records or []
+        self.total = total
+        self.serialized = serialized
+        # Pages key, field and tracked cache token to cache the page with
+        self._cache_slot: tuple[str, str, int | None] | None = None
 
 
 class TronAddressQueryRepository:
-    def __init__(self, session: AsyncSession, redis: Redis):
+    """Address queries in the database with Redis caches around them.
+
+    Writes go through `session`, read-only queries through `read_session`,
+    which is bound to a replica when it's available.
+    """
+
+    # Incremented on every insert, pages of older generations are stale.
+    # Kept in worker memory by `tracked_cache` along with pages
+    GENERATION_KEY = "tron_address_query:generation"
+    # Prefix of Redis hashes of "page_size:page_number:exact" to
+    # serialized page, one per generation
+    PAGES_KEY = "tron_address_query:pages:"
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        writer: TronAddressQueryWriter | None = None,
+        read_session: AsyncSession | None = None,
+        tracked_cache: TrackedCache | None = None,
+    ):
         self.session: AsyncSession = session
+        self.read_session: AsyncSession = read_session or session
         self.redis: Redis = redis
+        self.writer: TronAddressQueryWriter | None = writer
+        self.tracked_cache: TrackedCache | None = tracked_cache
+        self._get_page = redis.register_script(GET_PAGE_SCRIPT)
+        self.counter = TronAddressQueryCounter(redis)
 
     def _get_cache_key(self):
-        return "tron_address_query_key"
+        # Redis list of serialized records, newest first
+        return "tron_address_query:recent"
+
+    def _get_pages_key(self, generation: bytes):
+        return f"{self.PAGES_KEY}{generation.decode()}"
+
+    def _get_count_key(self):
+        return self.counter.KEY
+
+    def _get_generation_key(self):
+        return self.GENERATION_KEY
+
+    @staticmethod
+    def _serialize(instance: TronAddressQuery) -> bytes:
+        return encode_record(instance)
+
+    @staticmethod
+    def _deserialize(raw: bytes) -> dict | None:
+        return decode_record(raw)
 
     async def insert_record(
         self, address: str, address_data: dict | None = None
     ):
-        instance = TronAddressQuery(address=address, address_data=address_data)
-        self.session.add(instance)
-        await self.session.commit()
+        (instance,) = await self.insert_records([(address, address_data)])
+        return instance
 
-        cached_data = await self.redis.get(self._get_cache_key())
-        if cached_data is None:
-            cached_data = []
+    async def insert_records(
+        self, records: list[tuple[str, dict | None]]
+    ) -> list[TronAddressQuery]:
+        """Insert many (address, address_data) records with one commit.
+
+        With write-behind enabled records are only queued for insertion.
+        """
+        instances = [
+            TronAddressQuery(address=address, address_data=address_data)
+            for address, address_data in records
+        ]
+        if not instances:
+            return instances
+
+        if self.writer is None:
+            self.session.add_all(instances)
+            with STAGE_DURATION.time("db_commit"):
+                await self.session.commit()
         else:
-            cached_data = pickle.loads(cached_data)
+            # Fill server-side defaults to keep the rows complete
+            now = datetime.now(UTC).replace(tzinfo=None)
+            for instance in instances:
+                instance.id = uuid.uuid4()
+                instance.created_at = instance.updated_at = now
+            await self.writer.put(
+                [
+                    {
+                        "id": instance.id,
+                        "address": instance.address,
+                        "created_at": instance.created_at,
+                        "updated_at": instance.updated_at,
+                        **{
+                            name: getattr(instance, name)
+                            for name in METRIC_COLUMNS
+                        },
+                    }
+                    for instance in instances
+                ]
+            )
 
-        if len(cached_data) + 1 > INSTANCES_QTY_IN_CACHE:
-            cached_data.pop(len(cached_data))
-        cached_data.insert(0, instance)
-        await self.redis.set(
-            self._get_cache_key(), pickle.dumps(cached_data), ex=CACHE_TTL
-        )
-        return instance
+        await self._cache_instances(instances)
+        return instances
 
-    async def get_paginated(self, page_size: int = 100, page_number: int = 1):
-        if page_number <= 0 or page_size <= 0:
-            return []
-        if page_number == 1 and page_size <= INSTANCES_QTY_IN_CACHE:
-            cached = await self.redis.get(self._get_cache_key())
-            if cached is None:
-                return []
-            return pickle.loads(cached)[:page_size]
+    async def _cache_instances(self, instances: list[TronAddressQuery]):
+        # LPUSH + LTRIM is O(1) per record and MULTI/EXEC makes it atomic,
+        # so concurrent workers can't overwrite each other's records
+        key = self._get_cache_key()
+        with STAGE_DURATION.time("serialization"):
+            serialized = list(map(self._serialize, instances))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lpush(key, *serialized)
+            pipe.ltrim(key, 0, INSTANCES_QTY_IN_CACHE - 1)
+            pipe.expire(key, CACHE_TTL)
+            # Pages of the previous generation expire by themselves
+            pipe.incr(self._get_generation_key())
+            # Write-behind counts records once they are flushed
+            if self.writer is None:
+                await self.counter.incr(len(instances), client=pipe)
+            with STAGE_DURATION.time("redis"):
+                await pipe.execute()
+
+    async def _get_records(self, page_size: int, page_number: int) -> list:
+        start = (page_number - 1) * page_size
+        if start + page_size <= INSTANCES_QTY_IN_CACHE:
+            cached = await self.redis.lrange(
+                self._get_cache_key(), start, start + page_size - 1
+            )
+            # Partially filled cache (e.g. expired) can't be trusted,
+            # read such pages from the database
+            if len(cached) == page_size:
+                records = [self._deserialize(raw) for raw in cached]
+                # Entries of unknown format are left by other versions
+                if None not in records:
+                    return records
+        # Only columns of the response, without building ORM entities
         stmt = (
-            select(TronAddressQuery)
+            select(
+                TronAddressQuery.created_at,
+                TronAddressQuery.address,
+                *(getattr(TronAddressQuery, name) for name in METRIC_COLUMNS),
+            )
             .order_by(TronAddressQuery.created_at.desc())
-            .offset((page_number - 1) * page_size)
+            .offset(start)
             .limit(page_size)
         )
-        taqs = (await self.session.scalars(stmt)).all()
-        return taqs
+        return [
+            {
+                "created_at": created_at,
+                "address": address,
+                "address_data": to_address_data(metrics),
+            }
+            for created_at, address, *metrics in await self.read_session.execute(
+                stmt
+            )
+        ]
+
+    async def estimate_count(self) -> int:
+        """Rows estimated by planner statistics, refreshed by ANALYZE."""
+        estimate = await self.read_session.scalar(
+            text(
+                "SELECT coalesce(sum(greatest(child.reltuples, 0)), 0) "
+                "FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": TronAddressQuery.__tablename__},
+        )
+        return int(estimate)
+
+    async def count(self, exact: bool = True) -> int:
+        """Total records, read from a Redis counter or estimated.
+
+        Estimated as well while another request seeds the counter, see
+        `TronAddressQueryCounter`.
+        """
+        if not exact:
+            return await self.estimate_count()
+        count = await self.counter.get()
+        if count is not None:
+            return count
+        # Replica may miss records already counted
+        count = await self.counter.seed(self.session)
+        if count is None:
+            # Another request is scanning, don't pile up on the table
+            return await self.estimate_count()
+        return count
+
+    async def reconcile_count(self) -> bool:
+        """Drop the counter if it drifted from the estimate.
+
+        Catches drift after Redis data loss or dropped partitions. Returns
+        whether the counter was dropped, the next exact count re-seeds it.
+        """
+        count = await self.redis.get(self._get_count_key())
+        if count is None:
+            return False
+        estimate = await self.estimate_count()
+        if estimate < MIN_COUNT_TO_RECONCILE:
+            return False
+        if abs(int(count) - estimate) <= estimate * COUNT_TOLERANCE:
+            return False
+        await self.redis.delete(self._get_count_key())
+        return True
+
+    async def get_paginated(
+        self,
+        page_size: int = 100,
+        page_number: int = 1,
+        exact_total: bool = True,
+    ) -> RecordsPage:
+        """Page of newest records.
+
+        Pages within recent records are cached serialized until the next
+        insert, so a hit is a single script call, or no round trip at all
+        with client-side caching. `total` is approximate unless
+        `exact_total`, see `count`.
+        """
+        if page_number <= 0 or page_size <= 0:
+            return RecordsPage()
+
+        cacheable = page_number * page_size <= INSTANCES_QTY_IN_CACHE
+        field = f"{page_size}:{page_number}:{int(exact_total)}"
+        generation_key = self._get_generation_key()
+        total = None
+        token = None
+        if cacheable:
+            if self.tracked_cache is not None:
+                token = self.tracked_cache.token()
+                generation = self.tracked_cache.get(generation_key)
+                if generation is not None:
+                    page = self.tracked_cache.get(
+                        self._get_pages_key(generation), field
+                    )
+                    if page is not None:
+                        CACHE_REQUESTS.inc("records_page", "local_hit")
+                        return RecordsPage(serialized=page)
+            # Generation is read before the records, so inserts made
+            # meanwhile make the page stale
+            with STAGE_DURATION.time("redis"):
+                generation, page, count = await self._get_page(
+                    keys=[generation_key, self._get_count_key()],
+                    args=[self.PAGES_KEY, field],
+                )
+            pages_key = self._get_pages_key(generation)
+            if self.tracked_cache is not None:
+                self.tracked_cache.set(generation_key, generation, token)
+            if page is not None:
+                CACHE_REQUESTS.inc("records_page", "hit")
+                if self.tracked_cache is not None:
+                    self.tracked_cache.set(pages_key, page, token, field)
+                return RecordsPage(serialized=page)
+            CACHE_REQUESTS.inc("records_page", "miss")
+            if exact_total and count is not None:
+                total = int(count)
+
+        records = await self._get_records(page_size, page_number)
+        if total is None:
+            total = await self.count(exact=exact_total)
+        page = RecordsPage(records, total)
+        if cacheable:
+            page._cache_slot = (pages_key, field, token)
+        return page
+
+    async def cache_page(self, page: RecordsPage, serialized: bytes):
+        """Cache serialized `page` returned by `get_paginated`."""
+        if page._cache_slot is None:
+            return
+        pages_key, field, token = page._cache_slot
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(pages_key, field, serialized)
+            pipe.expire(pages_key, PAGE_CACHE_TTL)
+            with STAGE_DURATION.time("redis"):
+                await pipe.execute()
+        if self.tracked_cache is not None:
+            self.tracked_cache.set(pages_key, serialized, token, field)
+
+    async def _get_page_after(
+        self, stmt: Select, cursor: str | None, page_size: int
+    ) -> tuple[list[TronAddressQuery], str | None]:
+        stmt = stmt.order_by(
+            TronAddressQuery.created_at.desc(), TronAddressQuery.id.desc()
+        )
+        if cursor is not None:
+            stmt = stmt.where(
+                tuple_(TronAddressQuery.created_at, TronAddressQuery.id)
+                < tuple_(*decode_cursor(cursor))
+            )
+        # One extra row tells whether there is a next page
+        taqs = (
+            await self.read_session.scalars(stmt.limit(page_size + 1))
+        ).all()
+        if len(taqs) <= page_size:
+            return list(taqs), None
+        taqs = list(taqs[:page_size])
+        return taqs, encode_cursor(taqs[-1].created_at, taqs[-1].id)
+
+    async def get_page_after(
+        self, cursor: str | None = None, page_size: int = 100
+    ) -> tuple[list[TronAddressQuery], str | None]:
+        """Keyset pagination on (created_at, id), newest first.
+
+        Returns records after `cursor` (from the start if None) and cursor
+        of the next page, which is None on the last page.
+        """
+        return await self._get_page_after(
+            select(TronAddressQuery), cursor, page_size
+        )
+
+    async def get_history(
+        self,
+        address: str,
+        since: datetime,
+        until: datetime,
+        cursor: str | None = None,
+        page_size: int = 100,
+    ) -> tuple[list[TronAddressQuery], str | None]:
+        """Records of address created in [since, until), newest first.
+
+        Paginated like `get_page_after`. Time range limits the scan to
+        partitions of these months.
+        """
+        stmt = select(TronAddressQuery).where(
+            TronAddressQuery.address == address,
+            TronAddressQuery.created_at >= since,
+            TronAddressQuery.created_at < until,
+        )
+        return await self._get_page_after(stmt, cursor, page_size)
+
+    async def iter_export(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        address: str | None = None,
+    ) -> AsyncIterator[list[Row]]:
+        """Records created in [since, until) oldest first, in batches.
+
+        Rows are streamed from a server-side cursor, so memory use doesn't
+        depend on their number. Every EXPORT_CHUNK_SIZE rows the
+        transaction ends and the next chunk continues after the last row
+        by keyset, so a slow client never keeps a long transaction open.
+        Rows have id, created_at, address and metric columns.
+        """
+        stmt = select(
+            TronAddressQuery.id,
+            TronAddressQuery.created_at,
+            TronAddressQuery.address,
+            *(getattr(TronAddressQuery, name) for name in METRIC_COLUMNS),
+        ).order_by(TronAddressQuery.created_at, TronAddressQuery.id)
+        if since is not None:
+            stmt = stmt.where(TronAddressQuery.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(TronAddressQuery.created_at < until)
+        if address is not None:
+            stmt = stmt.where(TronAddressQuery.address == address)
+        stmt = stmt.limit(EXPORT_CHUNK_SIZE).execution_options(
+            yield_per=EXPORT_FETCH_SIZE
+        )
+
+        after = None
+        try:
+            while True:
+                chunk_stmt = stmt
+                if after is not None:
+                    chunk_stmt = stmt.where(
+                        tuple_(
+                            TronAddressQuery.created_at, TronAddressQuery.id
+                        )
+                        > tuple_(*after)
+                    )
+                exported = 0
+                result = await self.read_session.stream(chunk_stmt)
+                async for rows in result.partitions():
+                    exported += len(rows)
+                    after = (rows[-1].created_at, rows[-1].id)
+                    yield rows
+                # Ends the transaction and returns connection to the pool
+                await self.read_session.rollback()
+                if exported < EXPORT_CHUNK_SIZE:
+                    return
+        finally:
+            await self.read_session.rollback()
+
+    async def get_metric_buckets(
+        self,
+        address: str,
+        metric: str,
+        bucket: str,
+        since: datetime,
+        until: datetime,
+    ) -> list[Row]:
+        """Aggregate metric of address per hour or day in database.
+
+        Rows have bucket start, samples count and min, max, avg and last
+        values of the metric, ordered by bucket.
+        """
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric {metric}")
+        if bucket not in ("hour", "day"):
+            raise ValueError(f"Unknown bucket {bucket}")
+        column = getattr(TronAddressQuery, metric)
+        # Literal, so GROUP BY matches the selected expression exactly
+        bucket_start = func.date_trunc(
+            literal_column(f"'{bucket}'"), TronAddressQuery.created_at
+        ).label("bucket")
+        stmt = (
+            select(
+                bucket_start,
+                func.count().label("samples"),
+                func.min(column).label("min"),
+                func.max(column).label("max"),
+                cast(func.avg(column), Float).label("avg"),
+                array_agg(
+                    aggregate_order_by(
+                        column, TronAddressQuery.created_at.desc()
+                    )
+                )[1].label("last"),
+            )
+            .where(
+                TronAddressQuery.address == address,
+                TronAddressQuery.created_at >= since,
+                TronAddressQuery.created_at < until,
+            )
+            .group_by(bucket_start)
+            .order_by(bucket_start)
+        )
+        return list((await self.read_session.execute(stmt)).all())
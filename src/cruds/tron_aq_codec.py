@@ -0,0 +1,85 @@
+import json
+import struct
+from datetime import datetime, timedelta
+
+from common.tron_address import decode_address, encode_address
+from models.tron_address_query import (
+    METRIC_COLUMNS,
+    TronAddressQuery,
+    to_address_data,
+)
+
+# Cached records are version byte followed by a fixed struct layout.
+# Bump the version and keep decoding the previous one when it changes.
+VERSION = 1
+# id, address, created_at and updated_at as microseconds since epoch,
+# bitmask of set metrics, integer metrics, trx_balance
+_RECORD_V1 = struct.Struct("<16s21sqqBqqqqd")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _isoformat_micros(value: int) -> str:
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def _format_uuid(value: bytes) -> str:
+    # Same as str(uuid.UUID(bytes=value)), without building the object
+    h = value.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def encode_record(instance: TronAddressQuery) -> bytes:
+    """Pack record into 95 bytes."""
+    metrics = [getattr(instance, name) for name in METRIC_COLUMNS]
+    mask = 0
+    for bit, value in enumerate(metrics):
+        if value is not None:
+            mask |= 1 << bit
+    return bytes((VERSION,)) + _RECORD_V1.pack(
+        instance.id.bytes,
+        decode_address(instance.address),
+        _to_micros(instance.created_at),
+        _to_micros(instance.updated_at),
+        mask,
+        *(value or 0 for value in metrics[:-1]),
+        metrics[-1] or 0.0,
+    )
+
+
+def _decode_v1(raw: bytes) -> dict:
+    id, address, created_at, updated_at, mask, *metrics = (
+        _RECORD_V1.unpack_from(raw, 1)
+    )
+    created_at_iso = _isoformat_micros(created_at)
+    # Records are cached right after insertion, both timestamps are equal
+    updated_at_iso = (
+        created_at_iso
+        if updated_at == created_at
+        else _isoformat_micros(updated_at)
+    )
+    return {
+        "id": _format_uuid(id),
+        "address": encode_address(address),
+        "address_data": to_address_data(
+            value if mask & (1 << bit) else None
+            for bit, value in enumerate(metrics)
+        ),
+        "created_at": created_at_iso,
+        "updated_at": updated_at_iso,
+    }
+
+
+def decode_record(raw: bytes) -> dict | None:
+    """Unpack cached record, None if its format is unknown.
+
+    Entries cached as JSON before the binary format are still decoded.
+    """
+    if raw[:1] == bytes((VERSION,)):
+        return _decode_v1(raw)
+    if raw[:1] == b"{":
+        return json.loads(raw)
+    return None
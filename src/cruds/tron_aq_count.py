@@ -0,0 +1,85 @@
+from redis.asyncio.client import Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.tron_address_query import TronAddressQuery
+
+# Seconds seeding may take, afterwards it's abandoned and may be retried
+SEED_TIMEOUT = 300
+
+# Counts inserted records once the counter is seeded, or in the delta of
+# seeding in progress
+# KEYS: counter, delta
+# ARGV: inserted records
+INCR_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('INCRBY', KEYS[1], ARGV[1])
+elseif redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('INCRBY', KEYS[2], ARGV[1])
+end
+"""
+
+# Seeds the counter with counted records and ones inserted meanwhile,
+# unless seeding timed out. Returns the counter
+# KEYS: counter, delta
+# ARGV: counted records
+SEED_SCRIPT = """
+local delta = redis.call('GET', KEYS[2])
+if not delta then
+    return redis.call('GET', KEYS[1])
+end
+redis.call('DEL', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[1], tonumber(ARGV[1]) + tonumber(delta))
+end
+return redis.call('GET', KEYS[1])
+"""
+
+
+class TronAddressQueryCounter:
+    """Number of tron_address_query records, kept in Redis.
+
+    Seeded with COUNT(*) when missing and incremented by records once
+    they are committed, so the full scan is paid once, by the one caller
+    that starts seeding. Records committed
+    while counting go to a delta added when seeding ends. A batch
+    committed just before seeding starts but incremented after it is
+    counted twice, `TronAddressQueryRepository.reconcile_count` bounds
+    such drift.
+    """
+
+    KEY = "tron_address_query:count"
+    DELTA_KEY = "tron_address_query:count_delta"
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+        self._incr = redis.register_script(INCR_SCRIPT)
+        self._seed = redis.register_script(SEED_SCRIPT)
+
+    async def get(self) -> int | None:
+        count = await self._redis.get(self.KEY)
+        return int(count) if count is not None else None
+
+    async def incr(self, inserted: int, client: Redis | None = None):
+        """Count committed records, `client` may be a pipeline."""
+        await self._incr(
+            keys=[self.KEY, self.DELTA_KEY], args=[inserted], client=client
+        )
+
+    async def seed(self, session: AsyncSession) -> int | None:
+        """Count records with `session`, which has to see all commits.
+
+        Returns None without counting while another caller is seeding.
+        """
+        started = await self._redis.set(
+            self.DELTA_KEY, 0, nx=True, ex=SEED_TIMEOUT
+        )
+        if not started:
+            return None
+        count = await session.scalar(
+            select(func.count()).select_from(TronAddressQuery)
+        )
+        seeded = await self._seed(
+            keys=[self.KEY, self.DELTA_KEY], args=[count]
+        )
+        return int(seeded) if seeded is not None else count
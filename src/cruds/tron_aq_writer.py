@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy.dialects.postgresql import insert
+
+from common.db import session_acm
+from common.metrics import STAGE_DURATION, WRITE_BEHIND_DROPPED
+from models.tron_address_query import METRIC_COLUMNS, TronAddressQuery
+
+from .tron_aq_count import TronAddressQueryCounter
+
+logger = logging.getLogger(__name__)
+
+
+class TronAddressQueryWriter:
+    """Write-behind buffer for tron_address_query rows.
+
+    Rows are queued in process memory and inserted by a background task
+    in batches of up to `batch_size` rows or every `flush_interval`
+    seconds, whichever comes first. Rows of a failed flush are queued
+    again while there is free space, the rest and ones failing on stop
+    are dropped and counted. Queued rows are lost if the process crashes,
+    use `TronAddressQueryStreamWriter` when that matters.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        batch_size: int,
+        flush_interval: float,
+        max_queue_size: int,
+    ):
+        self._counter = TronAddressQueryCounter(redis)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        # None is a stop sentinel
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue(max_queue_size)
+        self._task: asyncio.Task | None = None
+
+    async def put(self, rows: list[dict]):
+        """Queue rows, waits for free space when queue is full."""
+        for row in rows:
+            await self._queue.put(row)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush all queued rows and stop background task."""
+        await self._queue.put(None)
+        await self._task
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if stopping:
+                # Rows queued again behind the stop sentinel
+                batch += self._drain()
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception(f"Failed to flush {len(batch)} records")
+                if stopping:
+                    self._drop(batch)
+                else:
+                    self._requeue(batch)
+                    # Don't retry right away while the database is failing
+                    await asyncio.sleep(self._flush_interval)
+
+    def _requeue(self, rows: list[dict]):
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                self._drop(rows[index:])
+                return
+
+    def _drain(self) -> list[dict]:
+        rows = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def _drop(rows: list[dict]):
+        logger.error(f"Dropped {len(rows)} records")
+        WRITE_BEHIND_DROPPED.inc(amount=len(rows))
+
+    async def _collect(self) -> tuple[list[dict], bool]:
+        """Wait for a batch, returns it and whether stop was requested."""
+        loop = asyncio.get_running_loop()
+        row = await self._queue.get()
+        if row is None:
+            return [], True
+
+        batch = [row]
+        deadline = loop.time() + self._flush_interval
+        while len(batch) < self._batch_size:
+            try:
+                row = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+            if row is None:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    async def _write(self, rows: list[dict]):
+        # Multi-row INSERT, keys are generated on enqueue so replays
+        # of already written rows are skipped
+        stmt = insert(TronAddressQuery).on_conflict_do_nothing(
+            index_elements=["id", "created_at"]
+        )
+        async with session_acm() as session:
+            with STAGE_DURATION.time("db_commit"):
+                result = await session.execute(
+                    stmt.returning(TronAddressQuery.id), rows
+                )
+                inserted = len(result.all())
+                await session.commit()
+        try:
+            await self._counter.incr(inserted)
+        except RedisError:
+            # Reconciliation catches the drift
+            logger.exception(f"Failed to count {inserted} flushed records")
+
+
+class TronAddressQueryStreamWriter(TronAddressQueryWriter):
+    """Crash-safe write-behind buffer backed by a Redis stream.
+
+    Rows are acknowledged and removed from the stream only after they
+    are committed. Rows left pending by a crashed worker are claimed
+    by the others after `claim_idle_time` seconds. Rows of failed
+    batches delivered `max_deliveries` times are written one by one, and
+    ones failing alone are moved to the dead letter stream.
+    """
+
+    STREAM_KEY = "tron_address_query:pending"
+    DEAD_LETTER_KEY = "tron_address_query:dead"
+    GROUP_NAME = "tron_address_query_writers"
+
+    def __init__(
+        self,
+        redis: Redis,
+        batch_size: int,
+        flush_interval: float,
+        claim_idle_time: float = 60,
+        max_deliveries: int = 10,
+    ):
+        # Rows are queued in the stream, the memory queue stays unused
+        super().__init__(redis, batch_size, flush_interval, max_queue_size=0)
+        self._redis = redis
+        self._claim_idle_time = claim_idle_time
+        self._max_deliveries = max_deliveries
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    @staticmethod
+    def _dump_row(row: dict) -> bytes:
+        return json.dumps(
+            {
+                **row,
+                "id": str(row["id"]),
+                "created_at": row["created_at"].isoformat(),
+                "updated_at": row["updated_at"].isoformat(),
+            },
+            separators=(",", ":"),
+        ).encode()
+
+    @staticmethod
+    def _load_row(raw: bytes) -> dict:
+        row = json.loads(raw)
+        # Rows queued before metrics moved to their own columns
+        if "address_data" in row:
+            address_data = row.pop("address_data") or {}
+            row.update(
+                {name: address_data.get(name) for name in METRIC_COLUMNS}
+            )
+        row["id"] = uuid.UUID(row["id"])
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+        row["updated_at"] = datetime.fromisoformat(row["updated_at"])
+        return row
+
+    async def put(self, rows: list[dict]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for row in rows:
+                pipe.xadd(self.STREAM_KEY, {"row": self._dump_row(row)})
+            await pipe.execute()
+
+    async def start(self):
+        await self._create_group()
+        await super().start()
+
+    async def _create_group(self):
+        try:
+            await self._redis.xgroup_create(
+                self.STREAM_KEY, self.GROUP_NAME, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def stop(self):
+        """Flush rows read by this worker and stop background task.
+
+        Unread rows stay in the stream for other or restarted workers.
+        """
+        self._stopping.set()
+        await self._task
+
+    async def _run(self):
+        # Own pending entries from a previous life come first
+        last_id = "0"
+        while not self._stopping.is_set():
+            try:
+                entries = await self._read(last_id)
+                if not entries:
+                    break
+                last_id = entries[-1][0]
+                await self._flush_entries(entries)
+            except Exception:
+                logger.exception("Reading pending records failed")
+                await self._backoff()
+        while not self._stopping.is_set():
+            try:
+                entries = await self._claim_stale()
+                entries += await self._read(
+                    ">", block=int(self._flush_interval * 1000)
+                )
+                await self._flush_entries(entries)
+            except ResponseError as e:
+                if "NOGROUP" not in str(e):
+                    logger.exception("Flushing records stream failed")
+                    await self._backoff()
+                    continue
+                # Redis came back without data, acked entries were deleted
+                # so the recreated group only delivers unacked ones
+                logger.warning("Records stream group is gone, recreating")
+                try:
+                    await self._create_group()
+                except RedisError:
+                    logger.exception("Recreating records stream group failed")
+                    await self._backoff()
+            except Exception:
+                logger.exception("Flushing records stream failed")
+                await self._backoff()
+
+    async def _backoff(self):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), self._flush_interval)
+        except TimeoutError:
+            pass
+
+    async def _read(
+        self, stream_id: str, block: int | None = None
+    ) -> list[tuple[bytes, dict]]:
+        response = await self._redis.xreadgroup(
+            self.GROUP_NAME,
+            self._consumer,
+            {self.STREAM_KEY: stream_id},
+            count=self._batch_size,
+            block=block,
+        )
+        if not response:
+            return []
+        _, entries = response[0]
+        return entries
+
+    async def _claim_stale(self) -> list[tuple[bytes, dict]]:
+        _, entries, *_ = await self._redis.xautoclaim(
+            self.STREAM_KEY,
+            self.GROUP_NAME,
+            self._consumer,
+            min_idle_time=int(self._claim_idle_time * 1000),
+            count=self._batch_size,
+        )
+        return entries
+
+    async def _flush_entries(self, entries: list[tuple[bytes, dict]]):
+        if not entries:
+            return
+        try:
+            await self._write(
+                [self._load_row(fields[b"row"]) for _, fields in entries]
+            )
+        except Exception:
+            # Entries stay pending and will be claimed again
+            logger.exception(f"Failed to flush {len(entries)} records")
+            await self._flush_exhausted(entries)
+            return
+        await self._ack([entry_id for entry_id, _ in entries])
+
+    async def _flush_exhausted(self, entries: list[tuple[bytes, dict]]):
+        """Write entries out of deliveries alone, dead letter failing ones.
+
+        Keeps a row which can't be written from failing its batch forever.
+        """
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for entry_id, _ in entries:
+                pipe.xpending_range(
+                    self.STREAM_KEY,
+                    self.GROUP_NAME,
+                    min=entry_id,
+                    max=entry_id,
+                    count=1,
+                )
+            pending = await pipe.execute()
+        for (entry_id, fields), info in zip(entries, pending):
+            if not info or info[0]["times_delivered"] < self._max_deliveries:
+                continue
+            try:
+                await self._write([self._load_row(fields[b"row"])])
+            except Exception:
+                logger.exception(
+                    f"Moving record {entry_id.decode()} to "
+                    f"{self.DEAD_LETTER_KEY}"
+                )
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.xadd(self.DEAD_LETTER_KEY, fields)
+                    pipe.xack(self.STREAM_KEY, self.GROUP_NAME, entry_id)
+                    pipe.xdel(self.STREAM_KEY, entry_id)
+                    await pipe.execute()
+                continue
+            await self._ack([entry_id])
+
+    async def _ack(self, entry_ids: list[bytes]):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.STREAM_KEY, self.GROUP_NAME, *entry_ids)
+            pipe.xdel(self.STREAM_KEY, *entry_ids)
+            await pipe.execute()
+
+
+# Overriden in fastapi lifespan when write-behind is enabled
+def get_tron_aq_writer() -> TronAddressQueryWriter | None:
+    return None
@@ -1,22 +1,50 @@
-from typing import Annotated
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from functools import partial
+from typing import Annotated, AsyncIterator, Callable
 
 from fastapi import Depends
 from redis.asyncio.client import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from common.db import get_session
-from common.redis import Redis, get_redis
+from common.db import (
+    LazySession,
+    async_session_maker,
+    get_read_session_maker,
+)
+from common.redis import Redis, get_redis, get_tracked_cache
+from common.redis_cache import TrackedCache
 from models.base import Base
 
+from .tron_address_rollup import TronAddressRollupRepository
 from .tron_aq import TronAddressQueryRepository
+from .tron_aq_writer import TronAddressQueryWriter, get_tron_aq_writer
+from .watchlist import WatchlistRepository
 
 
 class UoW:
-    def __init__(self, session: AsyncSession, redis: Redis):
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        tron_aq_writer: TronAddressQueryWriter | None = None,
+        read_session: AsyncSession | None = None,
+        tracked_cache: TrackedCache | None = None,
+    ):
         self.session: AsyncSession = session
+        self.read_session: AsyncSession = read_session or session
         self.redis: Redis = redis
 
-        self.tron_aq = TronAddressQueryRepository(session, redis)
+        self.tron_aq = TronAddressQueryRepository(
+            session,
+            redis,
+            tron_aq_writer,
+            read_session=self.read_session,
+            tracked_cache=tracked_cache,
+        )
+        self.tron_rollup = TronAddressRollupRepository(
+            session, redis, read_session=self.read_session
+        )
+        self.watchlist = WatchlistRepository(redis)
 
     def add(self, instance: Base):
         self.session.add(instance)
@@ -34,8 +62,57 @@ class UoW:
         await self.session.refresh(instance)
 
 
+@asynccontextmanager
+async def uow_acm(
+    redis: Redis,
+    tron_aq_writer: TronAddressQueryWriter | None = None,
+    tracked_cache: TrackedCache | None = None,
+) -> AsyncIterator[UoW]:
+    # Sessions are opened on first query, reads share the primary one
+    # unless a replica is used
+    session = LazySession(async_session_maker)
+    read_session_maker = get_read_session_maker()
+    read_session = session
+    if read_session_maker is not async_session_maker:
+        read_session = LazySession(read_session_maker)
+    try:
+        yield UoW(
+            session,
+            redis,
+            tron_aq_writer,
+            read_session=read_session,
+            tracked_cache=tracked_cache,
+        )
+    finally:
+        await session.aclose()
+        if read_session is not session:
+            await read_session.aclose()
+
+
+UoWFactory = Callable[[], AbstractAsyncContextManager[UoW]]
+
+
 async def get_uow(
-    session: Annotated[AsyncSession, Depends(get_session)],
     redis: Annotated[Redis, Depends(get_redis)],
+    tron_aq_writer: Annotated[
+        TronAddressQueryWriter | None, Depends(get_tron_aq_writer)
+    ],
+    tracked_cache: Annotated[TrackedCache | None, Depends(get_tracked_cache)],
 ):
-    yield UoW(session, redis)
+    async with uow_acm(redis, tron_aq_writer, tracked_cache) as uow:
+        yield uow
+
+
+def get_uow_factory(
+    redis: Annotated[Redis, Depends(get_redis)],
+    tron_aq_writer: Annotated[
+        TronAddressQueryWriter | None, Depends(get_tron_aq_writer)
+    ],
+    tracked_cache: Annotated[TrackedCache | None, Depends(get_tracked_cache)],
+) -> UoWFactory:
+    """Opens UoW with its own sessions, e.g. in streamed response bodies.
+
+    Dependencies are closed before the body of StreamingResponse is
+    sent, so sessions of `get_uow` can't be used there.
+    """
+    return partial(uow_acm, redis, tron_aq_writer, tracked_cache)
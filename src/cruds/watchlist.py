@@ -0,0 +1,155 @@
+import json
+import time
+
+from redis.asyncio.client import Redis
+
+# Atomically takes due addresses within the global per-second budget
+# and leases them, so concurrent pollers never refresh the same address.
+# KEYS: schedule, rate window counter
+# ARGV: now, max count, lease seconds, budget per window
+CLAIM_DUE_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[2]) or '0')
+local count = math.min(tonumber(ARGV[2]), tonumber(ARGV[4]) - used)
+if count <= 0 then
+    return {}
+end
+local due = redis.call(
+    'ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, count
+)
+local leased_until = tonumber(ARGV[1]) + tonumber(ARGV[3])
+for _, address in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', leased_until, address)
+end
+if #due > 0 then
+    redis.call('INCRBY', KEYS[2], #due)
+    redis.call('EXPIRE', KEYS[2], 2)
+end
+return due
+"""
+
+# Updates schedule and state of an address unless it was unwatched
+# KEYS: schedule, states
+# ARGV: address, next poll timestamp, state
+RESCHEDULE_SCRIPT = """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+end
+"""
+
+# Makes watched addresses due now unless they already are
+# KEYS: schedule
+# ARGV: now, addresses
+MARK_DUE_SCRIPT = """
+local marked = 0
+for i = 2, #ARGV do
+    local next_poll_at = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if next_poll_at and tonumber(next_poll_at) > tonumber(ARGV[1]) then
+        redis.call('ZADD', KEYS[1], 'XX', ARGV[1], ARGV[i])
+        marked = marked + 1
+    end
+end
+return marked
+"""
+
+
+class WatchlistRepository:
+    """Watched addresses with their poll schedule, kept in Redis.
+
+    Schedule is a sorted set of addresses by next poll timestamp,
+    state is a hash of address to its poll interval and last snapshot.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis: Redis = redis
+        self._claim_due = redis.register_script(CLAIM_DUE_SCRIPT)
+        self._reschedule = redis.register_script(RESCHEDULE_SCRIPT)
+        self._mark_due = redis.register_script(MARK_DUE_SCRIPT)
+
+    def _get_schedule_key(self):
+        return "tron_watchlist:schedule"
+
+    def _get_state_key(self):
+        return "tron_watchlist:state"
+
+    def _get_rate_key(self, now: float):
+        return f"tron_watchlist:rate:{int(now)}"
+
+    async def add(self, address: str, interval: float):
+        """Watch address, first poll is due right away."""
+        state = json.dumps({"interval": interval, "data": None})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(
+                self._get_schedule_key(), {address: time.time()}, nx=True
+            )
+            pipe.hsetnx(self._get_state_key(), address, state)
+            await pipe.execute()
+
+    async def remove(self, address: str) -> bool:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._get_schedule_key(), address)
+            pipe.hdel(self._get_state_key(), address)
+            removed, _ = await pipe.execute()
+        return bool(removed)
+
+    async def get_all(self) -> list[tuple[str, float, float]]:
+        """All watched (address, next poll timestamp, interval)."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrange(self._get_schedule_key(), 0, -1, withscores=True)
+            pipe.hgetall(self._get_state_key())
+            schedule, states = await pipe.execute()
+        return [
+            (
+                address.decode(),
+                next_poll_at,
+                json.loads(states[address])["interval"],
+            )
+            for address, next_poll_at in schedule
+            if address in states
+        ]
+
+    async def claim_due(
+        self, limit: int, lease: float, budget_per_second: int
+    ) -> list[str]:
+        """Lease up to `limit` due addresses for `lease` seconds."""
+        now = time.time()
+        due = await self._claim_due(
+            keys=[self._get_schedule_key(), self._get_rate_key(now)],
+            args=[now, limit, lease, budget_per_second],
+        )
+        return [address.decode() for address in due]
+
+    async def mark_due(self, addresses: list[str]) -> int:
+        """Poll watched ones of addresses right away, return their count.
+
+        Addresses being polled may be polled once more.
+        """
+        if not addresses:
+            return 0
+        return await self._mark_due(
+            keys=[self._get_schedule_key()], args=[time.time(), *addresses]
+        )
+
+    async def get_states(self, addresses: list[str]) -> dict[str, dict]:
+        """Map address to {"interval": ..., "data": last snapshot}."""
+        if not addresses:
+            return {}
+        states = await self.redis.hmget(self._get_state_key(), addresses)
+        return {
+            address: json.loads(state)
+            for address, state in zip(addresses, states)
+            if state is not None
+        }
+
+    async def reschedule(self, states: dict[str, dict]):
+        """Save new states and schedule next polls after their intervals."""
+        now = time.time()
+        keys = [self._get_schedule_key(), self._get_state_key()]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for address, state in states.items():
+                await self._reschedule(
+                    keys=keys,
+                    args=[address, now + state["interval"], json.dumps(state)],
+                    client=pipe,
+                )
+            await pipe.execute()
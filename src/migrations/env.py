@@ -17,6 +17,7 @@ if config.config_file_name is not None:
 from models.base import Base
 # Import models to load metadata
 from models.tron_address_query import TronAddressQuery
+from models.tron_address_rollup import TronAddressRollup
 
 # add your model's MetaData object here
 # for 'autogenerate' support
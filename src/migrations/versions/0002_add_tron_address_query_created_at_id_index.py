@@ -0,0 +1,41 @@
+"""Add tron_address_query (created_at, id) index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-05-05 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build concurrently to not block inserts on a big table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tron_address_query_created_at_id',
+            'tron_address_query',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tron_address_query_created_at_id',
+            table_name='tron_address_query',
+            postgresql_concurrently=True,
+        )
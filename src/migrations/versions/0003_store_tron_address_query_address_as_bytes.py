@@ -0,0 +1,115 @@
+"""Store tron_address_query address as bytes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-05-12 14:03:55.120938
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from base58 import b58decode_check, b58encode_check
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+
+def convert_rows(source: str, target: str, target_type, convert) -> None:
+    """Fill `target` column of rows missing it from `source`, walking by id."""
+    table = sa.table(
+        'tron_address_query',
+        sa.column('id', sa.Uuid()),
+        sa.column(source),
+        sa.column(target),
+    )
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        stmt = (
+            sa.select(table.c.id, table.c[source])
+            .where(table.c[target].is_(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+        rows = connection.execute(stmt).all()
+        if not rows:
+            break
+        connection.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam('row_id'))
+            .values({target: sa.bindparam('value', type_=target_type)}),
+            [{'row_id': id, 'value': convert(value)} for id, value in rows],
+        )
+        last_id = rows[-1].id
+
+
+def convert_column(source: str, target: str, target_type, convert) -> None:
+    """Fill `target` column from `source`.
+
+    Batches are committed one by one, so the table isn't locked and its
+    WAL isn't held back while the bulk is converted. A failed run leaves
+    converted rows in place and the next one continues from them. Rows
+    written meanwhile are converted under the lock of the schema change.
+    """
+    with op.get_context().autocommit_block():
+        convert_rows(source, target, target_type, convert)
+    op.execute('LOCK TABLE tron_address_query IN ACCESS EXCLUSIVE MODE')
+    convert_rows(source, target, target_type, convert)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Kept by a failed run, batches are committed separately
+    op.execute(
+        'ALTER TABLE tron_address_query '
+        'ADD COLUMN IF NOT EXISTS address_bytes BYTEA'
+    )
+    convert_column(
+        'address', 'address_bytes', sa.LargeBinary(length=21), b58decode_check
+    )
+    op.drop_column('tron_address_query', 'address')
+    op.alter_column(
+        'tron_address_query',
+        'address_bytes',
+        new_column_name='address',
+        nullable=False,
+    )
+    op.create_index(
+        op.f('ix_tron_address_query_address'),
+        'tron_address_query',
+        ['address'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f('ix_tron_address_query_address'), table_name='tron_address_query'
+    )
+    op.execute(
+        'ALTER TABLE tron_address_query '
+        'ADD COLUMN IF NOT EXISTS address_str VARCHAR(34)'
+    )
+    convert_column(
+        'address',
+        'address_str',
+        sa.String(length=34),
+        lambda value: b58encode_check(bytes(value)).decode(),
+    )
+    op.drop_column('tron_address_query', 'address')
+    op.alter_column(
+        'tron_address_query',
+        'address_str',
+        new_column_name='address',
+        nullable=False,
+    )
@@ -0,0 +1,103 @@
+"""Partition tron_address_query by month
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-05-19 09:41:17.554012
+
+Rows are copied in one transaction so the table swap is atomic, writes
+wait for it, so run it while the app is stopped or buffers writes in
+stream write-behind mode. Rows newer than the partitions made here go
+to the default partition, PartitionMaintainer moves them out.
+"""
+from datetime import UTC, date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+COLUMNS = "id, created_at, address, address_data, updated_at"
+
+
+# Partition helpers as of this revision, copied from common.partitions so
+# later changes of the app don't alter the migration
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_y{month.year}m{month.month:02d} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1)}')"
+    )
+
+
+def create_table(partitioned: bool) -> None:
+    op.create_table('tron_address_query',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('address', sa.LargeBinary(length=21), nullable=False),
+    sa.Column('address_data', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'created_at') if partitioned else sa.PrimaryKeyConstraint('id'),
+    **({'postgresql_partition_by': 'RANGE (created_at)'} if partitioned else {}),
+    )
+
+
+def create_indexes(history_index: bool) -> None:
+    op.create_index('ix_tron_address_query_created_at_id', 'tron_address_query', ['created_at', 'id'], unique=False)
+    if history_index:
+        op.create_index('ix_tron_address_query_address_created_at_id', 'tron_address_query', ['address', 'created_at', 'id'], unique=False)
+    else:
+        op.create_index('ix_tron_address_query_address', 'tron_address_query', ['address'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('tron_address_query', 'tron_address_query_legacy')
+    op.drop_index('ix_tron_address_query_created_at_id', table_name='tron_address_query_legacy')
+    op.drop_index('ix_tron_address_query_address', table_name='tron_address_query_legacy')
+    op.execute('ALTER TABLE tron_address_query_legacy RENAME CONSTRAINT tron_address_query_pkey TO tron_address_query_legacy_pkey')
+
+    create_table(partitioned=True)
+    op.execute('CREATE TABLE tron_address_query_default PARTITION OF tron_address_query DEFAULT')
+
+    # Partitions for every month having rows and a few months ahead
+    now = datetime.now(UTC).replace(tzinfo=None)
+    oldest = op.get_bind().scalar(sa.text('SELECT min(created_at) FROM tron_address_query_legacy'))
+    month = month_start(oldest or now)
+    last_month = add_months(month_start(now), MONTHS_AHEAD)
+    while month <= last_month:
+        op.execute(create_partition_sql('tron_address_query', month))
+        month = add_months(month, 1)
+
+    op.execute(f'INSERT INTO tron_address_query ({COLUMNS}) SELECT {COLUMNS} FROM tron_address_query_legacy')
+    op.drop_table('tron_address_query_legacy')
+    create_indexes(history_index=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('tron_address_query', 'tron_address_query_partitioned')
+    op.drop_index('ix_tron_address_query_created_at_id', table_name='tron_address_query_partitioned')
+    op.drop_index('ix_tron_address_query_address_created_at_id', table_name='tron_address_query_partitioned')
+    op.execute('ALTER TABLE tron_address_query_partitioned RENAME CONSTRAINT tron_address_query_pkey TO tron_address_query_partitioned_pkey')
+
+    create_table(partitioned=False)
+    op.execute(f'INSERT INTO tron_address_query ({COLUMNS}) SELECT {COLUMNS} FROM tron_address_query_partitioned')
+    # Drops all partitions too
+    op.drop_table('tron_address_query_partitioned')
+    create_indexes(history_index=False)
@@ -0,0 +1,55 @@
+"""Move address_data to typed columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-05-26 11:18:02.904377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns as of this revision, kept here so later model changes don't
+# alter the migration
+METRIC_COLUMNS = {
+    'bandwidth_used': sa.BigInteger(),
+    'bandwidth_limit': sa.BigInteger(),
+    'energy_used': sa.BigInteger(),
+    'energy_limit': sa.BigInteger(),
+    'trx_balance': sa.Numeric(precision=20, scale=6),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, type_ in METRIC_COLUMNS.items():
+        op.add_column('tron_address_query', sa.Column(name, type_, nullable=True))
+    op.execute(
+        'UPDATE tron_address_query SET '
+        + ', '.join(
+            f"{name} = (address_data->>'{name}')::{'numeric' if name == 'trx_balance' else 'bigint'}"
+            for name in METRIC_COLUMNS
+        )
+        + ' WHERE address_data IS NOT NULL'
+    )
+    op.drop_column('tron_address_query', 'address_data')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('tron_address_query', sa.Column('address_data', sa.JSON(), nullable=True))
+    op.execute(
+        'UPDATE tron_address_query SET address_data = json_build_object('
+        + ', '.join(f"'{name}', {name}" for name in METRIC_COLUMNS)
+        + ')'
+    )
+    for name in METRIC_COLUMNS:
+        op.drop_column('tron_address_query', name)
@@ -1,51 +1,82 @@
 import uuid
+from datetime import datetime
+from typing import Iterable, Literal, get_args
 
-from base58 import b58decode_check
-from sqlalchemy import JSON, String
+from sqlalchemy import BigInteger, DateTime, Index, Numeric, func
 from sqlalchemy.orm import Mapped, mapped_column, validates
 
+from common.tron_address import validate_address
+
 from .base import Base
 from .mixins import TimestampedMixin
+from .types import TronAddressType
+
+# Account metrics kept in typed columns, exposed together as address_data
+MetricColumn = Literal[
+    "bandwidth_used",
+    "bandwidth_limit",
+    "energy_used",
+    "energy_limit",
+    "trx_balance",
+]
+METRIC_COLUMNS: tuple[MetricColumn, ...] = get_args(MetricColumn)
+
+
+def to_address_data(metrics: Iterable) -> dict:
+    """address_data of metric values in METRIC_COLUMNS order.
+
+    Unset metrics are omitted, as in address_data stored before the
+    columns.
+    """
+    return {
+        name: value
+        for name, value in zip(METRIC_COLUMNS, metrics)
+        if value is not None
+    }
 
 
 class TronAddressQuery(Base, TimestampedMixin):
     __tablename__ = "tron_address_query"
+    # Fetch server-generated timestamps with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Supports keyset pagination, scanned backwards for newest first
+        Index("ix_tron_address_query_created_at_id", "created_at", "id"),
+        # Supports per-address history
+        Index(
+            "ix_tron_address_query_address_created_at_id",
+            "address",
+            "created_at",
+            "id",
+        ),
+        # Monthly partitions are managed by common.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
-    address: Mapped[str] = mapped_column(String(34), nullable=False)
-    address_data: Mapped[dict | None] = mapped_column(
-        JSON, nullable=True, default=None
+    # Partition key has to be a part of primary key
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(), server_default=func.now(), primary_key=True
+    )
+    address: Mapped[str] = mapped_column(TronAddressType(), nullable=False)
+    bandwidth_used: Mapped[int | None] = mapped_column(BigInteger)
+    bandwidth_limit: Mapped[int | None] = mapped_column(BigInteger)
+    energy_used: Mapped[int | None] = mapped_column(BigInteger)
+    energy_limit: Mapped[int | None] = mapped_column(BigInteger)
+    trx_balance: Mapped[float | None] = mapped_column(
+        Numeric(20, 6, asdecimal=False)
     )
 
+    @property
+    def address_data(self) -> dict:
+        return to_address_data(getattr(self, name) for name in METRIC_COLUMNS)
+
+    @address_data.setter
+    def address_data(self, value: dict | None):
+        value = value or {}
+        for name in METRIC_COLUMNS:
+            setattr(self, name, value.get(name))
+
     @validates("address")
     def validate_address(self, _, address):
-        if not isinstance(address, str):
-            raise ValueError("Address must be a string")
-
-        # Базовые проверки
-        if len(address) != 34:
-            raise ValueError("Address must be 34 characters long")
-
-        if not address.startswith("T"):
-            raise ValueError("Address must start with 'T'")
-
-        # Проверка символов (Base58)
-        BASE58_ALPHABET = (
-            "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
-        )
-        for char in address:
-            if char not in BASE58_ALPHABET:
-                raise ValueError(f"Invalid character '{char}' in address")
-
-        try:
-            decoded = b58decode_check(address)
-            # Декодированный адрес (без checksum) должен быть 21 байт (1 байт версии + 20 байт публичного ключа)
-            if len(decoded) != 21:
-                raise ValueError(
-                    "Invalid address length after Base58 decoding"
-                )
-
-        except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid address format: {str(e)}")
-
-        return address
+        return validate_address(address)
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .types import TronAddressType
+
+
+class TronAddressRollup(Base):
+    """Metrics of an address summarized per hour or day.
+
+    Maintained from tron_address_query by TronAddressRollupRepository.
+    """
+
+    __tablename__ = "tron_address_rollup"
+
+    # "hour" or "day"
+    period: Mapped[str] = mapped_column(String(4), primary_key=True)
+    address: Mapped[str] = mapped_column(TronAddressType(), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(), primary_key=True
+    )
+    samples: Mapped[int] = mapped_column(Integer)
+    last_trx_balance: Mapped[float | None] = mapped_column(
+        Numeric(20, 6, asdecimal=False)
+    )
+    max_energy_used: Mapped[int | None] = mapped_column(BigInteger)
+    # Share of bandwidth limit used, from 0 to 1
+    avg_bandwidth_utilization: Mapped[float | None] = mapped_column(Float)
+    max_bandwidth_utilization: Mapped[float | None] = mapped_column(Float)
@@ -0,0 +1,29 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from common.tron_address import (
+    DECODED_ADDRESS_LENGTH,
+    decode_address,
+    encode_address,
+)
+
+
+class TronAddressType(TypeDecorator):
+    """TRON address stored as its 21 decoded bytes.
+
+    Takes and returns base58check strings, so queries compare addresses
+    with strings as usual while using the compact binary column.
+    """
+
+    impl = LargeBinary(DECODED_ADDRESS_LENGTH)
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect) -> bytes | None:
+        if value is None:
+            return None
+        return decode_address(value)
+
+    def process_result_value(self, value: bytes | None, dialect) -> str | None:
+        if value is None:
+            return None
+        return encode_address(bytes(value))
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from common.metrics import REGISTRY, SharedMetrics, get_shared_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    shared_metrics: SharedMetrics | None = Depends(get_shared_metrics),
+):
+    """Metrics in Prometheus text format.
+
+    Totals of all workers when they share metrics, see
+    `SERVER_METRICS_DIR`, otherwise of the current worker only.
+    """
+    if shared_metrics is not None:
+        text = shared_metrics.render()
+    else:
+        text = REGISTRY.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
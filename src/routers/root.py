@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 
+from .stats import router as stats_router
 from .tron import router as tron_router
 
 router = APIRouter(prefix="/api")
 router.include_router(tron_router)
+router.include_router(stats_router)
@@ -0,0 +1,15 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from common.httpx import HttpxPoolStats, get_httpx_pool_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/httpx_pool", response_model=HttpxPoolStats)
+async def get_httpx_pool_stats_info(
+    stats: Annotated[HttpxPoolStats, Depends(get_httpx_pool_stats)],
+):
+    """Outgoing requests counters of current worker's shared client."""
+    return stats
@@ -1,21 +1,57 @@
-from typing import Annotated
+import asyncio
+import csv
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Literal
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import conint
+from sqlalchemy import Row
 
-from clients.tron import TronClient, TronClientException, get_tron_client
-from cruds.uow import UoW, get_uow
-from models.tron_address_query import TronAddressQuery
+from clients.tron import (
+    AccountInfoCache,
+    TronClient,
+    TronClientException,
+    get_account_info_cache,
+    get_tron_client,
+)
+from clients.tron.schemas import AccountInfoCacheStats
+from common.metrics import STAGE_DURATION
+from common.responses import RawJSONResponse
+from common.tron_address import (
+    InvalidTronAddress,
+    decode_addresses,
+    validate_address,
+)
+from cruds.uow import UoW, UoWFactory, get_uow, get_uow_factory
+from models.tron_address_query import METRIC_COLUMNS, TronAddressQuery
 from schemas.tron import (
+    TronAddressBatchRequest,
+    TronAddressBatchResult,
+    TronAddressMetric,
+    TronAddressMetricBucket,
     TronAddressQueryRequest,
     TronAddressQueryResponse,
+    TronAddressRollupBucket,
+    TronAQRecordsCursorResponse,
     TronAQRecordsRequest,
     TronAQRecordsResponse,
+    WatchlistEntry,
 )
+from settings.tron import get_tron_settings
 
 router = APIRouter(prefix="/tron", tags=["tron"])
 
 
+def to_naive_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC, naive input is treated as UTC."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
 @router.post("/account_info", response_model=TronAddressQueryResponse)
 async def get_account_info(
     tron_client: Annotated[TronClient, Depends(get_tron_client)],
@@ -24,9 +60,6 @@ async def get_account_info(
 ):
     try:
         resp_data = await tron_client.get_account_info(req.address)
-        import logging
-
-        logging.info(f"Data is {resp_data}")
     except TronClientException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
@@ -39,12 +72,357 @@ async def get_account_info(
     return TronAddressQueryResponse(**resp_data.model_dump())
 
 
-@router.get("/records_info")
+@router.post(
+    "/account_info/batch",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def get_account_info_batch(
+    tron_client: Annotated[TronClient, Depends(get_tron_client)],
+    uow_factory: Annotated[UoWFactory, Depends(get_uow_factory)],
+    req: TronAddressBatchRequest,
+):
+    """Fetch many addresses at once.
+
+    Responds with NDJSON, one `TronAddressBatchResult` per line in order of
+    completion. Successful results are saved with a single bulk insert
+    once all addresses are fetched, or the client went away.
+    """
+
+    with STAGE_DURATION.time("address_validation"):
+        decoded = decode_addresses(req.addresses)
+    valid_addresses = [
+        address
+        for address, result in decoded.items()
+        if not isinstance(result, InvalidTronAddress)
+    ]
+
+    async def save_records(records: list[tuple[str, dict]]):
+        async with uow_factory() as uow:
+            await uow.tron_aq.insert_records(records)
+
+    async def stream_results():
+        for address, result in decoded.items():
+            if isinstance(result, InvalidTronAddress):
+                line = TronAddressBatchResult(
+                    address=address, status_code=400, detail=str(result)
+                )
+                yield line.model_dump_json(exclude_none=True) + "\n"
+
+        records = []
+        try:
+            async for address, result in tron_client.iter_accounts_info(
+                valid_addresses,
+                concurrency=get_tron_settings().TRON_BATCH_CONCURRENCY,
+            ):
+                if isinstance(result, TronClientException):
+                    line = TronAddressBatchResult(
+                        address=address,
+                        status_code=result.status_code,
+                        detail=result.detail,
+                    )
+                else:
+                    records.append(
+                        (
+                            result.address,
+                            result.model_dump(
+                                exclude=set(["address"]), exclude_unset=True
+                            ),
+                        )
+                    )
+                    line = TronAddressBatchResult(
+                        address=address,
+                        status_code=200,
+                        data=TronAddressQueryResponse(**result.model_dump()),
+                    )
+                yield line.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            # Dependencies are closed once streaming starts, so records
+            # are saved in a session of their own. Shielded to finish
+            # when the stream is cancelled by a disconnect
+            await asyncio.shield(save_records(records))
+
+    return StreamingResponse(
+        stream_results(), media_type="application/x-ndjson"
+    )
+
+
+@router.get("/account_info/cache_stats", response_model=AccountInfoCacheStats)
+async def get_account_info_cache_stats(
+    cache: Annotated[AccountInfoCache | None, Depends(get_account_info_cache)],
+):
+    """Counters of current worker's account info cache."""
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Cache is disabled")
+    return cache.stats
+
+
+@router.get(
+    "/records_info",
+    response_class=RawJSONResponse,
+    responses={
+        200: {
+            "model": TronAQRecordsResponse | TronAQRecordsCursorResponse,
+        }
+    },
+)
 async def get_records_info(
     uow: Annotated[UoW, Depends(get_uow)],
     page_number: Annotated[int, conint(strict=True, ge=1)] = 1,
     page_size: Annotated[int, conint(strict=True, ge=1)] = 100,
+    cursor: str | None = None,
+    exact_total: bool = True,
+):
+    """Newest records first.
+
+    Paginated with `page_number` by default. Passing `cursor` (empty for
+    the first page) switches to keyset pagination, where every page costs
+    the same and `next_cursor` of response points to the next one.
+
+    `total` comes from a counter of inserted records, with `exact_total`
+    false it's estimated from table statistics instead.
+    """
+    if cursor is not None:
+        try:
+            records, next_cursor = await uow.tron_aq.get_page_after(
+                cursor=cursor or None, page_size=page_size
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RawJSONResponse(
+            TronAQRecordsCursorResponse(
+                records=records, next_cursor=next_cursor
+            ).model_dump_json()
+        )
+
+    page = await uow.tron_aq.get_paginated(
+        page_size=page_size,
+        page_number=page_number,
+        exact_total=exact_total,
+    )
+    if page.serialized is None:
+        with STAGE_DURATION.time("serialization"):
+            serialized = (
+                TronAQRecordsResponse(
+                    records=page.records,
+                    total=page.total,
+                    page=page_number,
+                    size=page_size,
+                )
+                .model_dump_json()
+                .encode()
+            )
+        await uow.tron_aq.cache_page(page, serialized)
+        return RawJSONResponse(serialized)
+    return RawJSONResponse(page.serialized)
+
+
+EXPORT_COLUMNS = ("id", "created_at", "address", *METRIC_COLUMNS)
+
+
+def format_ndjson(rows: list[Row]) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": str(row.id),
+                "created_at": row.created_at.isoformat(),
+                "address": row.address,
+                **dict(zip(METRIC_COLUMNS, row[3:])),
+            },
+            separators=(",", ":"),
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+def format_csv(rows: list[Row], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        (row.id, row.created_at.isoformat(), row.address, *row[3:])
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+@router.get(
+    "/records_info/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+)
+async def export_records(
+    uow_factory: Annotated[UoWFactory, Depends(get_uow_factory)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    address: str | None = None,
+):
+    """All records created in [since, until), optionally of one address.
+
+    Streams rows oldest first as NDJSON or CSV with a header, without
+    loading them all into memory.
+    """
+    if address is not None:
+        try:
+            validate_address(address)
+        except InvalidTronAddress as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    since = to_naive_utc(since) if since else None
+    until = to_naive_utc(until) if until else None
+
+    async def iter_batches():
+        # Sessions live as long as the stream
+        async with uow_factory() as uow:
+            async for rows in uow.tron_aq.iter_export(
+                since=since, until=until, address=address
+            ):
+                yield rows
+
+    async def stream_ndjson():
+        async for rows in iter_batches():
+            yield format_ndjson(rows)
+
+    async def stream_csv():
+        yield format_csv([], header=True)
+        async for rows in iter_batches():
+            yield format_csv(rows)
+
+    if format == "csv":
+        return StreamingResponse(
+            stream_csv(),
+            media_type="text/csv",
+            headers={
+                "Content-Disposition": (
+                    'attachment; filename="tron_address_query.csv"'
+                )
+            },
+        )
+    return StreamingResponse(
+        stream_ndjson(), media_type="application/x-ndjson"
+    )
+
+
+@router.get(
+    "/addresses/{address}/history",
+    response_model=TronAQRecordsCursorResponse,
+)
+async def get_address_history(
+    uow: Annotated[UoW, Depends(get_uow)],
+    address: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    page_size: Annotated[int, conint(strict=True, ge=1)] = 100,
+    cursor: str | None = None,
 ):
-    return await uow.tron_aq.get_paginated(
-        page_size=page_size, page_number=page_number
+    """Records of the address, newest first, last 30 days by default.
+
+    Paginated with `cursor` taken from `next_cursor` of previous page.
+    """
+    try:
+        validate_address(address)
+    except InvalidTronAddress as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    until = to_naive_utc(until or datetime.now(UTC))
+    since = to_naive_utc(since) if since else until - timedelta(days=30)
+
+    try:
+        records, next_cursor = await uow.tron_aq.get_history(
+            address,
+            since=since,
+            until=until,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TronAQRecordsCursorResponse(
+        records=records, next_cursor=next_cursor
+    )
+
+
+@router.get(
+    "/addresses/{address}/metrics",
+    response_model=list[TronAddressMetricBucket],
+)
+async def get_address_metrics(
+    uow: Annotated[UoW, Depends(get_uow)],
+    address: str,
+    metric: TronAddressMetric,
+    bucket: Literal["hour", "day"] = "hour",
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Min/max/avg/last of the metric per bucket, last 30 days by default."""
+    try:
+        validate_address(address)
+    except InvalidTronAddress as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    until = to_naive_utc(until or datetime.now(UTC))
+    since = to_naive_utc(since) if since else until - timedelta(days=30)
+
+    return await uow.tron_aq.get_metric_buckets(
+        address, metric=metric, bucket=bucket, since=since, until=until
     )
+
+
+@router.get(
+    "/addresses/{address}/rollups",
+    response_model=list[TronAddressRollupBucket],
+)
+async def get_address_rollups(
+    uow: Annotated[UoW, Depends(get_uow)],
+    address: str,
+    period: Literal["hour", "day"] = "hour",
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Precomputed hourly or daily summaries, last 30 days by default.
+
+    Served from rollup tables refreshed in background, so the latest
+    bucket may lag behind raw records by the refresh interval.
+    """
+    try:
+        validate_address(address)
+    except InvalidTronAddress as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    until = to_naive_utc(until or datetime.now(UTC))
+    since = to_naive_utc(since) if since else until - timedelta(days=30)
+
+    return await uow.tron_rollup.get_rollups(
+        address, period=period, since=since, until=until
+    )
+
+
+@router.get("/watchlist", response_model=list[WatchlistEntry])
+async def get_watchlist(uow: Annotated[UoW, Depends(get_uow)]):
+    return [
+        WatchlistEntry(
+            address=address,
+            next_poll_at=datetime.fromtimestamp(next_poll_at, UTC),
+            interval=interval,
+        )
+        for address, next_poll_at, interval in await uow.watchlist.get_all()
+    ]
+
+
+@router.post("/watchlist", status_code=204)
+async def add_to_watchlist(
+    uow: Annotated[UoW, Depends(get_uow)],
+    req: TronAddressQueryRequest,
+):
+    """Keep the address refreshed in background by the watchlist poller."""
+    await uow.watchlist.add(
+        req.address, interval=get_tron_settings().TRON_WATCHLIST_MIN_INTERVAL
+    )
+
+
+@router.delete("/watchlist/{address}", status_code=204)
+async def remove_from_watchlist(
+    uow: Annotated[UoW, Depends(get_uow)],
+    address: str,
+):
+    if not await uow.watchlist.remove(address):
+        raise HTTPException(status_code=404, detail="Address isn't watched")
@@ -1,7 +1,6 @@
 from datetime import datetime
 from typing import Annotated, Any
 
-from base58 import b58decode_check
 from pydantic import (
     BaseModel,
     ConfigDict,
@@ -11,6 +10,11 @@ from pydantic import (
     field_validator,
 )
 
+from common.metrics import STAGE_DURATION
+from common.tron_address import validate_address
+from models.tron_address_query import MetricColumn
+from settings.tron import get_tron_settings
+
 
 class TronAddressQueryRequest(BaseModel):
     address: str
@@ -18,26 +22,8 @@ class TronAddressQueryRequest(BaseModel):
     @field_validator("address")
     @classmethod
     def validate_address(cls, value):
-        if not isinstance(value, str):
-            raise ValueError("Value is not str")
-
-        # Базовые проверки
-        if len(value) != 34:
-            raise ValueError("Len(value) != 34")
-
-        if not value.startswith("T"):
-            raise ValueError("Address starts not with T")
-
-        # Проверка символов (Base58)
-        try:
-            decoded = b58decode_check(value)
-            # Декодированный адрес (без checksum) должен быть 21 байт (1 байт версии + 20 байт публичного ключа)
-            if len(decoded) != 21:
-                raise ValueError("Decoded address len != 21")
-
-        except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid address format: {str(e)}")
-        return value
+        with STAGE_DURATION.time("address_validation"):
+            return validate_address(value)
 
 
 class TronAddressQueryResponse(BaseModel):
@@ -49,6 +35,29 @@ class TronAddressQueryResponse(BaseModel):
     trx_balance: float = Field(description="TRX balance in TRX")
 
 
+class TronAddressBatchRequest(BaseModel):
+    addresses: list[str] = Field(min_length=1)
+
+    @field_validator("addresses")
+    @classmethod
+    def validate_addresses(cls, value):
+        # Addresses themselves are decoded by the router before fetching,
+        # bad ones get their own 400 result instead of failing the batch
+        max_size = get_tron_settings().TRON_BATCH_MAX_SIZE
+        if len(value) > max_size:
+            raise ValueError(f"Batch can't contain more than {max_size} items")
+        return value
+
+
+class TronAddressBatchResult(BaseModel):
+    address: str = Field(description="TRON address")
+    status_code: int = Field(description="HTTP-like status of the address")
+    data: TronAddressQueryResponse | None = Field(
+        default=None, description="Account info if fetched successfully"
+    )
+    detail: str | None = Field(default=None, description="Error description")
+
+
 class TronAQRecordsRequest(BaseModel):
     page_number: Annotated[int, conint(strict=True, ge=1)] = 1
     page_size: Annotated[int, conint(strict=True, ge=1)] = 100
@@ -59,7 +68,7 @@ class TronAQRecord(BaseModel):
 
     created_at: datetime
     address: str
-    address_data: dict[str, Any]
+    address_data: dict[str, Any] | None
 
 
 class TronAQRecordsResponse(BaseModel):
@@ -69,3 +78,45 @@ class TronAQRecordsResponse(BaseModel):
     total: int
     page: int
     size: int
+
+
+class TronAQRecordsCursorResponse(BaseModel):
+    records: list[TronAQRecord] = []
+    next_cursor: str | None = Field(
+        description="Pass as `cursor` to get the next page, null on last page"
+    )
+
+
+class WatchlistEntry(BaseModel):
+    address: str = Field(description="TRON address")
+    next_poll_at: datetime = Field(description="Time of the next refresh")
+    interval: float = Field(description="Current poll interval in seconds")
+
+
+TronAddressMetric = MetricColumn
+
+
+class TronAddressMetricBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bucket: datetime = Field(description="Start of the time bucket")
+    samples: int = Field(description="Records in the bucket")
+    min: float | None
+    max: float | None
+    avg: float | None
+    last: float | None = Field(description="Value of the latest record")
+
+
+class TronAddressRollupBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bucket_start: datetime = Field(description="Start of the hour or day")
+    samples: int = Field(description="Records in the bucket")
+    last_trx_balance: float | None = Field(
+        description="TRX balance of the latest record"
+    )
+    max_energy_used: int | None
+    avg_bandwidth_utilization: float | None = Field(
+        description="Average share of bandwidth limit used, from 0 to 1"
+    )
+    max_bandwidth_utilization: float | None
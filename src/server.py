@@ -0,0 +1,99 @@
+"""Production entry point.
+
+Runs app:fastapi_app in SERVER_WORKERS processes with uvloop and
+httptools. Pool sizes are divided between workers so all of them
+together stay within SERVER_*_CONNECTIONS. On SIGTERM or SIGINT workers
+stop accepting connections, finish in-flight requests and run lifespan
+shutdown, which flushes write-behind buffers, within
+SERVER_GRACEFUL_TIMEOUT seconds. Workers share metrics through
+SERVER_METRICS_DIR, so a scrape of /metrics reaching any of them
+returns totals.
+
+Run from src: python server.py
+"""
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from settings.server import ServerSettings, get_server_settings
+
+logger = logging.getLogger(__name__)
+
+
+def split_connections(total: int, workers: int) -> int:
+    """Connections of one worker.
+
+    Raises ValueError when the total doesn't give every worker one.
+    """
+    if total < workers:
+        raise ValueError(
+            f"{total} connections can't be split between {workers} workers"
+        )
+    return total // workers
+
+
+def get_worker_env(settings: ServerSettings) -> dict[str, str]:
+    """Pool settings of every worker derived from totals."""
+    workers = settings.SERVER_WORKERS
+    env = {}
+    if settings.SERVER_DB_CONNECTIONS is not None:
+        per_worker = split_connections(settings.SERVER_DB_CONNECTIONS, workers)
+        # Half kept open, the rest opened on bursts
+        pool_size = max(1, per_worker // 2)
+        env["DB_POOL_SIZE"] = str(pool_size)
+        env["DB_MAX_OVERFLOW"] = str(per_worker - pool_size)
+    if settings.SERVER_REDIS_CONNECTIONS is not None:
+        env["REDIS_MAX_CONNECTIONS"] = str(
+            split_connections(settings.SERVER_REDIS_CONNECTIONS, workers)
+        )
+    if settings.SERVER_HTTPX_CONNECTIONS is not None:
+        per_worker = split_connections(
+            settings.SERVER_HTTPX_CONNECTIONS, workers
+        )
+        env["HTTPX_MAX_CONNECTIONS"] = str(per_worker)
+        env["HTTPX_MAX_KEEPALIVE_CONNECTIONS"] = str(per_worker)
+    return env
+
+
+def prepare_metrics_dir(settings: ServerSettings) -> str:
+    """Directory of worker metrics, emptied of a previous run."""
+    if settings.SERVER_METRICS_DIR is None:
+        return tempfile.mkdtemp(prefix="tron-metrics-")
+    directory = Path(settings.SERVER_METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink()
+    return str(directory)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    settings = get_server_settings()
+    worker_env = get_worker_env(settings)
+    worker_env["SERVER_METRICS_DIR"] = prepare_metrics_dir(settings)
+    # Workers are spawned processes, they read settings from environment
+    os.environ.update(worker_env)
+    logger.info(
+        f"Starting {settings.SERVER_WORKERS} workers with {worker_env}"
+    )
+    uvicorn.run(
+        "app:fastapi_app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
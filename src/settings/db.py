@@ -1,8 +1,61 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
 class DBSettings(BaseSettings):
     POSTGRES_URL: str
+    # Optional streaming replica serving read-only queries. Its role needs
+    # pg_read_all_stats to tell an idle replica from a disconnected one
+    POSTGRES_REPLICA_URL: str | None = None
+    # Seconds of replication lag after which reads go to the primary
+    DB_REPLICA_MAX_LAG: float = 5.0
+    # Seconds between replication lag checks
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1.0
+
+    # Connection pool of each worker, replica gets the same one
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a connection from exhausted pool
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds after which connections are reopened, -1 keeps them forever
+    DB_POOL_RECYCLE: int = 1800
+    # Check connections with a round trip before handing them out
+    DB_POOL_PRE_PING: bool = True
+    # Statements cached by asyncpg per connection, 0 for pgbouncer in
+    # transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Prepared statements cached by SQLAlchemy per connection
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    # Monthly partitions created in advance
+    DB_PARTITIONS_AHEAD: int = 2
+    # Partitions older than this many months are dropped, None keeps all
+    DB_PARTITION_RETENTION_MONTHS: int | None = None
+
+    # Write-behind of address queries: "off" commits on every request,
+    # "memory" buffers rows in process, "stream" buffers them in a Redis
+    # stream so they survive a crash
+    WRITE_BEHIND_MODE: Literal["off", "memory", "stream"] = "off"
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    # Seconds between flushes of a not full batch
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 1.0
+    # Max rows buffered in "memory" mode before requests wait
+    WRITE_BEHIND_MAX_QUEUE_SIZE: int = 10_000
+    # Deliveries of a row in "stream" mode after which it's written alone
+    # and moved to the dead letter stream if that fails too
+    WRITE_BEHIND_MAX_DELIVERIES: int = 10
+
+    # Seconds between checks of records counter against table statistics
+    DB_COUNT_RECONCILE_INTERVAL: float = 600.0
+
+    # Hourly and daily address rollups refreshed in background
+    DB_ROLLUP_ENABLED: bool = True
+    # Seconds between refreshes of rollups
+    DB_ROLLUP_INTERVAL: float = 60.0
+    # Seconds rows may be committed after their created_at, should exceed
+    # write-behind flush delay
+    DB_ROLLUP_LAG: float = 300.0
 
 
 def get_db_settings() -> DBSettings:
@@ -0,0 +1,28 @@
+from pydantic_settings import BaseSettings
+
+
+class HttpxSettings(BaseSettings):
+    # Connection pool of the shared client
+    HTTPX_MAX_CONNECTIONS: int = 100
+    HTTPX_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTPX_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Seconds per phase, pool timeout is the max wait for a free connection
+    HTTPX_CONNECT_TIMEOUT: float = 3.0
+    HTTPX_READ_TIMEOUT: float = 5.0
+    HTTPX_WRITE_TIMEOUT: float = 5.0
+    HTTPX_POOL_TIMEOUT: float = 2.0
+
+    # Multiplex requests over one connection per host when it supports
+    # HTTP/2, others stay on HTTP/1.1
+    HTTPX_HTTP2: bool = False
+
+    # Retries of idempotent requests on connection errors and 429/502/503/504.
+    # With TRON rate limiting TronClient retries them through the limiter
+    HTTPX_RETRIES: int = 1
+    # Seconds before the first retry, doubled with every next one
+    HTTPX_RETRY_BACKOFF: float = 0.1
+
+
+def get_httpx_settings() -> HttpxSettings:
+    return HttpxSettings()
\ No newline at end of file
@@ -3,7 +3,34 @@ from pydantic_settings import BaseSettings
 
 class RedisSettings(BaseSettings):
     REDIS_URL: str
+    # Connections of each worker, requests wait for a free one when all
+    # are busy. None doesn't limit them
+    REDIS_MAX_CONNECTIONS: int | None = None
+    # Seconds to wait for a free connection
+    REDIS_POOL_TIMEOUT: float = 5.0
+    # Seconds to wait for a reply, has to exceed blocking reads of
+    # stream write-behind (WRITE_BEHIND_FLUSH_INTERVAL). None waits forever
+    REDIS_SOCKET_TIMEOUT: float | None = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float | None = 2.0
+    # Idle connections are checked with PING after this many seconds
+    # before reuse, 0 disables checks
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Resend commands that timed out. A write may have been applied before
+    # the timeout, so retried INCRs and XADDs can be applied twice
+    REDIS_RETRY_ON_TIMEOUT: bool = False
+
+    # Keep hot keys (serialized records pages) in worker memory, Redis
+    # pushes invalidations of them (CLIENT TRACKING, Redis 6+). Also drops
+    # account info kept in worker memory when others change it
+    REDIS_CLIENT_CACHE_ENABLED: bool = False
+    # Max entries kept in memory of each worker
+    REDIS_CLIENT_CACHE_MAX_SIZE: int = 1_000
+    # Seconds entries are kept at most, bounds staleness if an
+    # invalidation is lost
+    REDIS_CLIENT_CACHE_TTL: float = 60.0
+    # Seconds of silence after which invalidation connection is pinged
+    REDIS_CLIENT_CACHE_PING_INTERVAL: float = 10.0
 
 
 def get_redis_settings() -> RedisSettings:
-    return RedisSettings()
\ No newline at end of file
+    return RedisSettings()
@@ -0,0 +1,42 @@
+import os
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+def get_available_cpus() -> int:
+    """Cores the process may run on, respecting CPU affinity."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS
+        return os.cpu_count() or 1
+
+
+class ServerSettings(BaseSettings):
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # Worker processes, one per available core by default. CPU quotas of
+    # containers aren't detected, set it explicitly under them
+    SERVER_WORKERS: int = Field(default_factory=get_available_cpus)
+    # Seconds to finish in-flight requests and flush buffers on shutdown
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+    # Trust X-Forwarded-* headers of these proxies
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    # Directory where workers share metrics, so /metrics of any of them
+    # shows totals. server.py creates a temporary one when unset
+    SERVER_METRICS_DIR: str | None = None
+    # Seconds between dumps of worker metrics to SERVER_METRICS_DIR
+    SERVER_METRICS_INTERVAL: float = 5.0
+
+    # Connections allowed to each service by all workers together, split
+    # evenly between workers. Startup fails if a total is less than
+    # SERVER_WORKERS. None keeps per-worker pool settings as is
+    SERVER_DB_CONNECTIONS: int | None = None
+    SERVER_REDIS_CONNECTIONS: int | None = None
+    SERVER_HTTPX_CONNECTIONS: int | None = None
+
+
+def get_server_settings() -> ServerSettings:
+    return ServerSettings()
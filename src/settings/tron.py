@@ -0,0 +1,62 @@
+from pydantic_settings import BaseSettings
+
+
+class TronSettings(BaseSettings):
+    # JSON list of TronGrid/full node URLs requests are balanced between
+    TRON_API_URLS: list[str] = ["https://api.shasta.trongrid.io"]
+    # Duplicate requests slower than p95 to another endpoint
+    TRON_HEDGE_ENABLED: bool = False
+    # Consecutive failures after which endpoint is skipped for cooldown
+    TRON_CIRCUIT_BREAKER_THRESHOLD: int = 5
+    TRON_CIRCUIT_BREAKER_COOLDOWN: float = 30.0
+
+    # Upstream calls per second to every endpoint shared by all workers,
+    # 0 doesn't limit them
+    TRON_RATE_LIMIT_RPS: float = 0.0
+    # JSON object of endpoint URL to its calls per second, overrides
+    # TRON_RATE_LIMIT_RPS (e.g. for endpoints with another API key)
+    TRON_RATE_LIMIT_ENDPOINT_RPS: dict[str, float] = {}
+    # Seconds of budget spent at once after idle time
+    TRON_RATE_LIMIT_BURST_SECONDS: float = 1.0
+    # Share of burst background calls (watchlist) leave to interactive ones
+    TRON_RATE_LIMIT_RESERVED_SHARE: float = 0.2
+    # Seconds calls wait for budget before failing with 503
+    TRON_RATE_LIMIT_INTERACTIVE_MAX_WAIT: float = 2.0
+    TRON_RATE_LIMIT_BACKGROUND_MAX_WAIT: float = 30.0
+    # Tokens taken from Redis at once and spent in worker memory
+    TRON_RATE_LIMIT_LOCAL_BATCH: int = 1
+
+    # Max addresses accepted by one batch request
+    TRON_BATCH_MAX_SIZE: int = 500
+    # Max addresses fetched from TronGrid at once (two calls per address)
+    TRON_BATCH_CONCURRENCY: int = 16
+    # Seconds account info stays fresh in cache, 0 disables caching
+    TRON_ACCOUNT_CACHE_TTL: float = 3.0
+    # Max addresses kept in worker memory
+    TRON_ACCOUNT_CACHE_LOCAL_SIZE: int = 10_000
+
+    # Background refresh of watched addresses
+    TRON_WATCHLIST_ENABLED: bool = False
+    # Seconds between polls of changing and of idle addresses
+    TRON_WATCHLIST_MIN_INTERVAL: float = 5.0
+    TRON_WATCHLIST_MAX_INTERVAL: float = 300.0
+    # Upstream calls per second shared by pollers of all workers
+    TRON_WATCHLIST_MAX_RPS: int = 10
+
+    # Follow new blocks to drop cached state of addresses they touch and
+    # poll watched ones right away
+    TRON_BLOCKS_ENABLED: bool = False
+    # Seconds between checks for new blocks, TRON makes one every 3
+    TRON_BLOCKS_INTERVAL: float = 3.0
+    # Max blocks fetched by one check while catching up
+    TRON_BLOCKS_MAX_BATCH: int = 20
+    # Blocks behind after which the follower skips to the latest one
+    TRON_BLOCKS_MAX_LAG: int = 200
+    # Seconds account info stays fresh in cache while blocks are followed
+    # and REDIS_CLIENT_CACHE_ENABLED. Transactions drop it earlier, but
+    # resources also recover over time
+    TRON_BLOCKS_ACCOUNT_CACHE_TTL: float = 30.0
+
+
+def get_tron_settings() -> TronSettings:
+    return TronSettings()
\ No newline at end of file
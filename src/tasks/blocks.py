@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import uuid
+
+from redis.asyncio.client import Redis
+
+from clients.tron import AccountInfoCache, TronClient
+from clients.tron.schemas import BlockModel
+from cruds.blocks import BlockCheckpointRepository
+from cruds.watchlist import WatchlistRepository
+
+logger = logging.getLogger(__name__)
+
+# Leases missing this many polls expire, so another worker takes over
+LEASE_POLLS = 10
+
+
+class BlockFollower:
+    """Drops cached state of addresses touched by new blocks.
+
+    Tails blocks after the checkpoint up to the latest one, at most
+    `max_batch` per poll. Addresses in their transactions are deleted
+    from the account info cache and watched ones are polled right away,
+    so cached state follows chain activity. When more than `max_lag`
+    blocks behind (first run, long downtime) the follower skips to the
+    latest block, cache TTLs cover the gap.
+
+    Followers of all workers compete for a lease and only its holder
+    processes blocks.
+    """
+
+    def __init__(
+        self,
+        tron_client: TronClient,
+        redis: Redis,
+        cache: AccountInfoCache | None,
+        interval: float,
+        max_batch: int,
+        max_lag: int,
+        watchlist: bool,
+    ):
+        self._tron_client = tron_client
+        self._cache = cache
+        self._checkpoints = BlockCheckpointRepository(redis)
+        self._watchlist = WatchlistRepository(redis) if watchlist else None
+        self._interval = interval
+        self._max_batch = max_batch
+        self._max_lag = max_lag
+        self._owner = uuid.uuid4().hex
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Finish current batch and give the lease up."""
+        self._stopping.set()
+        await self._task
+        try:
+            await self._checkpoints.release_lease(self._owner)
+        except Exception:
+            logger.exception("Failed to release block follower lease")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if await self._checkpoints.acquire_lease(
+                    self._owner, self._interval * LEASE_POLLS
+                ):
+                    # Catch up without waiting while behind
+                    if await self._follow() == self._max_batch:
+                        continue
+            except Exception:
+                logger.exception("Following blocks failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except TimeoutError:
+                pass
+
+    async def _follow(self) -> int:
+        """Process blocks after checkpoint, return their number."""
+        head = await self._tron_client.get_now_block()
+        checkpoint = await self._checkpoints.get_checkpoint()
+        if checkpoint is None or head.number - checkpoint > self._max_lag:
+            if checkpoint is not None:
+                logger.warning(
+                    f"Skipping blocks {checkpoint + 1}-{head.number - 1}, "
+                    f"more than {self._max_lag} behind"
+                )
+            checkpoint = head.number - 1
+        last = min(head.number, checkpoint + self._max_batch)
+        # The latest block is already fetched
+        blocks = list(
+            await asyncio.gather(
+                *(
+                    self._tron_client.get_block_by_num(number)
+                    for number in range(
+                        checkpoint + 1, min(last + 1, head.number)
+                    )
+                )
+            )
+        )
+        if last == head.number:
+            blocks.append(head)
+        processed = 0
+        for number, block in enumerate(blocks, start=checkpoint + 1):
+            if block.number != number:
+                # Node hasn't got the block yet, retried on next poll
+                break
+            await self._apply(block)
+            await self._checkpoints.set_checkpoint(number)
+            processed += 1
+        return processed
+
+    async def _apply(self, block: BlockModel):
+        addresses = list(block.touched_addresses())
+        if not addresses:
+            return
+        if self._cache is not None:
+            await self._cache.delete(addresses)
+        if self._watchlist is not None:
+            await self._watchlist.mark_due(addresses)
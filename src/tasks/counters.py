@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from redis.asyncio.client import Redis
+
+from common.db import session_acm
+from cruds.tron_aq import TronAddressQueryRepository
+
+logger = logging.getLogger(__name__)
+
+
+class CountReconciler:
+    """Periodically checks records counter against pg_class estimates."""
+
+    def __init__(self, redis: Redis, interval: float):
+        self._redis = redis
+        self._interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        await self._task
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                async with session_acm() as session:
+                    repository = TronAddressQueryRepository(
+                        session, self._redis
+                    )
+                    if await repository.reconcile_count():
+                        logger.warning(
+                            "Records counter drifted from estimate, reset"
+                        )
+            except Exception:
+                logger.exception("Records counter reconciliation failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except TimeoutError:
+                pass
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+
+from common.db import engine
+from common.partitions import ensure_partitions
+from models.tron_address_query import TronAddressQuery
+
+logger = logging.getLogger(__name__)
+
+# Seconds between maintenance runs
+INTERVAL = 12 * 60 * 60
+PARTITIONED_TABLES = [TronAddressQuery.__tablename__]
+
+
+class PartitionMaintainer:
+    """Creates upcoming monthly partitions and drops expired ones."""
+
+    def __init__(self, months_ahead: int, retention_months: int | None):
+        self._months_ahead = months_ahead
+        self._retention_months = retention_months
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        await self._task
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                async with engine.connect() as connection:
+                    for table in PARTITIONED_TABLES:
+                        await ensure_partitions(
+                            connection,
+                            table,
+                            months_ahead=self._months_ahead,
+                            retention_months=self._retention_months,
+                        )
+            except Exception:
+                logger.exception("Partition maintenance failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), INTERVAL)
+            except TimeoutError:
+                pass
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from common.db import measure_replica_lag, replica_lag
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaLagMonitor:
+    """Measures replication lag so reads fall back to the primary in time.
+
+    Lag becomes unknown, and reads go to the primary, when the replica
+    can't be reached.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        await self._task
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            was_healthy = replica_lag.healthy
+            try:
+                replica_lag.seconds = await measure_replica_lag()
+            except Exception:
+                logger.exception("Replication lag check failed")
+                replica_lag.seconds = None
+            if was_healthy and not replica_lag.healthy:
+                logger.warning(
+                    f"Replica lag is {replica_lag.seconds}, "
+                    "reading from primary"
+                )
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except TimeoutError:
+                pass
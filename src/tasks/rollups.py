@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from redis.asyncio.client import Redis
+
+from common.db import session_acm
+from cruds.tron_address_rollup import TronAddressRollupRepository, utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class RollupRefresher:
+    """Periodically folds new address queries into hourly/daily rollups.
+
+    Refreshes back to back while catching up with a backlog, then every
+    `interval` seconds.
+    """
+
+    def __init__(self, redis: Redis, interval: float, lag: float):
+        self._redis = redis
+        self._interval = interval
+        self._lag = timedelta(seconds=lag)
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        await self._task
+
+    async def refresh(self) -> bool:
+        """Run one refresh, return whether rollups are still behind."""
+        async with session_acm() as session:
+            repository = TronAddressRollupRepository(session, self._redis)
+            watermark = await repository.refresh(self._lag)
+        return watermark is not None and utcnow() - watermark > self._lag
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                if await self.refresh():
+                    continue
+            except Exception:
+                logger.exception("Rollups refresh failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._interval)
+            except TimeoutError:
+                pass
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+
+from redis.asyncio.client import Redis
+
+from clients.tron import AccountInfoCache, TronClient, TronClientException
+from common.db import session_acm
+from cruds.tron_aq_writer import TronAddressQueryWriter
+from cruds.uow import UoW
+from cruds.watchlist import WatchlistRepository
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for due addresses when idle
+TICK = 1.0
+# Upstream calls made per address refresh
+CALLS_PER_ADDRESS = 2
+
+
+class WatchlistPoller:
+    """Keeps snapshots of watched addresses warm.
+
+    Every due address is refreshed from TronGrid, its snapshot is put to
+    the account info cache until the next poll and saved to
+    tron_address_query when changed. Changed addresses are polled every
+    `min_interval` seconds, unchanged ones back off up to `max_interval`.
+    Pollers of all workers share `max_rps` upstream calls per second.
+    """
+
+    def __init__(
+        self,
+        tron_client: TronClient,
+        redis: Redis,
+        cache: AccountInfoCache | None,
+        writer: TronAddressQueryWriter | None,
+        min_interval: float,
+        max_interval: float,
+        max_rps: int,
+        concurrency: int,
+    ):
+        self._tron_client = tron_client
+        self._redis = redis
+        self._cache = cache
+        self._writer = writer
+        self._watchlist = WatchlistRepository(redis)
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._budget_per_second = max(1, max_rps // CALLS_PER_ADDRESS)
+        self._concurrency = concurrency
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Finish current refresh and stop background task."""
+        self._stopping.set()
+        await self._task
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                addresses = await self._watchlist.claim_due(
+                    limit=self._budget_per_second,
+                    lease=self._max_interval,
+                    budget_per_second=self._budget_per_second,
+                )
+                if addresses:
+                    await self._refresh(addresses)
+                    continue
+            except Exception:
+                logger.exception("Watchlist refresh failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), TICK)
+            except TimeoutError:
+                pass
+
+    def _next_interval(self, state: dict, changed: bool) -> float:
+        if changed:
+            return self._min_interval
+        return min(state["interval"] * 2, self._max_interval)
+
+    async def _refresh(self, addresses: list[str]):
+        states = await self._watchlist.get_states(addresses)
+        new_states = {}
+        records = []
+        # Taken before fetching, so deletes racing the poll win
+        versions = (
+            await self._cache.versions(addresses)
+            if self._cache is not None
+            else {}
+        )
+        async for address, result in self._tron_client.iter_accounts_info(
+            addresses, concurrency=self._concurrency
+        ):
+            state = states.get(
+                address, {"interval": self._min_interval, "data": None}
+            )
+            if isinstance(result, TronClientException):
+                logger.warning(f"Failed to refresh {address}: {result.detail}")
+                new_states[address] = {
+                    **state,
+                    "interval": self._next_interval(state, changed=False),
+                }
+                continue
+
+            data = result.model_dump(exclude=set(["address"]))
+            changed = data != state["data"]
+            interval = self._next_interval(state, changed)
+            new_states[address] = {"interval": interval, "data": data}
+            if changed:
+                records.append((address, data))
+            if self._cache is not None:
+                # Keep snapshot alive until the next poll replaces it
+                await self._cache.set(
+                    address, result, versions[address], ttl=interval + TICK
+                )
+
+        await self._watchlist.reschedule(new_states)
+        if records:
+            async with session_acm() as session:
+                uow = UoW(session, self._redis, self._writer)
+                await uow.tron_aq.insert_records(records)
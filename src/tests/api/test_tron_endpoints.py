@@ -1,3 +1,5 @@
+import json
+from datetime import datetime
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
@@ -7,7 +9,10 @@ from pydantic import ValidationError
 
 from routers.tron import router
 from clients.tron import TronClient, TronClientException, get_tron_client
-from cruds.uow import UoW, get_uow
+from contextlib import asynccontextmanager
+from common.redis import get_redis
+from cruds.tron_aq import RecordsPage
+from cruds.uow import UoW, get_uow, get_uow_factory
 from models.tron_address_query import TronAddressQuery
 from schemas.tron import (
     TronAddressQueryRequest,
@@ -116,7 +121,7 @@ async def test_get_records_info_success():
         "page": 1,
         "size": 10
     }
-    mock_tron_aq.get_paginated.return_value = mock_response
+    mock_tron_aq.get_paginated.return_value = RecordsPage(records=[], total=0)
     
     # Test
     from routers.tron import get_records_info
@@ -127,12 +132,37 @@ async def test_get_records_info_success():
     )
     
     # Assert
-    assert response == mock_response
+    assert json.loads(response.body) == mock_response
     mock_tron_aq.get_paginated.assert_called_once_with(
+        page_size=10,
+        page_number=1,
+        exact_total=True
+    )
+    mock_tron_aq.cache_page.assert_awaited_once_with(
+        mock_tron_aq.get_paginated.return_value, response.body
+    )
+
+@pytest.mark.asyncio
+async def test_get_records_info_returns_cached_page():
+    # Setup
+    mock_tron_aq = AsyncMock()
+    mock_uow = AsyncMock(spec=UoW, spec_set=['tron_aq'])
+    mock_uow.tron_aq = mock_tron_aq
+    serialized = b'{"records":[],"total":0,"page":1,"size":10}'
+    mock_tron_aq.get_paginated.return_value = RecordsPage(serialized=serialized)
+
+    # Test
+    from routers.tron import get_records_info
+    response = await get_records_info(
+        uow=mock_uow,
         page_size=10,
         page_number=1
     )
 
+    # Assert
+    assert response.body == serialized
+    mock_tron_aq.cache_page.assert_not_called()
+
 # Integration Tests
 
 @pytest.fixture
@@ -226,7 +256,7 @@ async def test_integration_get_records_info(client, mock_uow, mock_tron_aq):
         "page": 1,
         "size": 10
     }
-    mock_tron_aq.get_paginated.return_value = mock_response
+    mock_tron_aq.get_paginated.return_value = RecordsPage(records=[], total=0)
     
     # Override dependency
     client.app.dependency_overrides[get_uow] = lambda: mock_uow
@@ -242,4 +272,266 @@ async def test_integration_get_records_info(client, mock_uow, mock_tron_aq):
     data = response.json()
     import logging
     logging.warning(f"{data}")
-    assert data == mock_response 
\ No newline at end of file
+    assert data == mock_response 
+
+@pytest.mark.asyncio
+async def test_integration_get_account_info_batch(client, mock_uow, mock_tron_aq):
+    # Setup
+    ok_address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    bad_address = "invalid_address"
+    mock_tron_client = TronClient(MagicMock())
+
+    async def mock_get_account_info(address):
+        if address == bad_address:
+            raise TronClientException(400, "Invalid TRON address")
+        return TronAddressQueryResponse(
+            address=address,
+            bandwidth_used=100,
+            bandwidth_limit=5000,
+            energy_used=200,
+            energy_limit=1000,
+            trx_balance=100.5
+        )
+
+    mock_tron_client.get_account_info = mock_get_account_info
+
+    @asynccontextmanager
+    async def uow_factory():
+        yield mock_uow
+
+    # Override dependencies
+    client.app.dependency_overrides[get_tron_client] = lambda: mock_tron_client
+    client.app.dependency_overrides[get_uow_factory] = lambda: uow_factory
+
+    # Test
+    response = client.post(
+        "/tron/account_info/batch",
+        json={"addresses": [ok_address, bad_address, ok_address]}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["address"]: line for line in lines}
+    assert len(lines) == 2
+    assert results[ok_address]["status_code"] == 200
+    assert results[ok_address]["data"]["trx_balance"] == 100.5
+    assert results[bad_address]["status_code"] == 400
+    assert results[bad_address]["detail"] == "Address must be 34 characters long"
+    mock_tron_aq.insert_records.assert_called_once()
+    records = mock_tron_aq.insert_records.call_args.args[0]
+    assert [address for address, _ in records] == [ok_address]
+
+
+@pytest.mark.asyncio
+async def test_integration_get_account_info_batch_empty(client, mock_tron_client, mock_uow):
+    # Override dependencies
+    client.app.dependency_overrides[get_tron_client] = lambda: mock_tron_client
+    client.app.dependency_overrides[get_uow_factory] = lambda: MagicMock()
+
+    # Test
+    response = client.post("/tron/account_info/batch", json={"addresses": []})
+
+    # Assert
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_integration_get_records_info_cursor(client, mock_uow, mock_tron_aq):
+    # Setup
+    record = TronAddressQuery(
+        address="TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu",
+        address_data={"trx_balance": 100.5},
+    )
+    record.created_at = datetime(2025, 5, 5, 10, 0)
+    mock_tron_aq.get_page_after.return_value = ([record], "next")
+
+    # Override dependency
+    client.app.dependency_overrides[get_uow] = lambda: mock_uow
+
+    # Test
+    response = client.get(
+        "/tron/records_info",
+        params={"page_size": 1, "cursor": ""}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] == "next"
+    assert data["records"][0]["address"] == record.address
+    mock_tron_aq.get_page_after.assert_called_once_with(
+        cursor=None,
+        page_size=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_integration_get_records_info_invalid_cursor(client, mock_uow, mock_tron_aq):
+    # Setup
+    mock_tron_aq.get_page_after.side_effect = ValueError("Invalid cursor")
+
+    # Override dependency
+    client.app.dependency_overrides[get_uow] = lambda: mock_uow
+
+    # Test
+    response = client.get("/tron/records_info", params={"cursor": "bad"})
+
+    # Assert
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_integration_get_address_history(client, mock_uow, mock_tron_aq):
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    mock_tron_aq.get_history.return_value = ([], None)
+
+    # Override dependency
+    client.app.dependency_overrides[get_uow] = lambda: mock_uow
+
+    # Test
+    response = client.get(
+        f"/tron/addresses/{address}/history",
+        params={"until": "2025-05-31T03:00:00+03:00", "page_size": 10}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"records": [], "next_cursor": None}
+    mock_tron_aq.get_history.assert_called_once_with(
+        address,
+        since=datetime(2025, 5, 1),
+        until=datetime(2025, 5, 31),
+        cursor=None,
+        page_size=10
+    )
+
+
+@pytest.mark.asyncio
+async def test_integration_get_address_history_invalid_address(client, mock_uow):
+    # Override dependency
+    client.app.dependency_overrides[get_uow] = lambda: mock_uow
+
+    # Test
+    response = client.get("/tron/addresses/invalid_address/history")
+
+    # Assert
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_integration_get_address_metrics(client, mock_uow, mock_tron_aq):
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    bucket = {
+        "bucket": datetime(2025, 5, 1),
+        "samples": 3,
+        "min": 1.0,
+        "max": 3.0,
+        "avg": 2.0,
+        "last": 3.0,
+    }
+    mock_tron_aq.get_metric_buckets.return_value = [bucket]
+
+    # Override dependency
+    client.app.dependency_overrides[get_uow] = lambda: mock_uow
+
+    # Test
+    response = client.get(
+        f"/tron/addresses/{address}/metrics",
+        params={"metric": "trx_balance", "bucket": "day"}
+    )
+    invalid_metric_response = client.get(
+        f"/tron/addresses/{address}/metrics",
+        params={"metric": "address"}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == [{**bucket, "bucket": "2025-05-01T00:00:00"}]
+    assert mock_tron_aq.get_metric_buckets.call_args.kwargs["bucket"] == "day"
+    assert invalid_metric_response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_integration_export_records(client, mock_uow, mock_tron_aq):
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    row = MagicMock()
+    row.id = "5d0c0f3e-4bd5-4a43-b6a8-c2c4f9b8c5a1"
+    row.created_at = datetime(2025, 5, 5, 10, 0)
+    row.address = address
+    row.__getitem__ = lambda self, item: (
+        row.id, row.created_at, address, 1, 2, 3, 4, 5.5
+    )[item]
+
+    def mock_iter_export(**kwargs):
+        async def batches():
+            yield [row, row]
+            yield [row]
+        return batches()
+
+    mock_tron_aq.iter_export = MagicMock(side_effect=mock_iter_export)
+
+    @asynccontextmanager
+    async def uow_factory():
+        yield mock_uow
+
+    # Override dependency
+    client.app.dependency_overrides[get_uow_factory] = lambda: uow_factory
+
+    # Test
+    ndjson = client.get(
+        "/tron/records_info/export", params={"address": address}
+    )
+    csv = client.get("/tron/records_info/export", params={"format": "csv"})
+
+    # Assert
+    assert ndjson.status_code == 200
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert len(lines) == 3
+    assert lines[0]["created_at"] == "2025-05-05T10:00:00"
+    assert lines[0]["trx_balance"] == 5.5
+    assert mock_tron_aq.iter_export.call_args_list[0].kwargs["address"] == address
+    assert csv.status_code == 200
+    assert csv.headers["content-type"].startswith("text/csv")
+    csv_lines = csv.text.splitlines()
+    assert csv_lines[0].startswith("id,created_at,address,bandwidth_used")
+    assert len(csv_lines) == 4
+
+
+@pytest.mark.asyncio
+async def test_integration_export_records_closes_session(client):
+    # Setup
+    row = MagicMock()
+    row.id = "5d0c0f3e-4bd5-4a43-b6a8-c2c4f9b8c5a1"
+    row.created_at = datetime(2025, 5, 5, 10, 0)
+    row.address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    row.__getitem__ = lambda self, item: (
+        row.id, row.created_at, row.address, 1, 2, 3, 4, 5.5
+    )[item]
+
+    async def partitions():
+        yield [row]
+
+    result = MagicMock()
+    result.partitions = partitions
+    mock_session = AsyncMock()
+    mock_session.stream.return_value = result
+    mock_session_maker = MagicMock(return_value=mock_session)
+
+    client.app.dependency_overrides[get_redis] = lambda: MagicMock()
+
+    # Test
+    with patch("cruds.uow.async_session_maker", mock_session_maker), patch(
+        "cruds.uow.get_read_session_maker", return_value=mock_session_maker
+    ):
+        response = client.get("/tron/records_info/export")
+
+    # Assert
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 1
+    # Session opened while streaming the body is closed after it
+    mock_session.stream.assert_awaited_once()
+    mock_session.aclose.assert_awaited_once()
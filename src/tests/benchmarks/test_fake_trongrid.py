@@ -0,0 +1,59 @@
+import httpx
+import pytest
+
+from benchmarks.fake_trongrid import create_fake_trongrid
+from clients.tron import TronClient
+
+ADDRESS = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+
+
+def make_client(**kwargs):
+    app = create_fake_trongrid(latency=0, jitter=0, seed=0, **kwargs)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://fake"
+    )
+
+
+@pytest.mark.asyncio
+async def test_fake_trongrid_answers_stable_per_address():
+    # Setup
+    client = make_client()
+
+    # Test
+    first = await client.post("/wallet/getaccount", json={"address": ADDRESS})
+    second = await client.post("/wallet/getaccount", json={"address": ADDRESS})
+    other = await client.post("/wallet/getaccount", json={"address": "T"})
+
+    # Assert
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert first.json() != other.json()
+
+
+@pytest.mark.asyncio
+async def test_fake_trongrid_fails_share_of_requests():
+    # Setup
+    client = make_client(error_rate=1.0)
+
+    # Test
+    response = await client.post(
+        "/wallet/getaccountresource", json={"address": ADDRESS}
+    )
+
+    # Assert
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_tron_client_reads_fake_trongrid():
+    # Setup
+    tron_client = TronClient(make_client(), base_url="http://fake")
+
+    # Test
+    info = await tron_client.get_account_info(ADDRESS)
+
+    # Assert
+    assert info.address == ADDRESS
+    assert info.bandwidth_limit == 600
+    assert info.energy_limit == 50_000
+    assert info.trx_balance >= 0
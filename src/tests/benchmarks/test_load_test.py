@@ -0,0 +1,98 @@
+import json
+from datetime import UTC, datetime
+
+import pytest
+
+from benchmarks.load_test import (
+    Scenario,
+    compare,
+    make_addresses,
+    percentile,
+    save_report,
+    summarize,
+)
+from common.tron_address import is_valid_address
+
+
+@pytest.mark.parametrize(
+    "percent, expected",
+    [(0, 1), (50, 5), (90, 9), (99, 10), (100, 10)],
+)
+def test_percentile_nearest_rank(percent, expected):
+    assert percentile(list(range(1, 11)), percent) == expected
+
+
+def test_percentile_of_nothing():
+    assert percentile([], 99) == 0.0
+
+
+def test_summarize_latencies():
+    # Test
+    summary = summarize([0.3, 0.1, 0.2], errors=1, duration=2.0)
+
+    # Assert
+    assert summary == {
+        "requests": 3,
+        "errors": 1,
+        "rps": 1.5,
+        "p50_ms": 200.0,
+        "p95_ms": 300.0,
+        "p99_ms": 300.0,
+        "max_ms": 300.0,
+    }
+
+
+def test_summarize_without_requests():
+    summary = summarize([], errors=0, duration=1.0)
+
+    assert summary["requests"] == 0
+    assert summary["max_ms"] == 0.0
+
+
+def test_scenario_is_abstract():
+    with pytest.raises(TypeError):
+        Scenario("total", 1)
+
+
+def test_make_addresses_deterministic_and_valid():
+    addresses = make_addresses(5, seed=1)
+
+    assert addresses == make_addresses(5, seed=1)
+    assert len(set(addresses)) == 5
+    assert all(is_valid_address(address) for address in addresses)
+
+
+def test_save_report_names_file_by_start(tmp_path):
+    # Setup
+    report = {"scenarios": {"total": {"rps": 1.0}}}
+
+    # Test
+    path = save_report(
+        report, tmp_path / "results", datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC)
+    )
+
+    # Assert
+    assert path == tmp_path / "results" / "20260102T030405.json"
+    assert json.loads(path.read_text()) == report
+
+
+def test_compare_prints_relative_changes(capsys):
+    # Setup
+    metrics = {"rps": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 0.0}
+    baseline = {"started_at": "then", "scenarios": {"total": metrics}}
+    report = {
+        "scenarios": {
+            "total": {**metrics, "rps": 150.0, "p50_ms": 5.0},
+            "new": metrics,
+        }
+    }
+
+    # Test
+    compare(report, baseline)
+
+    # Assert
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [
+        "Compared to then:",
+        "  total          rps +50.0%, p50_ms -50.0%, p95_ms +0.0%",
+    ]
@@ -0,0 +1,408 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from clients.tron import (
+    AccountInfoCache,
+    EndpointPool,
+    Priority,
+    RateLimiter,
+    TronClient,
+    TronClientException,
+)
+from clients.tron.pool import MIN_SAMPLES_TO_HEDGE
+from clients.tron.schemas import AccountInfoModel
+
+
+def make_account_info(address):
+    return AccountInfoModel(
+        address=address,
+        bandwidth_used=0,
+        bandwidth_limit=0,
+        energy_used=0,
+        energy_limit=0,
+        trx_balance=0,
+    )
+
+
+def make_cache_redis(raw=None, version=None):
+    """Redis of AccountInfoCache, its set script returns 1 if stored."""
+    redis = AsyncMock()
+    redis.mget.return_value = [raw, version]
+    set_script, delete_script = AsyncMock(return_value=1), AsyncMock()
+    redis.register_script = MagicMock(side_effect=[set_script, delete_script])
+    return redis, set_script, delete_script
+
+
+@pytest.mark.asyncio
+async def test_iter_accounts_info_bounded_concurrency():
+    # Setup
+    client = TronClient(MagicMock())
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_get_account_info(address):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if address == "bad":
+            raise TronClientException(400, "Invalid TRON address")
+        return make_account_info(address)
+
+    client.get_account_info = mock_get_account_info
+    addresses = [f"address_{i}" for i in range(20)] + ["bad", "address_0"]
+
+    # Test
+    results = [
+        item
+        async for item in client.iter_accounts_info(addresses, concurrency=4)
+    ]
+
+    # Assert
+    assert max_in_flight == 4
+    assert len(results) == 21
+    errors = [r for _, r in results if isinstance(r, TronClientException)]
+    assert len(errors) == 1
+    assert {address for address, _ in results} == set(addresses)
+
+
+@pytest.mark.asyncio
+async def test_account_info_cache_coalesces_concurrent_fetches():
+    # Setup
+    redis, set_script, _ = make_cache_redis()
+    cache = AccountInfoCache(redis, ttl=60, max_local_size=10)
+    client = TronClient(MagicMock(), cache=cache)
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    fetch_calls = 0
+
+    async def mock_fetch_account_info(address):
+        nonlocal fetch_calls
+        fetch_calls += 1
+        await asyncio.sleep(0.01)
+        return make_account_info(address)
+
+    client._fetch_account_info = mock_fetch_account_info
+
+    # Test
+    results = await asyncio.gather(
+        *(client.get_account_info(address) for _ in range(5))
+    )
+    cached = await client.get_account_info(address)
+
+    # Assert
+    assert fetch_calls == 1
+    assert all(result == cached for result in results)
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 4
+    assert cache.stats.hits == 1
+    set_script.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_account_info_cache_reads_redis_tier():
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    redis, _, _ = make_cache_redis(
+        json.dumps(
+            {
+                "expires_at": time.time() + 60,
+                "data": make_account_info(address).model_dump(),
+            }
+        )
+    )
+    cache = AccountInfoCache(redis, ttl=60, max_local_size=10)
+    fetch = AsyncMock()
+
+    # Test
+    info = await cache.get_or_fetch(address, fetch)
+
+    # Assert
+    assert info == make_account_info(address)
+    assert cache.stats.redis_hits == 1
+    fetch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_account_info_cache_bypasses_memory_tier_when_disabled():
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    redis, _, _ = make_cache_redis()
+    cache = AccountInfoCache(redis, ttl=60, max_local_size=10)
+    fetch = AsyncMock(return_value=make_account_info(address))
+    await cache.get_or_fetch(address, fetch)
+
+    # Test
+    cache.disable()
+    await cache.get_or_fetch(address, fetch)
+    cache.enable()
+    await cache.get_or_fetch(address, fetch)
+    await cache.get_or_fetch(address, fetch)
+
+    # Assert
+    assert fetch.await_count == 3
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_account_info_cache_skips_info_fetched_before_delete():
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    redis, set_script, delete_script = make_cache_redis(version=b"3")
+    # Version moved on while fetching
+    set_script.return_value = 0
+    cache = AccountInfoCache(redis, ttl=60, max_local_size=10)
+
+    async def fetch(address):
+        await cache.delete([address])
+        return make_account_info(address)
+
+    # Test
+    await cache.get_or_fetch(address, fetch)
+    await cache.get_or_fetch(address, fetch)
+
+    # Assert
+    assert cache.stats.misses == 2
+    assert cache.stats.hits == 0
+    assert set_script.call_args.kwargs["keys"] == [
+        f"tron_account_info:{address}",
+        f"tron_account_info_version:{address}",
+    ]
+    assert set_script.call_args.kwargs["args"][0] == 3
+    assert delete_script.call_args.kwargs["keys"] == [
+        f"tron_account_info:{address}",
+        f"tron_account_info_version:{address}",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_account_info_cache_skips_redis_hit_invalidated_while_read():
+    # Setup
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+    redis, _, _ = make_cache_redis()
+    cache = AccountInfoCache(redis, ttl=60, max_local_size=10)
+    raw = json.dumps(
+        {
+            "expires_at": time.time() + 60,
+            "data": make_account_info(address).model_dump(),
+        }
+    )
+
+    async def mget(*keys):
+        # Another worker deletes the info after it was read
+        cache.invalidate([f"tron_account_info:{address}"])
+        return [raw, None]
+
+    redis.mget.side_effect = mget
+    fetch = AsyncMock()
+
+    # Test
+    await cache.get_or_fetch(address, fetch)
+    await cache.get_or_fetch(address, fetch)
+
+    # Assert
+    assert cache.stats.redis_hits == 2
+    assert cache.stats.hits == 0
+    fetch.assert_not_called()
+
+
+def make_stub_nodes(behaviours):
+    """httpx transport emulating nodes, maps host to (delay, status)."""
+    calls = []
+
+    async def handler(request):
+        delay, status = behaviours[request.url.host]
+        calls.append(request.url.host)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"balance": 1_000_000})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+@pytest.mark.asyncio
+async def test_pool_fails_over_to_healthy_endpoint():
+    # Setup
+    httpx_client, calls = make_stub_nodes(
+        {"down.node": (0, 503), "up.node": (0, 200)}
+    )
+    pool = EndpointPool(
+        ["http://down.node", "http://up.node"], failure_threshold=2
+    )
+    client = TronClient(httpx_client, pool=pool)
+    address = "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"
+
+    # Test
+    for _ in range(4):
+        account = await client.get_account(address)
+
+    # Assert
+    assert account.balance == 1_000_000
+    assert calls.count("down.node") == 1
+    assert calls.count("up.node") == 4
+    down, up = pool.endpoints
+    assert down.consecutive_failures == 1
+    assert up.latency_ewma is not None
+
+
+@pytest.mark.asyncio
+async def test_pool_circuit_breaker_skips_failing_endpoint():
+    # Setup
+    pool = EndpointPool(["http://a.node", "http://b.node"], failure_threshold=2)
+    a, b = pool.endpoints
+    pool.record_success(b, 0.5)
+
+    # Test
+    pool.record_failure(a)
+    chosen_before_open = pool.choose()
+    pool.record_failure(a)
+    chosen_after_open = pool.choose()
+
+    # Assert
+    assert chosen_before_open is a
+    assert chosen_after_open is b
+    assert pool.choose(exclude={b}) is a
+
+
+@pytest.mark.asyncio
+async def test_pool_hedges_slow_request():
+    # Setup
+    httpx_client, calls = make_stub_nodes(
+        {"slow.node": (1, 200), "fast.node": (0, 200)}
+    )
+    pool = EndpointPool(["http://slow.node", "http://fast.node"], hedge=True)
+    slow, fast = pool.endpoints
+    for _ in range(MIN_SAMPLES_TO_HEDGE):
+        pool.record_success(slow, 0.01)
+    pool.record_success(fast, 0.02)
+    client = TronClient(httpx_client, pool=pool)
+
+    # Test
+    started_at = time.monotonic()
+    await client.get_account("TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu")
+
+    # Assert
+    assert time.monotonic() - started_at < 0.5
+    assert calls == ["slow.node", "fast.node"]
+
+
+def make_limiter(acquire_script, **kwargs):
+    redis = AsyncMock()
+    redis.register_script = MagicMock(side_effect=[acquire_script, AsyncMock()])
+    return RateLimiter(redis, rate=10, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_serves_interactive_calls_first():
+    # Setup
+    acquire_script = AsyncMock(return_value=[1, b"0"])
+    limiter = make_limiter(acquire_script, reserved_share=0.5)
+    served = []
+
+    async def call(name, priority):
+        await limiter.acquire("http://a.node", priority)
+        served.append(name)
+
+    # Test
+    await asyncio.gather(
+        call("background", Priority.BACKGROUND),
+        call("interactive", Priority.INTERACTIVE),
+    )
+
+    # Assert
+    assert served == ["interactive", "background"]
+    reserved = [c.kwargs["args"][3] for c in acquire_script.await_args_list]
+    assert reserved == [0, 5]
+    assert acquire_script.call_args.kwargs["keys"] == [
+        "tron_rate_limit:http://a.node"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_fails_after_max_wait():
+    # Setup
+    acquire_script = AsyncMock(return_value=[0, b"0.02"])
+    limiter = make_limiter(
+        acquire_script, max_wait={Priority.INTERACTIVE: 0.1}
+    )
+    httpx_client, calls = make_stub_nodes({"a.node": (0, 200)})
+    client = TronClient(
+        httpx_client, pool=EndpointPool(["http://a.node"]), limiter=limiter
+    )
+
+    # Test
+    with pytest.raises(TronClientException) as error:
+        await client.get_account_info("TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu")
+
+    # Assert
+    assert error.value.status_code == 503
+    assert calls == []
+    assert acquire_script.await_count > 1
+
+
+@pytest.mark.asyncio
+async def test_pool_hedges_only_with_budget_available():
+    # Setup
+    acquire_script = AsyncMock(side_effect=[[1, b"0"], [0, b"1"]])
+    limiter = make_limiter(acquire_script)
+    httpx_client, calls = make_stub_nodes(
+        {"slow.node": (0.3, 200), "fast.node": (0, 200)}
+    )
+    pool = EndpointPool(["http://slow.node", "http://fast.node"], hedge=True)
+    slow, fast = pool.endpoints
+    for _ in range(MIN_SAMPLES_TO_HEDGE):
+        pool.record_success(slow, 0.01)
+    pool.record_success(fast, 0.02)
+    client = TronClient(httpx_client, pool=pool, limiter=limiter)
+
+    # Test
+    await client.get_account("TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu")
+
+    # Assert
+    assert calls == ["slow.node"]
+    assert [c.kwargs["keys"] for c in acquire_script.await_args_list] == [
+        ["tron_rate_limit:http://slow.node"],
+        ["tron_rate_limit:http://fast.node"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_client_retries_through_rate_limiter():
+    # Setup
+    acquire_script = AsyncMock(return_value=[1, b"0"])
+    limiter = make_limiter(acquire_script)
+    statuses = [503, 200]
+
+    async def handler(request):
+        return httpx.Response(statuses.pop(0), json={"balance": 1_000_000})
+
+    httpx_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pool = EndpointPool(["http://a.node"])
+    client = TronClient(httpx_client, pool=pool, limiter=limiter, retries=1)
+
+    # Test
+    account = await client.get_account("TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu")
+
+    # Assert
+    assert account.balance == 1_000_000
+    # Every attempt took a token
+    assert acquire_script.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_does_not_limit_without_redis():
+    # Setup
+    acquire_script = AsyncMock(side_effect=RedisConnectionError())
+    limiter = make_limiter(acquire_script)
+
+    # Test
+    await limiter.acquire("http://a.node", Priority.BACKGROUND)
+
+    # Assert
+    acquire_script.assert_awaited_once()
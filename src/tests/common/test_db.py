@@ -0,0 +1,55 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from common import db
+from common.db import LazySession, ReplicaLag, get_read_session_maker
+
+
+@pytest.mark.parametrize(
+    "seconds, healthy", [(None, False), (0.0, True), (5.0, True), (5.1, False)]
+)
+def test_replica_lag_healthy(seconds, healthy):
+    lag = ReplicaLag(max_lag=5.0)
+    lag.seconds = seconds
+
+    assert lag.healthy is healthy
+
+
+def test_reads_go_to_replica_until_it_lags():
+    # Setup
+    replica_session_maker = MagicMock()
+    lag = ReplicaLag(max_lag=5.0)
+
+    with patch.object(db, "replica_session_maker", replica_session_maker), \
+            patch.object(db, "replica_lag", lag):
+        # Test and Assert
+        lag.seconds = 1.0
+        assert get_read_session_maker() is replica_session_maker
+        lag.seconds = 30.0
+        assert get_read_session_maker() is db.async_session_maker
+
+
+def test_reads_go_to_primary_without_replica():
+    assert db.replica_session_maker is None
+    assert get_read_session_maker() is db.async_session_maker
+
+
+@pytest.mark.asyncio
+async def test_lazy_session_is_created_on_first_use():
+    # Setup
+    session = MagicMock()
+    session.aclose = AsyncMock()
+    session_maker = MagicMock(return_value=session)
+    lazy = LazySession(session_maker)
+
+    # Test and Assert
+    await lazy.aclose()
+    session_maker.assert_not_called()
+    assert not lazy.started
+
+    lazy.add("instance")
+    lazy.add("instance")
+    session_maker.assert_called_once_with()
+    assert session.add.call_count == 2
+    await lazy.aclose()
+    session.aclose.assert_awaited_once()
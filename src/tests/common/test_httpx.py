@@ -0,0 +1,96 @@
+import httpx
+import pytest
+
+from common.httpx import (
+    RetryTransport,
+    create_httpx_transport,
+)
+from settings.httpx import HttpxSettings
+
+
+def make_client(statuses):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    transport = RetryTransport(
+        httpx.MockTransport(handler), retries=2, backoff=0
+    )
+    return httpx.AsyncClient(transport=transport), transport, calls
+
+
+@pytest.mark.asyncio
+async def test_retry_transport_retries_idempotent_requests():
+    # Setup
+    client, transport, calls = make_client([503, 502, 200])
+
+    # Test
+    response = await client.post(
+        "http://node/wallet/getaccount", extensions={"idempotent": True}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert transport.stats.requests == 3
+    assert transport.stats.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_transport_gives_up_after_retries():
+    # Setup
+    client, transport, calls = make_client([503])
+
+    # Test
+    response = await client.get("http://node/")
+
+    # Assert
+    assert response.status_code == 503
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_transport_skips_non_idempotent_requests():
+    # Setup
+    client, transport, calls = make_client([503, 200])
+
+    # Test
+    response = await client.post("http://node/wallet/broadcast")
+
+    # Assert
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+
+def test_pool_connections_of_httpcore_pool():
+    transport = RetryTransport(
+        httpx.AsyncHTTPTransport(), retries=0, backoff=0
+    )
+
+    assert transport.get_pool_connections() == [
+        (("httpx", "in_use"), 0),
+        (("httpx", "idle"), 0),
+    ]
+
+
+def test_pool_connections_without_httpcore_pool():
+    transport = RetryTransport(
+        httpx.MockTransport(lambda request: httpx.Response(200)),
+        retries=0,
+        backoff=0,
+    )
+
+    assert transport.get_pool_connections() == []
+
+
+def test_create_httpx_transport_with_http2():
+    # Setup
+    settings = HttpxSettings(HTTPX_HTTP2=True)
+
+    # Test
+    transport = create_httpx_transport(settings)
+
+    # Assert
+    assert transport._transport._pool._http2
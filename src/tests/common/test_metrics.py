@@ -0,0 +1,145 @@
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    HTTP_REQUEST_DURATION,
+    Registry,
+    SharedMetrics,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    # Setup
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+    # Test
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(5, "/a")
+
+    # Assert
+    assert histogram.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.15',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_and_gauge_samples():
+    # Setup
+    counter = Counter("hits_total", "Hits", ("cache", "result"))
+    gauge = Gauge("connections", "Connections", ("pool",))
+    gauge.collect(lambda: [(("db",), 3)])
+
+    # Test
+    counter.inc("pages", "hit")
+    counter.inc("pages", "hit", amount=2)
+
+    # Assert
+    assert list(counter.samples()) == ['hits_total{cache="pages",result="hit"} 3']
+    assert list(gauge.samples()) == ['connections{pool="db"} 3']
+
+
+def test_middleware_labels_requests_by_route_template():
+    # Setup
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {}
+
+    client = TestClient(app)
+
+    # Test
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    # Assert
+    samples = "\n".join(HTTP_REQUEST_DURATION.samples())
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in samples
+    assert 'route="unmatched",status="404"' in samples
+
+
+def test_registry_sums_dumps_of_other_workers():
+    # Setup
+    registry = Registry()
+    counter = registry.register(Counter("hits_total", "Hits", ("cache",)))
+    histogram = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1,)))
+    counter.inc("pages", amount=2)
+    histogram.observe(0.05)
+    other = Registry()
+    other_counter = other.register(Counter("hits_total", "Hits", ("cache",)))
+    other_histogram = other.register(Histogram("latency_seconds", "Latency", buckets=(0.1,)))
+    other_counter.inc("pages", amount=3)
+    other_counter.inc("accounts")
+    other_histogram.observe(1)
+
+    # Test
+    rendered = registry.render([json.loads(json.dumps(other.dump()))])
+
+    # Assert
+    lines = rendered.splitlines()
+    assert 'hits_total{cache="pages"} 5' in lines
+    assert 'hits_total{cache="accounts"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_count 2' in lines
+
+
+@pytest.mark.asyncio
+async def test_shared_metrics_render_totals_of_workers(tmp_path):
+    # Setup
+    registry = Registry()
+    counter = registry.register(Counter("hits_total", "Hits"))
+    gauge = registry.register(Gauge("connections", "Connections"))
+    gauge.collect(lambda: [((), 2)])
+    counter.inc(amount=2)
+    (tmp_path / "1.json").write_text(
+        json.dumps({"hits_total": [[[], 3]], "connections": [[[], 4]]})
+    )
+    shared = SharedMetrics(registry, str(tmp_path), interval=60)
+
+    # Test
+    await shared.start()
+    rendered = shared.render().splitlines()
+    await shared.stop()
+
+    # Assert
+    assert "hits_total 5" in rendered
+    assert "connections 6" in rendered
+    # Exited worker keeps its counters, not gauges of closed pools
+    own_dump = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert own_dump == {"hits_total": [[[], 2]]}
+
+
+def test_shared_metrics_ignore_gauges_of_stale_dumps(tmp_path):
+    # Setup
+    registry = Registry()
+    registry.register(Counter("hits_total", "Hits"))
+    registry.register(Gauge("connections", "Connections"))
+    path = tmp_path / "1.json"
+    path.write_text(
+        json.dumps({"hits_total": [[[], 3]], "connections": [[[], 4]]})
+    )
+    os.utime(path, (0, 0))
+    shared = SharedMetrics(registry, str(tmp_path), interval=5)
+
+    # Test
+    rendered = shared.render().splitlines()
+
+    # Assert
+    assert "hits_total 3" in rendered
+    assert "connections 4" not in rendered
@@ -0,0 +1,71 @@
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from common.partitions import (
+    add_months,
+    create_partition_sql,
+    ensure_partitions,
+    month_start,
+    partition_name,
+)
+
+
+def test_add_months():
+    assert add_months(date(2025, 11, 1), 1) == date(2025, 12, 1)
+    assert add_months(date(2025, 12, 1), 1) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert add_months(date(2025, 5, 1), -17) == date(2023, 12, 1)
+
+
+def test_create_partition_sql():
+    # Setup
+    month = month_start(datetime(2025, 12, 24, 6, 30))
+
+    # Assert
+    assert partition_name("tron_address_query", month) == (
+        "tron_address_query_y2025m12"
+    )
+    assert create_partition_sql("tron_address_query", month) == (
+        "CREATE TABLE IF NOT EXISTS tron_address_query_y2025m12 "
+        "PARTITION OF tron_address_query "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_moves_rows_out_of_default_partition():
+    # Setup
+    connection = AsyncMock()
+
+    @asynccontextmanager
+    async def begin():
+        yield
+
+    connection.begin = begin
+    # Default partition exists
+    connection.scalar.return_value = True
+    connection.scalars.side_effect = [
+        MagicMock(all=MagicMock(return_value=[datetime(2020, 3, 1)])),
+        ["id", "created_at"],
+    ]
+    connection.execute.return_value = MagicMock(rowcount=2)
+
+    # Test
+    await ensure_partitions(connection, "tron_address_query", months_ahead=0)
+
+    # Assert
+    statements = [str(call.args[0]) for call in connection.execute.await_args_list]
+    assert statements[1:5] == [
+        "ALTER TABLE tron_address_query DETACH PARTITION tron_address_query_default",
+        create_partition_sql("tron_address_query", date(2020, 3, 1)),
+        "WITH moved AS (DELETE FROM tron_address_query_default "
+        "WHERE created_at >= :start AND created_at < :end "
+        "RETURNING id, created_at) "
+        "INSERT INTO tron_address_query (id, created_at) "
+        "SELECT id, created_at FROM moved",
+        "ALTER TABLE tron_address_query ATTACH PARTITION tron_address_query_default DEFAULT",
+    ]
+    assert statements[5].startswith("CREATE TABLE IF NOT EXISTS")
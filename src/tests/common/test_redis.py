@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock, patch
+
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.client import Redis
+
+from common import redis as redis_module
+from common.redis import get_pool_connections
+
+
+def test_pool_connections_of_redis_pool():
+    # Setup
+    pool = BlockingConnectionPool.from_url("redis://localhost")
+    pool._available_connections.append(MagicMock())
+
+    # Test
+    with patch.object(redis_module, "redis", Redis(connection_pool=pool)):
+        samples = get_pool_connections()
+
+    # Assert
+    assert samples == [(("redis", "in_use"), 0), (("redis", "idle"), 1)]
+
+
+def test_pool_connections_without_pool_internals():
+    with patch.object(redis_module, "redis", MagicMock(connection_pool=object())):
+        assert get_pool_connections() == []
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from common.redis_cache import (
+    INVALIDATION_CHANNEL,
+    InvalidationTracker,
+    TrackedCache,
+)
+
+
+@pytest.fixture
+def cache():
+    cache = TrackedCache(["pages"], max_size=2, ttl=60)
+    cache.enable()
+    return cache
+
+
+def test_invalidation_drops_all_fields_of_key(cache):
+    cache.set("pages", b"first", cache.token(), field="1")
+    cache.set("pages", b"second", cache.token(), field="2")
+
+    cache.invalidate(["pages"])
+
+    assert cache.get("pages", "1") is None
+    assert cache.get("pages", "2") is None
+
+
+def test_value_read_before_invalidation_is_not_stored(cache):
+    token = cache.token()
+    cache.invalidate(["pages"])
+
+    cache.set("pages", b"stale", token, field="1")
+
+    assert cache.get("pages", "1") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.set("pages", b"first", cache.token(), field="1")
+    cache.set("pages", b"second", cache.token(), field="2")
+    cache.get("pages", "1")
+
+    cache.set("pages", b"third", cache.token(), field="3")
+
+    assert cache.get("pages", "1") == b"first"
+    assert cache.get("pages", "2") is None
+
+
+def test_disabled_cache_serves_nothing(cache):
+    cache.set("pages", b"first", cache.token(), field="1")
+
+    cache.disable()
+
+    assert cache.get("pages", "1") is None
+
+
+@pytest.mark.asyncio
+async def test_tracker_feeds_invalidations_until_disconnect(cache):
+    # Setup
+    connection = AsyncMock()
+    connection.read_response.side_effect = [
+        42,
+        b"OK",
+        [b"subscribe", INVALIDATION_CHANNEL, 1],
+        [b"message", INVALIDATION_CHANNEL, [b"pages"]],
+        ConnectionError(),
+    ]
+    tracker = InvalidationTracker(MagicMock(), [cache], ping_interval=10)
+    cache.set("pages", b"first", cache.token(), field="1")
+    cache.invalidate = MagicMock(wraps=cache.invalidate)
+
+    # Test
+    with pytest.raises(ConnectionError):
+        await tracker._track(connection)
+
+    # Assert
+    connection.send_command.assert_any_await(
+        "CLIENT", "TRACKING", "ON", "REDIRECT", 42, "BCAST", "PREFIX", "pages"
+    )
+    cache.invalidate.assert_called_with(["pages"])
+    assert cache.get("pages", "1") is None
@@ -0,0 +1,61 @@
+import pytest
+from base58 import b58decode_check
+
+from common.tron_address import (
+    InvalidTronAddress,
+    decode_address,
+    decode_addresses,
+    encode_address,
+    is_valid_address,
+    validate_address,
+)
+
+VALID_ADDRESSES = [
+    "TNMcQVGPzqH9ZfMCSY4PNrukevtDgp24dK",
+    "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu",
+]
+
+
+@pytest.mark.parametrize("address", VALID_ADDRESSES)
+def test_decode_address_matches_base58check(address):
+    assert decode_address(address) == b58decode_check(address)
+    assert validate_address(address) == address
+    assert is_valid_address(address)
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        None,
+        123,
+        "invalid_address",
+        "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7n",  # Too short
+        "ARfffNywtDL6wEamxg8V46LJfyR8Fvy7nu",  # Wrong prefix
+        "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nv",  # Wrong checksum
+        "TRfffNywtDL6wEamxg8V46LJfyR8Fvy70u",  # Not base58 character
+        "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nж",  # Not ASCII
+    ],
+)
+def test_invalid_addresses(address):
+    assert not is_valid_address(address)
+    with pytest.raises(InvalidTronAddress):
+        validate_address(address)
+
+
+def test_decode_addresses():
+    # Test
+    decoded = decode_addresses(VALID_ADDRESSES + ["invalid_address"])
+
+    # Assert
+    assert decoded[VALID_ADDRESSES[0]] == b58decode_check(VALID_ADDRESSES[0])
+    assert isinstance(decoded["invalid_address"], InvalidTronAddress)
+
+
+@pytest.mark.parametrize("address", VALID_ADDRESSES)
+def test_encode_address_roundtrip(address):
+    assert encode_address(decode_address(address)) == address
+
+
+def test_encode_address_invalid_length():
+    with pytest.raises(InvalidTronAddress):
+        encode_address(b"\x41" * 20)
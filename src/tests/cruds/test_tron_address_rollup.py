@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.dialects import postgresql
+
+from cruds.tron_address_rollup import MAX_WINDOW, TronAddressRollupRepository
+
+NOW = datetime(2025, 6, 2, 16, 27, 48)
+
+
+@pytest.fixture
+def repo():
+    repo = TronAddressRollupRepository(AsyncMock(), AsyncMock())
+    repo.session.scalar.return_value = True
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_refresh_recomputes_buckets_after_watermark(repo):
+    # Setup
+    repo.redis.get.return_value = b"2025-06-02T16:20:00"
+    repo._upsert_hours_stmt = lambda start, end: ("hours", start, end)
+    repo._upsert_days_stmt = lambda start, end: ("days", start, end)
+
+    # Test
+    with patch("cruds.tron_address_rollup.utcnow", return_value=NOW):
+        watermark = await repo.refresh(lag=timedelta(minutes=5))
+
+    # Assert
+    assert watermark == NOW
+    repo.session.execute.assert_any_await(
+        ("hours", datetime(2025, 6, 2, 16), NOW)
+    )
+    repo.session.execute.assert_any_await(
+        ("days", datetime(2025, 6, 2), NOW)
+    )
+    repo.session.commit.assert_awaited_once()
+    repo.redis.set.assert_awaited_once_with(
+        repo._get_watermark_key(), NOW.isoformat()
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_catches_up_in_windows(repo):
+    # Setup
+    repo.redis.get.return_value = None
+    repo.session.scalar.side_effect = [datetime(2025, 5, 1, 10, 15), True]
+
+    # Test
+    with patch("cruds.tron_address_rollup.utcnow", return_value=NOW):
+        watermark = await repo.refresh(lag=timedelta(minutes=5))
+
+    # Assert
+    assert watermark == datetime(2025, 5, 1, 10) + MAX_WINDOW
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_when_locked_by_another_worker(repo):
+    # Setup
+    repo.redis.get.return_value = b"2025-06-02T16:20:00"
+    repo.session.scalar.return_value = False
+
+    # Test
+    with patch("cruds.tron_address_rollup.utcnow", return_value=NOW):
+        watermark = await repo.refresh(lag=timedelta(minutes=5))
+
+    # Assert
+    assert watermark is None
+    repo.session.execute.assert_not_awaited()
+    repo.session.rollback.assert_awaited_once()
+    repo.redis.set.assert_not_awaited()
+
+
+def test_upsert_statements_compile(repo):
+    for stmt in (
+        repo._upsert_hours_stmt(NOW - timedelta(hours=1), NOW),
+        repo._upsert_days_stmt(NOW - timedelta(days=1), NOW),
+    ):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (period, address, bucket_start) DO UPDATE" in sql
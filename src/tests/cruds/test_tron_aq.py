@@ -0,0 +1,378 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from common.redis_cache import TrackedCache
+from cruds.tron_aq import (
+    INSTANCES_QTY_IN_CACHE,
+    TronAddressQueryRepository,
+    decode_cursor,
+    encode_cursor,
+)
+from models.tron_address_query import TronAddressQuery
+
+
+def make_instance(address="TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu"):
+    instance = TronAddressQuery(address=address, address_data={"trx_balance": 1.5})
+    instance.id = uuid.uuid4()
+    instance.created_at = datetime(2025, 4, 24, 6, 30)
+    instance.updated_at = datetime(2025, 4, 24, 6, 30)
+    return instance
+
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock()
+    session.add_all = MagicMock()
+    return session
+
+
+@pytest.fixture
+def mock_pipeline():
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipeline)
+    pipeline.__aexit__ = AsyncMock(return_value=None)
+    return pipeline
+
+
+@pytest.fixture
+def mock_redis(mock_pipeline):
+    redis = AsyncMock()
+    redis.pipeline = MagicMock(return_value=mock_pipeline)
+    redis.register_script = MagicMock(return_value=AsyncMock())
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_cache_instances_pushes_to_ring_buffer(mock_session, mock_redis, mock_pipeline):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    instance = make_instance()
+    repo._serialize = MagicMock(return_value=b"row")
+
+    # Test
+    await repo._cache_instances([instance, instance])
+
+    # Assert
+    key = repo._get_cache_key()
+    mock_redis.pipeline.assert_called_once_with(transaction=True)
+    mock_pipeline.lpush.assert_called_once_with(key, b"row", b"row")
+    mock_pipeline.ltrim.assert_called_once_with(key, 0, INSTANCES_QTY_IN_CACHE - 1)
+    mock_pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_paginated_returns_cached_page(mock_session, mock_redis):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    repo._get_page.return_value = [b"7", b'{"records":[]}', b"1000"]
+
+    # Test
+    page = await repo.get_paginated(page_size=10, page_number=3)
+
+    # Assert
+    assert page.serialized == b'{"records":[]}'
+    repo._get_page.assert_awaited_once_with(
+        keys=["tron_address_query:generation", "tron_address_query:count"],
+        args=["tron_address_query:pages:", "10:3:1"],
+    )
+    mock_redis.lrange.assert_not_called()
+    mock_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_paginated_keeps_page_in_tracked_cache(mock_session, mock_redis):
+    # Setup
+    tracked_cache = TrackedCache([TronAddressQueryRepository.GENERATION_KEY], max_size=10, ttl=60)
+    tracked_cache.enable()
+    repo = TronAddressQueryRepository(mock_session, mock_redis, tracked_cache=tracked_cache)
+    repo._get_page.return_value = [b"7", b'{"records":[]}', b"1000"]
+
+    # Test
+    first = await repo.get_paginated(page_size=10, page_number=3)
+    second = await repo.get_paginated(page_size=10, page_number=3)
+    tracked_cache.invalidate([repo._get_generation_key()])
+    third = await repo.get_paginated(page_size=10, page_number=3)
+
+    # Assert
+    assert first.serialized == second.serialized == third.serialized == b'{"records":[]}'
+    assert repo._get_page.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_paginated_reads_slice_from_cache(mock_session, mock_redis, mock_pipeline):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    instance = make_instance()
+    repo._get_page.return_value = [b"7", None, b"1000"]
+    mock_redis.lrange.return_value = [repo._serialize(instance)] * 10
+
+    # Test
+    page = await repo.get_paginated(page_size=10, page_number=3)
+    await repo.cache_page(page, b"serialized")
+
+    # Assert
+    mock_redis.lrange.assert_awaited_once_with(repo._get_cache_key(), 20, 29)
+    mock_session.execute.assert_not_called()
+    mock_session.scalar.assert_not_called()
+    mock_redis.get.assert_not_called()
+    assert page.serialized is None
+    assert page.total == 1000
+    assert len(page.records) == 10
+    assert page.records[0]["address"] == instance.address
+    assert page.records[0]["address_data"] == instance.address_data
+    mock_pipeline.hset.assert_called_once_with(
+        "tron_address_query:pages:7", "10:3:1", b"serialized"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_paginated_falls_back_to_db(mock_session, mock_redis, mock_pipeline):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    instance = make_instance()
+    mock_session.execute.return_value = [
+        (instance.created_at, instance.address, 1, 2, 3, 4, 5.5)
+    ]
+    mock_session.scalar.return_value = 1000
+
+    # Test
+    page = await repo.get_paginated(
+        page_size=10, page_number=11, exact_total=False
+    )
+    await repo.cache_page(page, b"serialized")
+
+    # Assert
+    repo._get_page.assert_not_called()
+    mock_redis.pipeline.assert_not_called()
+    mock_session.execute.assert_awaited_once()
+    assert page.total == 1000
+    assert page.records == [
+        {
+            "created_at": instance.created_at,
+            "address": instance.address,
+            "address_data": {
+                "bandwidth_used": 1,
+                "bandwidth_limit": 2,
+                "energy_used": 3,
+                "energy_limit": 4,
+                "trx_balance": 5.5,
+            },
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cache_instances_counts_records(mock_session, mock_redis, mock_pipeline):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+
+    # Test
+    await repo._cache_instances([make_instance(), make_instance()])
+
+    # Assert
+    repo.counter._incr.assert_awaited_once_with(
+        keys=["tron_address_query:count", "tron_address_query:count_delta"],
+        args=[2],
+        client=mock_pipeline,
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_instances_leaves_counting_to_writer(mock_session, mock_redis):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis, AsyncMock())
+
+    # Test
+    await repo._cache_instances([make_instance()])
+
+    # Assert
+    repo.counter._incr.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_count_seeds_missing_counter_on_primary(mock_session, mock_redis):
+    # Setup
+    read_session = AsyncMock()
+    repo = TronAddressQueryRepository(
+        mock_session, mock_redis, read_session=read_session
+    )
+    mock_redis.get.return_value = None
+    mock_redis.set.return_value = True
+    mock_session.scalar.return_value = 42
+    # Two records were inserted while counting
+    repo.counter._seed = AsyncMock(return_value=b"44")
+
+    # Test
+    count = await repo.count()
+
+    # Assert
+    assert count == 44
+    read_session.scalar.assert_not_awaited()
+    mock_redis.set.assert_awaited_once_with(
+        "tron_address_query:count_delta", 0, nx=True, ex=300
+    )
+    repo.counter._seed.assert_awaited_once_with(
+        keys=["tron_address_query:count", "tron_address_query:count_delta"],
+        args=[42],
+    )
+
+
+@pytest.mark.asyncio
+async def test_count_leaves_seeding_to_another_worker(mock_session, mock_redis):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    mock_redis.get.return_value = None
+    mock_redis.set.return_value = None
+    mock_session.scalar.return_value = 40
+    repo.counter._seed = AsyncMock()
+
+    # Test
+    count = await repo.count()
+
+    # Assert
+    assert count == 40
+    # Only the estimate is read, no full scan
+    mock_session.scalar.assert_awaited_once()
+    assert "pg_class" in str(mock_session.scalar.await_args.args[0])
+    repo.counter._seed.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_counts_scan_once(mock_redis):
+    # Setup
+    keys = {}
+
+    async def set_nx(key, value, nx, ex):
+        if key in keys:
+            return None
+        keys[key] = value
+        return True
+
+    mock_redis.get.return_value = None
+    mock_redis.set.side_effect = set_nx
+    session = AsyncMock()
+    scanned = asyncio.Event()
+
+    async def scalar(statement, params=None):
+        if "pg_class" in str(statement):
+            return 40
+        await scanned.wait()
+        return 42
+
+    session.scalar.side_effect = scalar
+    repos = [TronAddressQueryRepository(session, mock_redis) for _ in range(2)]
+    for repo in repos:
+        repo.counter._seed = AsyncMock(return_value=b"42")
+
+    # Test
+    first = asyncio.create_task(repos[0].count())
+    second = asyncio.create_task(repos[1].count())
+    await asyncio.sleep(0)
+    scanned.set()
+    counts = await asyncio.gather(first, second)
+
+    # Assert
+    assert counts == [42, 40]
+    scans = [
+        call
+        for call in session.scalar.await_args_list
+        if "pg_class" not in str(call.args[0])
+    ]
+    assert len(scans) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "counter, estimate, dropped",
+    [(b"100000", 105_000, False), (b"100000", 150_000, True), (b"10", 900, False)],
+)
+async def test_reconcile_count(mock_session, mock_redis, counter, estimate, dropped):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    mock_redis.get.return_value = counter
+    mock_session.scalar.return_value = estimate
+
+    # Test
+    result = await repo.reconcile_count()
+
+    # Assert
+    assert result is dropped
+    assert mock_redis.delete.await_count == int(dropped)
+
+
+@pytest.mark.asyncio
+async def test_iter_export_continues_after_chunk(mock_session, mock_redis):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    rows = [MagicMock(created_at=datetime(2025, 5, 5), id=i) for i in range(3)]
+
+    def make_result(partitions):
+        async def iter_partitions():
+            for partition in partitions:
+                yield partition
+
+        result = MagicMock()
+        result.partitions = iter_partitions
+        return result
+
+    mock_session.stream.side_effect = [
+        make_result([rows[:2]]),
+        make_result([rows[2:]]),
+    ]
+
+    # Test
+    with patch("cruds.tron_aq.EXPORT_CHUNK_SIZE", 2):
+        batches = [batch async for batch in repo.iter_export()]
+
+    # Assert
+    assert batches == [rows[:2], rows[2:]]
+    assert mock_session.stream.await_count == 2
+    # Transaction ends after every chunk
+    assert mock_session.rollback.await_count >= 2
+
+
+def test_cursor_roundtrip():
+    # Setup
+    created_at = datetime(2025, 5, 5, 10, 0, 0, 123456)
+    id = uuid.uuid4()
+
+    # Test
+    cursor = encode_cursor(created_at, id)
+
+    # Assert
+    assert decode_cursor(cursor) == (created_at, id)
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+@pytest.mark.asyncio
+async def test_get_page_after_returns_next_cursor(mock_session, mock_redis):
+    # Setup
+    repo = TronAddressQueryRepository(mock_session, mock_redis)
+    instances = [make_instance() for _ in range(3)]
+    scalars = MagicMock()
+    scalars.all.return_value = instances
+    mock_session.scalars.return_value = scalars
+
+    # Test
+    records, next_cursor = await repo.get_page_after(page_size=2)
+
+    # Assert
+    assert records == instances[:2]
+    assert decode_cursor(next_cursor) == (instances[1].created_at, instances[1].id)
+
+
+def test_address_data_maps_to_metric_columns():
+    # Test
+    instance = make_instance()
+
+    # Assert
+    assert instance.trx_balance == 1.5
+    assert instance.bandwidth_used is None
+    assert instance.address_data == {"trx_balance": 1.5}
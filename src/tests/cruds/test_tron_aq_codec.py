@@ -0,0 +1,52 @@
+import json
+import pickle
+import uuid
+from datetime import datetime
+
+from cruds.tron_aq_codec import VERSION, decode_record, encode_record
+from models.tron_address_query import TronAddressQuery
+
+
+def make_instance(address_data):
+    instance = TronAddressQuery(
+        address="TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu", address_data=address_data
+    )
+    instance.id = uuid.uuid4()
+    instance.created_at = datetime(2025, 4, 24, 6, 30, 0, 123456)
+    instance.updated_at = datetime(2025, 4, 24, 6, 31)
+    return instance
+
+
+def test_round_trip_keeps_all_fields():
+    instance = make_instance(
+        {
+            "bandwidth_used": 267,
+            "bandwidth_limit": 600,
+            "energy_used": 0,
+            "energy_limit": None,
+            "trx_balance": 1520.123456,
+        }
+    )
+
+    raw = encode_record(instance)
+
+    assert raw[0] == VERSION
+    assert decode_record(raw) == {
+        "id": str(instance.id),
+        "address": instance.address,
+        "address_data": instance.address_data,
+        "created_at": "2025-04-24T06:30:00.123456",
+        "updated_at": "2025-04-24T06:31:00",
+    }
+
+
+def test_decodes_legacy_json_entries():
+    record = {"id": str(uuid.uuid4()), "address": "T", "address_data": None}
+
+    assert decode_record(json.dumps(record).encode()) == record
+
+
+def test_unknown_format_is_not_decoded():
+    raw = pickle.dumps({"address": "T"})
+
+    assert decode_record(raw) is None
@@ -0,0 +1,291 @@
+import asyncio
+
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import RedisError, ResponseError
+
+from cruds.tron_aq import TronAddressQueryRepository
+from cruds.tron_aq_writer import (
+    TronAddressQueryStreamWriter,
+    TronAddressQueryWriter,
+)
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_by_size_and_on_stop():
+    # Setup
+    writer = TronAddressQueryWriter(
+        MagicMock(), batch_size=3, flush_interval=60, max_queue_size=100
+    )
+    writer._write = AsyncMock()
+    await writer.start()
+
+    # Test
+    await writer.put([{"n": i} for i in range(4)])
+    await asyncio.sleep(0.01)
+    flushed_before_stop = writer._write.await_count
+    await writer.stop()
+
+    # Assert
+    assert flushed_before_stop == 1
+    batches = [call.args[0] for call in writer._write.await_args_list]
+    assert batches == [[{"n": 0}, {"n": 1}, {"n": 2}], [{"n": 3}]]
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_by_time():
+    # Setup
+    writer = TronAddressQueryWriter(
+        MagicMock(), batch_size=100, flush_interval=0.01, max_queue_size=100
+    )
+    writer._write = AsyncMock()
+    await writer.start()
+
+    # Test
+    await writer.put([{"n": 0}])
+    await asyncio.sleep(0.05)
+
+    # Assert
+    writer._write.assert_awaited_once_with([{"n": 0}])
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_repository_queues_records_to_writer():
+    # Setup
+    session = AsyncMock()
+    writer = AsyncMock(spec=TronAddressQueryWriter)
+    repo = TronAddressQueryRepository(
+        session, AsyncMock(register_script=MagicMock()), writer
+    )
+    repo._cache_instances = AsyncMock()
+
+    # Test
+    instance = await repo.insert_record(
+        "TRfffNywtDL6wEamxg8V46LJfyR8Fvy7nu", {"trx_balance": 1.5}
+    )
+
+    # Assert
+    session.commit.assert_not_called()
+    (rows,) = writer.put.await_args.args
+    assert rows[0]["id"] == instance.id
+    assert rows[0]["address"] == instance.address
+    assert rows[0]["created_at"] == instance.created_at
+
+
+@pytest.mark.asyncio
+async def test_writer_counts_records_after_commit():
+    # Setup
+    redis = MagicMock()
+    redis.register_script = MagicMock(return_value=AsyncMock())
+    writer = TronAddressQueryWriter(
+        redis, batch_size=100, flush_interval=60, max_queue_size=100
+    )
+    session = AsyncMock()
+    # One of three rows was already written
+    session.execute.return_value = MagicMock(all=MagicMock(return_value=[1, 2]))
+
+    @asynccontextmanager
+    async def session_acm():
+        yield session
+
+    # Test
+    with patch("cruds.tron_aq_writer.session_acm", session_acm):
+        await writer._write([{"n": 0}, {"n": 1}, {"n": 2}])
+
+    # Assert
+    session.commit.assert_awaited_once()
+    writer._counter._incr.assert_awaited_once_with(
+        keys=["tron_address_query:count", "tron_address_query:count_delta"],
+        args=[2],
+        client=None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_writer_requeues_failed_batch():
+    # Setup
+    writer = TronAddressQueryWriter(
+        MagicMock(), batch_size=2, flush_interval=0.01, max_queue_size=100
+    )
+    writer._write = AsyncMock(side_effect=[Exception("db down"), None])
+    await writer.start()
+
+    # Test
+    await writer.put([{"n": 0}, {"n": 1}])
+    await asyncio.sleep(0.05)
+    await writer.stop()
+
+    # Assert
+    batches = [call.args[0] for call in writer._write.await_args_list]
+    assert batches == [[{"n": 0}, {"n": 1}], [{"n": 0}, {"n": 1}]]
+
+
+@pytest.mark.asyncio
+async def test_writer_counts_rows_not_fitting_queue():
+    # Setup
+    writer = TronAddressQueryWriter(
+        MagicMock(), batch_size=3, flush_interval=60, max_queue_size=2
+    )
+    writer._queue.put_nowait({"n": 3})
+
+    # Test
+    with patch("cruds.tron_aq_writer.WRITE_BEHIND_DROPPED") as dropped:
+        writer._requeue([{"n": 0}, {"n": 1}, {"n": 2}])
+
+    # Assert
+    assert writer._drain() == [{"n": 3}, {"n": 0}]
+    dropped.inc.assert_called_once_with(amount=2)
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_failed_batch_on_stop():
+    # Setup
+    writer = TronAddressQueryWriter(
+        MagicMock(), batch_size=100, flush_interval=60, max_queue_size=100
+    )
+    writer._write = AsyncMock(side_effect=Exception("db down"))
+    await writer.start()
+    await writer.put([{"n": 0}])
+
+    # Test
+    with patch("cruds.tron_aq_writer.WRITE_BEHIND_DROPPED") as dropped:
+        await writer.stop()
+
+    # Assert
+    writer._write.assert_awaited_once_with([{"n": 0}])
+    dropped.inc.assert_called_once_with(amount=1)
+
+
+def test_stream_writer_initializes_base():
+    # Setup
+    redis = MagicMock()
+
+    # Test
+    writer = TronAddressQueryStreamWriter(
+        redis, batch_size=10, flush_interval=1
+    )
+
+    # Assert
+    assert writer._batch_size == 10
+    assert writer._task is None
+    assert writer._counter._redis is redis
+
+
+def make_pipeline():
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock()
+    pipeline.__aenter__ = AsyncMock(return_value=pipeline)
+    pipeline.__aexit__ = AsyncMock(return_value=None)
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_survives_redis_errors():
+    # Setup
+    writer = TronAddressQueryStreamWriter(
+        MagicMock(), batch_size=10, flush_interval=0.01
+    )
+    writer._read = AsyncMock(return_value=[])
+    writer._claim_stale = AsyncMock(
+        side_effect=[RedisError("timeout"), [], [], [], []]
+    )
+    writer._flush_entries = AsyncMock()
+    writer._task = asyncio.create_task(writer._run())
+
+    # Test
+    await asyncio.sleep(0.03)
+    await writer.stop()
+
+    # Assert
+    assert writer._claim_stale.await_count > 1
+    assert writer._flush_entries.await_count > 0
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_recreates_lost_group():
+    # Setup
+    redis = MagicMock()
+    redis.xgroup_create = AsyncMock()
+    writer = TronAddressQueryStreamWriter(
+        redis, batch_size=10, flush_interval=0.01
+    )
+    writer._read = AsyncMock(return_value=[])
+    writer._claim_stale = AsyncMock(
+        side_effect=[ResponseError("NOGROUP No such key"), [], [], [], []]
+    )
+    writer._flush_entries = AsyncMock()
+    writer._task = asyncio.create_task(writer._run())
+
+    # Test
+    await asyncio.sleep(0.03)
+    await writer.stop()
+
+    # Assert
+    redis.xgroup_create.assert_awaited_once_with(
+        writer.STREAM_KEY, writer.GROUP_NAME, id="0", mkstream=True
+    )
+    assert writer._flush_entries.await_count > 0
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_drains_all_own_pending_entries():
+    # Setup
+    writer = TronAddressQueryStreamWriter(
+        MagicMock(), batch_size=1, flush_interval=0.01
+    )
+    first, second = (b"1-0", {}), (b"2-0", {})
+    writer._read = AsyncMock(side_effect=[[first], [second], []])
+    writer._flush_entries = AsyncMock()
+    # Ends the run once pending entries are drained
+    writer._claim_stale = AsyncMock(side_effect=asyncio.CancelledError())
+
+    # Test
+    with pytest.raises(asyncio.CancelledError):
+        await writer._run()
+
+    # Assert
+    assert [call.args[0] for call in writer._read.await_args_list] == [
+        "0",
+        b"1-0",
+        b"2-0",
+    ]
+    flushed = [call.args[0] for call in writer._flush_entries.await_args_list]
+    assert flushed == [[first], [second]]
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_dead_letters_exhausted_rows():
+    # Setup
+    pipeline = make_pipeline()
+    pipeline.execute.side_effect = [
+        [[{"times_delivered": 3}], [{"times_delivered": 1}]],
+        None,
+        None,
+    ]
+    redis = MagicMock()
+    redis.pipeline = MagicMock(return_value=pipeline)
+    writer = TronAddressQueryStreamWriter(
+        redis, batch_size=10, flush_interval=1, max_deliveries=3
+    )
+    writer._load_row = MagicMock(side_effect=lambda raw: raw)
+    writer._write = AsyncMock(side_effect=Exception("bad row"))
+    poisoned, fresh = (b"1-0", {b"row": b"a"}), (b"2-0", {b"row": b"b"})
+
+    # Test
+    await writer._flush_entries([poisoned, fresh])
+
+    # Assert
+    batches = [call.args[0] for call in writer._write.await_args_list]
+    assert batches == [[b"a", b"b"], [b"a"]]
+    pipeline.xadd.assert_called_once_with(
+        "tron_address_query:dead", {b"row": b"a"}
+    )
+    pipeline.xack.assert_called_once_with(
+        "tron_address_query:pending", "tron_address_query_writers", b"1-0"
+    )
+    pipeline.xdel.assert_called_once_with(
+        "tron_address_query:pending", b"1-0"
+    )
@@ -0,0 +1,111 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from clients.tron import TronClient
+from clients.tron.schemas import BlockModel
+from tasks.blocks import BlockFollower
+
+
+def make_block(number, *contract_values):
+    return BlockModel.model_validate(
+        {
+            "blockID": f"block{number}",
+            "block_header": {"raw_data": {"number": number}},
+            "transactions": [
+                {
+                    "txID": f"tx{number}",
+                    "raw_data": {
+                        "contract": [
+                            {
+                                "type": "TransferContract",
+                                "parameter": {"value": value},
+                            }
+                            for value in contract_values
+                        ]
+                    },
+                }
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def follower():
+    follower = BlockFollower(
+        TronClient(MagicMock()),
+        MagicMock(),
+        cache=AsyncMock(),
+        interval=3,
+        max_batch=20,
+        max_lag=100,
+        watchlist=True,
+    )
+    follower._checkpoints = AsyncMock()
+    follower._watchlist = AsyncMock()
+    follower._tron_client.get_now_block = AsyncMock()
+    follower._tron_client.get_block_by_num = AsyncMock()
+    return follower
+
+
+def test_touched_addresses_of_block():
+    block = make_block(
+        1,
+        {"owner_address": "TOwner", "to_address": "TReceiver", "amount": 1},
+        {"owner_address": "TOwner", "contract_address": "TContract"},
+    )
+
+    assert block.touched_addresses() == {"TOwner", "TReceiver", "TContract"}
+
+
+@pytest.mark.asyncio
+async def test_follow_processes_blocks_after_checkpoint(follower):
+    # Setup
+    follower._checkpoints.get_checkpoint.return_value = 10
+    follower._tron_client.get_now_block.return_value = make_block(
+        12, {"owner_address": "THead"}
+    )
+    follower._tron_client.get_block_by_num.return_value = make_block(
+        11, {"owner_address": "TPrevious"}
+    )
+
+    # Test
+    processed = await follower._follow()
+
+    # Assert
+    assert processed == 2
+    follower._tron_client.get_block_by_num.assert_awaited_once_with(11)
+    follower._cache.delete.assert_any_await(["TPrevious"])
+    follower._cache.delete.assert_any_await(["THead"])
+    follower._watchlist.mark_due.assert_any_await(["THead"])
+    follower._checkpoints.set_checkpoint.assert_awaited_with(12)
+
+
+@pytest.mark.asyncio
+async def test_follow_stops_at_block_missing_on_node(follower):
+    # Setup
+    follower._checkpoints.get_checkpoint.return_value = 10
+    follower._tron_client.get_now_block.return_value = make_block(12)
+    # Node behind the balancer returns empty block
+    follower._tron_client.get_block_by_num.return_value = BlockModel()
+
+    # Test
+    processed = await follower._follow()
+
+    # Assert
+    assert processed == 0
+    follower._checkpoints.set_checkpoint.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_follow_skips_to_head_when_far_behind(follower):
+    # Setup
+    follower._checkpoints.get_checkpoint.return_value = 10
+    follower._tron_client.get_now_block.return_value = make_block(500)
+
+    # Test
+    processed = await follower._follow()
+
+    # Assert
+    assert processed == 1
+    follower._tron_client.get_block_by_num.assert_not_called()
+    follower._checkpoints.set_checkpoint.assert_awaited_once_with(500)
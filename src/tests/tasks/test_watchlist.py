@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from clients.tron import TronClient, TronClientException
+from clients.tron.schemas import AccountInfoModel
+from tasks.watchlist import WatchlistPoller
+
+
+def make_account_info(address, trx_balance=1.0):
+    return AccountInfoModel(
+        address=address,
+        bandwidth_used=0,
+        bandwidth_limit=0,
+        energy_used=0,
+        energy_limit=0,
+        trx_balance=trx_balance,
+    )
+
+
+@pytest.fixture
+def poller():
+    poller = WatchlistPoller(
+        TronClient(MagicMock()),
+        MagicMock(),
+        cache=AsyncMock(),
+        writer=None,
+        min_interval=5,
+        max_interval=300,
+        max_rps=10,
+        concurrency=4,
+    )
+    poller._watchlist = AsyncMock()
+    return poller
+
+
+@pytest.mark.asyncio
+async def test_refresh_adapts_poll_intervals(poller):
+    # Setup
+    changed, idle, failing = "changed", "idle", "failing"
+    idle_data = make_account_info(idle).model_dump(exclude={"address"})
+    poller._watchlist.get_states.return_value = {
+        changed: {"interval": 40, "data": None},
+        idle: {"interval": 40, "data": idle_data},
+        failing: {"interval": 200, "data": None},
+    }
+
+    async def mock_iter_accounts_info(addresses, concurrency):
+        yield changed, make_account_info(changed, trx_balance=2.0)
+        yield idle, make_account_info(idle)
+        yield failing, TronClientException(429, "Too many requests")
+
+    poller._tron_client.iter_accounts_info = mock_iter_accounts_info
+
+    # Test
+    with patch("tasks.watchlist.session_acm") as session_acm, patch(
+        "tasks.watchlist.UoW"
+    ) as uow:
+        uow.return_value.tron_aq = AsyncMock()
+        await poller._refresh([changed, idle, failing])
+
+    # Assert
+    (states,) = poller._watchlist.reschedule.await_args.args
+    assert states[changed]["interval"] == 5
+    assert states[idle]["interval"] == 80
+    assert states[failing]["interval"] == 300
+    assert poller._cache.set.await_count == 2
+    (records,) = uow.return_value.tron_aq.insert_records.await_args.args
+    assert [address for address, _ in records] == [changed]
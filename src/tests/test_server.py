@@ -0,0 +1,43 @@
+import pytest
+
+from server import get_worker_env, prepare_metrics_dir, split_connections
+from settings.server import ServerSettings
+
+
+def test_split_connections_between_workers():
+    assert split_connections(100, 8) == 12
+    assert split_connections(8, 8) == 1
+
+
+def test_split_connections_rejects_fewer_than_workers():
+    with pytest.raises(ValueError):
+        split_connections(4, 8)
+
+
+def test_get_worker_env_divides_totals_between_workers():
+    settings = ServerSettings(
+        SERVER_WORKERS=4,
+        SERVER_DB_CONNECTIONS=40,
+        SERVER_REDIS_CONNECTIONS=100,
+        SERVER_HTTPX_CONNECTIONS=200,
+    )
+
+    assert get_worker_env(settings) == {
+        "DB_POOL_SIZE": "5",
+        "DB_MAX_OVERFLOW": "5",
+        "REDIS_MAX_CONNECTIONS": "25",
+        "HTTPX_MAX_CONNECTIONS": "50",
+        "HTTPX_MAX_KEEPALIVE_CONNECTIONS": "50",
+    }
+
+
+def test_get_worker_env_keeps_defaults_without_totals():
+    assert get_worker_env(ServerSettings(SERVER_WORKERS=4)) == {}
+
+
+def test_prepare_metrics_dir_empties_given_directory(tmp_path):
+    (tmp_path / "123.json").write_text("{}")
+    settings = ServerSettings(SERVER_WORKERS=2, SERVER_METRICS_DIR=str(tmp_path))
+
+    assert prepare_metrics_dir(settings) == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []